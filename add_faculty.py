@@ -3,6 +3,7 @@ from werkzeug.security import generate_password_hash
 
 def add_faculty_members():
     app, Employee = create_app()
+    Subject = app.Subject
     with app.app_context():
         # Faculty data: name, email, password, subject
         faculty_data = [
@@ -20,12 +21,18 @@ def add_faculty_members():
             existing = Employee.query.filter_by(email=fac["email"]).first()
             if not existing:
                 try:
+                    subject = Subject.query.filter_by(name=fac["subject"].lower()).first()
+                    if not subject:
+                        subject = Subject(name=fac["subject"].lower(), display_name=fac["subject"])
+                        db.session.add(subject)
+                        db.session.flush()
                     faculty = Employee(
                         name=fac["name"],
                         email=fac["email"],
                         position=f"Professor - {fac['subject']}",
                         password_hash=generate_password_hash(fac["password"]),
-                        role='faculty'
+                        role='faculty',
+                        subject_id=subject.id
                     )
                     db.session.add(faculty)
                     print(f"Added faculty for {fac['subject']}")
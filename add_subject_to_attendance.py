@@ -1,60 +1,78 @@
-# Script to add subject column to attendance_logs table
+# Script to move attendance_logs / faculty subjects onto the subjects table.
+# For databases created by create_app() rather than `flask db upgrade`; the
+# Alembic migration 53c9db490458 performs the same backfill.
 from app import create_app, db
 
 app, Employee = create_app()
 with app.app_context():
-    # Get the models from the app context
-    models = {}
-    for name in dir(app):
-        obj = getattr(app, name)
-        if hasattr(obj, '__tablename__'):
-            models[name] = obj
-    
-    # Find AttendanceLog model
-    AttendanceLog = None
-    for name, model in models.items():
-        if hasattr(model, '__tablename__') and model.__tablename__ == 'attendance_logs':
-            AttendanceLog = model
-            break
-    
-    if AttendanceLog is None:
-        print("AttendanceLog model not found!")
-        exit(1)
-    
-    # Check if subject column already exists
+    AttendanceLog = app.AttendanceLog
+    Subject = app.Subject
+
+    # create_app() has already created the subjects table; add any missing columns
     inspector = db.inspect(db.engine)
-    columns = inspector.get_columns('attendance_logs')
-    has_subject = any(col['name'] == 'subject' for col in columns)
-    
-    if not has_subject:
-        # Add subject column
-        with db.engine.connect() as conn:
-            conn.execute(db.text("ALTER TABLE attendance_logs ADD COLUMN subject VARCHAR(50)"))
-            conn.commit()
-        print("✓ Added subject column to attendance_logs table")
+    added = False
+    for table, column, ddl in (
+        ('attendance_logs', 'subject', "ALTER TABLE attendance_logs ADD COLUMN subject VARCHAR(50)"),
+        ('attendance_logs', 'subject_id', "ALTER TABLE attendance_logs ADD COLUMN subject_id INTEGER REFERENCES subjects (id)"),
+        ('employees', 'subject_id', "ALTER TABLE employees ADD COLUMN subject_id INTEGER REFERENCES subjects (id)"),
+    ):
+        if not any(col['name'] == column for col in inspector.get_columns(table)):
+            with db.engine.connect() as conn:
+                conn.execute(db.text(ddl))
+                conn.commit()
+            added = True
+            print(f"✓ Added {column} column to {table} table")
+    if added:
+        # New columns need the indexes create_app() could not build yet
+        db.create_all()
     else:
-        print("✓ Subject column already exists")
-    
-    # Create a mapping of faculty to subjects
-    faculty_subjects = {
-        'dbms_faculty': 'DBMS',
-        'genai_faculty': 'Generative AI',
-        'maths_m1_faculty': 'Maths M1',
-        'cloudsec_faculty': 'Cloud Security',
-        'nlp_faculty': 'NLP',
-        'java_faculty': 'Java Full Stack',
-        'python_faculty': 'Python'
-    }
-    
-    # Update existing attendance logs with subject based on faculty
-    print("\nUpdating existing attendance records with subject information...")
-    for faculty_name, subject in faculty_subjects.items():
-        # Get faculty member
-        faculty = Employee.query.filter_by(name=faculty_name).first()
-        if faculty:
-            # Update attendance logs for this faculty with the subject
-            # Note: This assumes attendance logs are linked to faculty somehow
-            # You may need to adjust this logic based on your actual data structure
-            print(f"  - {faculty_name} -> {subject}")
-    
+        print("✓ Subject columns already exist")
+
+    subjects = {s.name: s for s in Subject.query.all()}
+
+    def subject_for(name):
+        key = (name or '').strip().lower()
+        if not key:
+            return None
+        if key not in subjects:
+            subjects[key] = Subject(name=key, display_name=name.strip())
+            db.session.add(subjects[key])
+            print(f"  + subject {name.strip()}")
+        return subjects[key]
+
+    # Faculty subject used to be parsed from the position, e.g. "Professor - DBMS"
+    print("\nLinking faculty to subjects...")
+    for faculty in Employee.query.filter_by(role='faculty', subject_id=None).all():
+        subject = subject_for((faculty.position or '').replace("Professor - ", ""))
+        if subject:
+            db.session.flush()
+            faculty.subject_id = subject.id
+            print(f"  - {faculty.name} -> {subject.display_name}")
+
+    print("\nUpdating existing attendance records with subject ids...")
+    names = db.session.query(AttendanceLog.subject).filter(
+        AttendanceLog.subject.isnot(None), AttendanceLog.subject_id.is_(None)
+    ).distinct().all()
+    for (name,) in names:
+        subject = subject_for(name)
+        if subject:
+            db.session.flush()
+            count = AttendanceLog.query.filter(
+                AttendanceLog.subject == name, AttendanceLog.subject_id.is_(None)
+            ).update({AttendanceLog.subject_id: subject.id}, synchronize_session=False)
+            print(f"  - {name!r}: {count} logs")
+
+    # Students who have marked attendance for a subject are enrolled in it
+    print("\nEnrolling students in the subjects they attend...")
+    Enrollment = app.Enrollment
+    db.session.flush()
+    enrolled = set(db.session.query(Enrollment.subject_id, Enrollment.student_id))
+    pairs = db.session.query(AttendanceLog.subject_id, AttendanceLog.employee_id).join(
+        Employee, Employee.id == AttendanceLog.employee_id
+    ).filter(AttendanceLog.subject_id.isnot(None), Employee.role == 'student').distinct().all()
+    new_pairs = [tuple(p) for p in pairs if tuple(p) not in enrolled]
+    db.session.add_all([Enrollment(subject_id=subject_id, student_id=student_id) for subject_id, student_id in new_pairs])
+    print(f"  - {len(new_pairs)} new enrollments")
+
+    db.session.commit()
     print("\n✓ Database updated successfully!")
@@ -1,16 +1,34 @@
+import atexit
+import base64
+import mimetypes
 import os
+import json
+import uuid
 from datetime import datetime, date, time, timedelta, timezone
 from functools import wraps
-from math import radians, sin, cos, atan2, sqrt
-from flask import Flask, render_template, jsonify, request, send_from_directory, make_response, redirect
+from flask import Flask, Response, render_template, jsonify, request, send_file, send_from_directory, make_response, redirect, stream_with_context, url_for
 from flask_cors import CORS
-from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
 import re
 from dotenv import load_dotenv
+from assets import AssetManifest
+from page_cache import PageCache
+import attendance_summary
+from export import csv_chunks, ndjson_chunks, gzip_chunks
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from sqlalchemy.exc import IntegrityError
 from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+from hashing import HashingPool, PoolSaturated
+from location_cache import LocationCache
+import metrics as request_metrics
+from photo_store import PhotoStore, PhotoTooLarge, NotAnImage
+from recent_events import RecentEvents
+from roster_cache import RosterCache, RosterStudent
+from student_state import StudentState, StudentStateCache
+import sqlite_profile
+from token_cache import VerifiedTokenCache
+from write_behind import WriteBehindQueue
 
 # Load environment variables from .env if present
 load_dotenv()
@@ -32,10 +50,55 @@ def create_app():
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['UPLOAD_FOLDER'] = os.path.join(os.path.dirname(__file__), 'uploads')
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    # Photos are stored by content hash, with thumbnails, under PHOTO_FOLDER
+    photo_store = PhotoStore(
+        os.getenv('PHOTO_FOLDER') or os.path.join(app.config['UPLOAD_FOLDER'], 'photos'),
+        max_bytes=int(os.getenv('MAX_PHOTO_BYTES', str(5 * 1024 * 1024))),
+        sizes=[int(s) for s in os.getenv('PHOTO_THUMBNAIL_SIZES', '64,256').split(',')]
+    )
+    app.photo_store = photo_store
+
+    # SQLITE_PROFILE=production: WAL, busy_timeout and friends for concurrent workers
+    sqlite_production = (os.getenv('SQLITE_PROFILE') == 'production'
+                         and sqlite_profile.is_sqlite_file(app.config['SQLALCHEMY_DATABASE_URI']))
+    busy_timeout_ms = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+    if sqlite_production:
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = sqlite_profile.engine_options(
+            busy_timeout_ms=busy_timeout_ms,
+            pool_size=int(os.getenv('DB_POOL_SIZE', '10')),
+            max_overflow=int(os.getenv('DB_MAX_OVERFLOW', '20'))
+        )
 
     # Initialize extensions
     db.init_app(app)
+    if sqlite_production:
+        with app.app_context():
+            sqlite_profile.install(db.engine, sqlite_profile.pragmas(
+                busy_timeout_ms=busy_timeout_ms,
+                mmap_size=int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+                cache_size_kib=int(os.getenv('SQLITE_CACHE_SIZE_KIB', str(64 * 1024)))
+            ))
     migrate.init_app(app, db)
+
+    # Per-endpoint latency, status and SQL metrics for /metrics; METRICS=0 turns them off
+    metrics = request_metrics.Metrics()
+    app.metrics = metrics
+    metrics_enabled = os.getenv('METRICS', '1') == '1'
+    if metrics_enabled:
+        with app.app_context():
+            metrics.install(db.engine)
+        app.before_request(metrics.start_request)
+
+        @app.after_request
+        def record_request(response):
+            metrics.end_request(request.endpoint, request.method, response.status_code)
+            return response
+
+        @app.teardown_request
+        def record_failed_request(exc):
+            # Only still pending when the response was never finalized
+            metrics.end_request(request.endpoint, request.method, 500)
+
     CORS(app)
 
     # Token signer for student auth
@@ -62,9 +125,19 @@ def create_app():
         password_hash = db.Column(db.String(200), nullable=False)
         role = db.Column(db.String(50), default='user')
         phone = db.Column(db.String(20), nullable=True)
+        subject_id = db.Column(db.Integer, db.ForeignKey('subjects.id'), nullable=True)  # Subject taught (faculty)
 
         logs = db.relationship('AttendanceLog', backref='employee', lazy=True)
 
+    class Subject(db.Model):
+        __tablename__ = 'subjects'
+        __table_args__ = (
+            db.UniqueConstraint('name', name='uq_subject_name'),
+        )
+        id = db.Column(db.Integer, primary_key=True)
+        name = db.Column(db.String(50), nullable=False)  # Normalized: stripped and lowercased
+        display_name = db.Column(db.String(50))
+
     class Location(db.Model):
         __tablename__ = 'locations'
         id = db.Column(db.Integer, primary_key=True)
@@ -75,6 +148,16 @@ def create_app():
 
     class AttendanceLog(db.Model):
         __tablename__ = 'attendance_logs'
+        __table_args__ = (
+            # Check-in/out, status and history: one student's day, ordered by check-in
+            db.Index('ix_attendance_logs_employee_date_checkin', 'employee_id', 'date', 'check_in_time'),
+            # Subject attendance for one student's day
+            db.Index('ix_attendance_logs_employee_date_subject', 'employee_id', 'date', 'subject_id'),
+            # Faculty attendance: one subject on one day
+            db.Index('ix_attendance_logs_date_subject', 'date', 'subject_id', 'employee_id'),
+            # Delta sync: one student's rows changed since a sequence number
+            db.Index('ix_attendance_logs_employee_change_seq', 'employee_id', 'change_seq'),
+        )
         id = db.Column(db.Integer, primary_key=True)
         employee_id = db.Column(db.Integer, db.ForeignKey('employees.id'), nullable=False)
         check_in_time = db.Column(db.DateTime)
@@ -83,58 +166,462 @@ def create_app():
         longitude = db.Column(db.Float)
         location_name = db.Column(db.String(120))
         date = db.Column(db.Date, default=date.today)
-        subject = db.Column(db.String(50))  # New column for subject
+        subject = db.Column(db.String(50))  # Subject name as submitted; queries use subject_id
+        subject_id = db.Column(db.Integer, db.ForeignKey('subjects.id'), nullable=True)
+        # Bumped from change_counters on every insert and update (see assign_change_seq)
+        change_seq = db.Column(db.Integer, nullable=True)
+
+    class ChangeCounter(db.Model):
+        """Named monotonic counters, incremented inside the writing transaction."""
+        __tablename__ = 'change_counters'
+        name = db.Column(db.String(50), primary_key=True)
+        value = db.Column(db.Integer, nullable=False, default=0)
+
+    class DailyAttendance(db.Model):
+        """Per student, subject (0 = campus session) and day totals; see attendance_summary.py."""
+        __tablename__ = 'daily_attendance'
+        __table_args__ = (
+            # Faculty reports: one subject over a date range
+            db.Index('ix_daily_attendance_subject_date', 'subject_id', 'date', 'employee_id'),
+        )
+        employee_id = db.Column(db.Integer, db.ForeignKey('employees.id'), primary_key=True)
+        subject_id = db.Column(db.Integer, primary_key=True, default=attendance_summary.NO_SUBJECT)
+        date = db.Column(db.Date, primary_key=True)
+        status = db.Column(db.String(20), nullable=False)
+        sessions = db.Column(db.Integer, nullable=False, default=0)
+        open_sessions = db.Column(db.Integer, nullable=False, default=0)
+        minutes = db.Column(db.Integer, nullable=False, default=0)
+
+    class AttendanceCounter(db.Model):
+        """Days attended per subject and student; employee_id 0 counts the days held."""
+        __tablename__ = 'attendance_counters'
+        subject_id = db.Column(db.Integer, primary_key=True)
+        employee_id = db.Column(db.Integer, primary_key=True)
+        count = db.Column(db.Integer, nullable=False, default=0)
+
+    class Enrollment(db.Model):
+        __tablename__ = 'enrollments'
+        __table_args__ = (
+            db.UniqueConstraint('subject_id', 'student_id', name='uq_enrollment_subject_student'),
+            db.Index('ix_enrollments_student', 'student_id'),
+        )
+        id = db.Column(db.Integer, primary_key=True)
+        subject_id = db.Column(db.Integer, db.ForeignKey('subjects.id'), nullable=False)
+        student_id = db.Column(db.Integer, db.ForeignKey('employees.id'), nullable=False)
+        section = db.Column(db.String(20), nullable=True)
+
+    class SyncEvent(db.Model):
+        """An offline check-in/check-out event, recorded once per client event id."""
+        __tablename__ = 'sync_events'
+        __table_args__ = (
+            db.UniqueConstraint('employee_id', 'event_id', name='uq_sync_event'),
+        )
+        id = db.Column(db.Integer, primary_key=True)
+        employee_id = db.Column(db.Integer, db.ForeignKey('employees.id'), nullable=False)
+        event_id = db.Column(db.String(64), nullable=False)
+        action = db.Column(db.String(20), nullable=True)
+        device_time = db.Column(db.DateTime, nullable=True)
+        received_at = db.Column(db.DateTime, default=datetime.utcnow)
+        # Response returned for the event, replayed for duplicates
+        status = db.Column(db.Integer, nullable=False)
+        result = db.Column(db.Text, nullable=False)
 
     with app.app_context():
-        db.create_all()
+        # A database under Alembic (it has alembic_version) gets its schema from
+        # `flask db upgrade`; creating tables here would make those migrations fail
+        if not db.inspect(db.engine).has_table('alembic_version'):
+            db.create_all()
         # Temporarily disable all checks during migration
         pass
 
-    # Decorators
-    def require_student(f):
-        @wraps(f)
-        def decorated(*args, **kwargs):
-            token = request.headers.get('Authorization', '').replace('Bearer ', '')
-            if not token:
-                token = request.args.get('token')
-            if not token:
-                return jsonify({"error": "Missing token"}), 401
-            try:
-                data = signer.loads(token, max_age=86400)  # 24 hours
-                request.student_id = data['employee_id']
-            except (BadSignature, SignatureExpired) as e:
-                return jsonify({"error": "Invalid or expired token"}), 401
-            return f(*args, **kwargs)
-        return decorated
+    # Expose models so maintenance scripts can reach them via the app
+    app.Employee = Employee
+    app.Location = Location
+    app.AttendanceLog = AttendanceLog
+    app.Subject = Subject
+    app.Enrollment = Enrollment
+    app.SyncEvent = SyncEvent
+    app.ChangeCounter = ChangeCounter
+    app.DailyAttendance = DailyAttendance
+    app.AttendanceCounter = AttendanceCounter
+
+    # Presidency University time; attendance dates are IST calendar dates
+    IST = timezone(timedelta(hours=5, minutes=30))
+
+    # Locations are read from an in-process cache; any ORM write to the table
+    # bumps its version once the transaction commits
+    location_cache_ttl = os.getenv('LOCATION_CACHE_TTL')
+    location_cache = LocationCache(
+        lambda: Location.query.order_by(Location.id).all(),
+        max_age=float(location_cache_ttl) if location_cache_ttl else None
+    )
+    app.location_cache = location_cache
+
+    def mark_locations_changed(mapper, connection, target):
+        session = db.inspect(target).session
+        if session is not None:
+            session.info['locations_changed'] = True
+
+    for event_name in ('after_insert', 'after_update', 'after_delete'):
+        db.event.listen(Location, event_name, mark_locations_changed)
+
+    # Class rosters (enrolled students per subject), cached the same way; the
+    # session collects the affected subject ids, None meaning "all rosters"
+    def load_roster(subject_id):
+        rows = db.session.query(Employee.id, Employee.name, Employee.position, Enrollment.section).join(
+            Enrollment, Enrollment.student_id == Employee.id
+        ).filter(Enrollment.subject_id == subject_id).order_by(Employee.id.asc()).all()
+        return [RosterStudent(*r) for r in rows]
+
+    roster_cache = RosterCache(load_roster)
+    app.roster_cache = roster_cache
+
+    def mark_rosters_changed(session, subject_id):
+        if session is not None:
+            session.info.setdefault('roster_subjects', set()).add(subject_id)
+
+    @db.event.listens_for(Enrollment, 'after_insert')
+    @db.event.listens_for(Enrollment, 'after_delete')
+    def mark_enrollment_added_or_removed(mapper, connection, target):
+        mark_rosters_changed(db.inspect(target).session, target.subject_id)
+
+    @db.event.listens_for(Enrollment, 'after_update')
+    def mark_enrollment_updated(mapper, connection, target):
+        # The row may have moved to another subject
+        mark_rosters_changed(db.inspect(target).session, None)
+
+    @db.event.listens_for(Employee, 'after_update')
+    def mark_student_updated(mapper, connection, target):
+        state = db.inspect(target)
+        if state.attrs.name.history.has_changes() or state.attrs.position.history.has_changes():
+            mark_rosters_changed(state.session, None)
+
+    @db.event.listens_for(Employee, 'after_delete')
+    def mark_student_deleted(mapper, connection, target):
+        mark_rosters_changed(db.inspect(target).session, None)
+
+    # Each student's state for today, written through from committed attendance changes
+    def naive_ist(value):
+        # Match what SQLite hands back: IST wall time without tzinfo
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(IST).replace(tzinfo=None)
+        return value
+
+    def campus_session():
+        # Subject marks from /student/subject_attendance have a subject but no
+        # coordinates; everything else is a check-in/check-out session
+        return db.or_(AttendanceLog.latitude.isnot(None), AttendanceLog.subject_id.is_(None))
+
+    def load_student_state(student_id, day):
+        """Latest campus session of the day in one indexed query, or None."""
+        row = db.session.query(
+            AttendanceLog.id, AttendanceLog.check_in_time, AttendanceLog.check_out_time, AttendanceLog.location_name
+        ).filter(
+            AttendanceLog.employee_id == student_id,
+            AttendanceLog.date == day,
+            AttendanceLog.check_in_time.isnot(None),
+            campus_session()
+        ).order_by(AttendanceLog.check_in_time.desc(), AttendanceLog.id.desc()).first()
+        return StudentState(row.id, naive_ist(row.check_in_time), naive_ist(row.check_out_time), row.location_name) if row else None
+
+    # Other worker processes write too and their commits do not reach this
+    # cache, so entries expire quickly; set it empty to keep them all day
+    student_state_ttl = os.getenv('STUDENT_STATE_TTL', '5')
+    student_states = StudentStateCache(
+        load_student_state,
+        max_age=float(student_state_ttl) if student_state_ttl else None
+    )
+    app.student_states = student_states
+
+    def mark_student_state(session, write):
+        if session is not None:
+            session.info.setdefault('student_states', []).append(write)
+
+    @db.event.listens_for(AttendanceLog, 'after_insert')
+    @db.event.listens_for(AttendanceLog, 'after_update')
+    def mark_attendance_written(mapper, connection, target):
+        if target.check_in_time is None or (target.latitude is None and target.subject_id is not None):
+            return
+        state = StudentState(target.id, naive_ist(target.check_in_time), naive_ist(target.check_out_time), target.location_name)
+        mark_student_state(db.inspect(target).session, (target.employee_id, target.date, state))
+
+    @db.event.listens_for(AttendanceLog, 'after_delete')
+    def mark_attendance_deleted(mapper, connection, target):
+        mark_student_state(db.inspect(target).session, (target.employee_id, None, None))
+
+    # Change sequence for delta sync: every inserted or updated attendance row
+    # gets the next value of the 'attendance_logs' counter. Bumping the counter
+    # takes the write lock until commit, so sequence order is commit order and
+    # a client that has seen N never misses a later change below N.
+    @db.event.listens_for(db.session, 'before_flush')
+    def assign_change_seq(session, flush_context, instances):
+        changed = [o for o in session.new if isinstance(o, AttendanceLog)]
+        changed += [o for o in session.dirty if isinstance(o, AttendanceLog) and session.is_modified(o)]
+        if not changed:
+            return
+        counters = ChangeCounter.__table__
+        conn = session.connection()
+        bumped = conn.execute(counters.update().where(counters.c.name == 'attendance_logs').values(
+            value=counters.c.value + len(changed)
+        ))
+        if bumped.rowcount == 0:
+            # Normally seeded by migration a4d81e6c5f27; continue after any existing sequence
+            start = conn.execute(db.select(db.func.max(AttendanceLog.__table__.c.change_seq))).scalar() or 0
+            conn.execute(counters.insert().values(name='attendance_logs', value=start + len(changed)))
+        top = conn.execute(db.select(counters.c.value).where(counters.c.name == 'attendance_logs')).scalar()
+        for seq, log in enumerate(changed, start=top - len(changed) + 1):
+            log.change_seq = seq
+
+    # Daily summary: fold this flush's attendance inserts, updates and deletes
+    # into daily_attendance as deltas, in the same transaction as the logs
+    @db.event.listens_for(db.session, 'before_flush')
+    def update_daily_attendance(session, flush_context, instances):
+        deltas = {}
+        for log in session.new:
+            if isinstance(log, AttendanceLog):
+                add_log_delta(deltas, log.employee_id, log.subject_id, log.date, log.latitude,
+                              log.check_in_time, log.check_out_time, 1)
+        changed = [o for o in session.dirty if isinstance(o, AttendanceLog) and session.is_modified(o)]
+        removed = [o for o in session.deleted if isinstance(o, AttendanceLog)]
+        if changed or removed:
+            # Old values straight from the database: expired objects carry no history
+            t = AttendanceLog.__table__
+            for row in session.connection().execute(db.select(
+                t.c.employee_id, t.c.subject_id, t.c.date, t.c.latitude, t.c.check_in_time, t.c.check_out_time
+            ).where(t.c.id.in_([o.id for o in changed + removed]))):
+                add_log_delta(deltas, *row, -1)
+            for log in changed:
+                add_log_delta(deltas, log.employee_id, log.subject_id, log.date, log.latitude,
+                              log.check_in_time, log.check_out_time, 1)
+        if deltas:
+            attendance_summary.apply_deltas(session.connection(), DailyAttendance.__table__, deltas,
+                                            AttendanceCounter.__table__)
+
+    def add_log_delta(deltas, employee_id, subject_id, day, latitude, check_in_time, check_out_time, sign):
+        if day is None:
+            return
+        attendance_summary.add_delta(
+            deltas, attendance_summary.summary_key(employee_id, subject_id, day),
+            *attendance_summary.contribution(naive_ist(check_in_time), naive_ist(check_out_time),
+                                             attendance_summary.is_subject_mark(subject_id, latitude)),
+            sign=sign)
+
+    @db.event.listens_for(db.session, 'do_orm_execute')
+    def mark_bulk_writes(orm_execute_state):
+        # Query.update()/delete() and ORM insert() statements skip the mapper events
+        if orm_execute_state.is_select:
+            return
+        mapper = orm_execute_state.bind_mapper
+        if mapper is Location.__mapper__:
+            orm_execute_state.session.info['locations_changed'] = True
+        elif mapper is Enrollment.__mapper__ or mapper is Employee.__mapper__:
+            mark_rosters_changed(orm_execute_state.session, None)
+        elif mapper is AttendanceLog.__mapper__:
+            mark_student_state(orm_execute_state.session, None)
+
+    @db.event.listens_for(db.session, 'after_commit')
+    def invalidate_caches(session):
+        if session.info.pop('locations_changed', False):
+            location_cache.invalidate()
+        subjects = session.info.pop('roster_subjects', None)
+        if subjects:
+            roster_cache.invalidate(None if None in subjects else subjects)
+        for write in session.info.pop('student_states', ()):
+            if write is None:
+                student_states.invalidate()
+            elif write[2] is None:
+                student_states.invalidate([write[0]])
+            else:
+                student_states.update(*write)
+
+    @db.event.listens_for(db.session, 'after_rollback')
+    def discard_cache_changes(session):
+        session.info.pop('locations_changed', None)
+        session.info.pop('roster_subjects', None)
+        session.info.pop('student_states', None)
+
+    # Tokens: verified tokens are cached until their 24h max_age runs out
+    TOKEN_MAX_AGE = 86400  # 24 hours
+    token_cache = VerifiedTokenCache(maxsize=int(os.getenv('TOKEN_CACHE_SIZE', '4096')))
+    app.token_cache = token_cache
+
+    def use_current_secret():
+        """Rebuild the signers if SECRET_KEY was rotated; old cached tokens stop matching."""
+        nonlocal secret, signer, faculty_signer
+        if app.config['SECRET_KEY'] != secret:
+            secret = app.config['SECRET_KEY']
+            signer = URLSafeTimedSerializer(secret_key=secret, salt='student-auth')
+            faculty_signer = URLSafeTimedSerializer(secret_key=secret, salt='faculty-auth')
+            token_cache.clear()
+
+    def load_student_token(token):
+        use_current_secret()
+        return token_cache.loads(signer, token, max_age=TOKEN_MAX_AGE)
+
+    def load_faculty_token(token):
+        use_current_secret()
+        return token_cache.loads(faculty_signer, token, max_age=TOKEN_MAX_AGE)
+
+    def dump_student_token(payload):
+        use_current_secret()
+        return signer.dumps(payload)
+
+    def dump_faculty_token(payload):
+        use_current_secret()
+        return faculty_signer.dumps(payload)
+
+    # Passwords are hashed on a bounded worker pool; when it is full, requests
+    # that need a hash get 503 + Retry-After instead of queueing without limit
+    hashing_pool = HashingPool(
+        max_workers=int(os.getenv('HASH_POOL_SIZE', str(max(1, (os.cpu_count() or 2) - 1)))),
+        max_queue=int(os.getenv('HASH_QUEUE_LIMIT', '32')),
+        method=os.getenv('PASSWORD_HASH_METHOD', 'scrypt'),
+        retry_after=int(os.getenv('HASH_RETRY_AFTER', '1'))
+    )
+    app.hashing_pool = hashing_pool
+
+    @app.errorhandler(PoolSaturated)
+    def hashing_pool_saturated(e):
+        resp = jsonify({"error": "Server is busy, please retry shortly"})
+        resp.status_code = 503
+        resp.headers['Retry-After'] = str(e.retry_after)
+        return resp
+
+    def upgrade_password_hash(user, password):
+        """Rehash on login when the stored hash uses outdated parameters."""
+        if not hashing_pool.needs_rehash(user.password_hash):
+            return
+        try:
+            user.password_hash = hashing_pool.hash_password(password)
+            db.session.commit()
+        except PoolSaturated:
+            pass  # Not urgent; the next login tries again
 
     # Utility
-    def haversine_distance(lat1, lon1, lat2, lon2):
-        R = 6371000.0
-        phi1, phi2 = radians(lat1), radians(lat2)
-        dphi = radians(lat2 - lat1)
-        dlambda = radians(lon2 - lon1)
-        a = sin(dphi/2)**2 + cos(phi1) * cos(phi2) * sin(dlambda/2)**2
-        c = 2 * atan2(sqrt(a), sqrt(1-a))
-        return R * c
-    
+    def normalize_subject(name):
+        return (name or '').strip().lower()
+
+    # Normalized subject name -> id. Subjects are never renamed or deleted, so
+    # entries stay valid; new subjects are only cached once read back committed.
+    subject_ids = {}
+    app.subject_ids = subject_ids
+
+    def get_subject_id(name, create=False):
+        key = normalize_subject(name)
+        if not key:
+            return None
+        subject_id = subject_ids.get(key)
+        if subject_id is not None:
+            return subject_id
+        subject = Subject.query.filter_by(name=key).first()
+        if subject:
+            subject_ids[key] = subject.id
+            return subject.id
+        if not create:
+            return None
+        subject = Subject(name=key, display_name=name.strip())
+        db.session.add(subject)
+        db.session.flush()
+        return subject.id
+
+    def load_faculty(name):
+        """Faculty id plus the id and name of the subject they teach."""
+        return db.session.query(Employee.id, Subject.id.label('subject_id'), Subject.name.label('subject_name')).outerjoin(
+            Subject, Subject.id == Employee.subject_id
+        ).filter(Employee.name == name, Employee.role == 'faculty').first()
+
+    def flush_pending_checkins(keys):
+        """Commit the write-behind check-ins queued for ``keys`` (student, day).
+
+        Returns {key: entry} for those still only queued because the commit
+        failed (e.g. the database was briefly locked). The flusher retries
+        them by itself, so callers answer from the entry instead of failing.
+        """
+        if not any(write_behind.is_pending(k) for k in keys):
+            return {}
+        try:
+            write_behind.flush()
+            return {}
+        except Exception:
+            app.logger.warning("Write-behind flush failed; answering from the queue", exc_info=True)
+        unsaved = {}
+        for key in keys:
+            entry = write_behind.pending(key)
+            if entry is not None:
+                unsaved[key] = entry
+        return unsaved
+
+    def today_state(student_id):
+        """The student's latest campus session today (IST), or None; usually served from memory"""
+        today = datetime.now(IST).date()
+        # A check-in still in the write-behind queue must count
+        entry = flush_pending_checkins([(student_id, today)]).get((student_id, today))
+        if entry is not None:
+            return StudentState(None, naive_ist(datetime.fromisoformat(entry['check_in_time'])), None,
+                                entry['location_name'])
+        return student_states.get(student_id, today)
+
     def is_student_checked_in(student_id):
-        """Check if a student is currently checked in (has an active session)"""
-        current_time = datetime.now(timezone(timedelta(hours=5, minutes=30)))  # IST
-        today = current_time.date()
-        
-        # Find today's check-in record
-        log = AttendanceLog.query.filter_by(
-            employee_id=student_id,
-            date=today
-        ).first()
-        
-        # Return True if there's a check-in time but no check-out time
-        return log and log.check_in_time and not log.check_out_time
+        """Check if a student is currently checked in (has an active session)
+
+        Used to allow writes, so it reads the database rather than this
+        process's cache: the check-in or check-out may have gone through
+        another worker.
+        """
+        today = datetime.now(IST).date()
+        if flush_pending_checkins([(student_id, today)]):
+            return True  # only a check-in can be queued
+        state = load_student_state(student_id, today)
+        return bool(state and state.checked_in_now)
+
+    # Fingerprinted assets from build_assets.py; templates link them via asset_url()
+    assets = AssetManifest(os.path.join(app.static_folder, 'dist'))
+    app.assets = assets
+    ASSET_MAX_AGE = 365 * 24 * 3600
+
+    @app.template_global()
+    def asset_url(name):
+        # In debug mode (or before a build) link the source file, so edits show up at once
+        built = None if app.debug else assets.built_name(name)
+        if built is None:
+            return url_for('static', filename=name)
+        return url_for('built_asset', filename=built)
+
+    @app.get('/assets/<path:filename>')
+    def built_asset(filename):
+        """A fingerprinted asset, precompressed to match Accept-Encoding, cacheable forever."""
+        if filename not in assets.variants:
+            return jsonify({"error": "asset not found"}), 404
+        served, encoding = assets.choose(filename, request.accept_encodings)
+        response = send_from_directory(assets.dist_dir, served, mimetype=mimetypes.guess_type(filename)[0],
+                                       max_age=ASSET_MAX_AGE)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+    # Pages with no per-user content, rendered once and served from memory
+    pages = PageCache(app.jinja_env, render_template)
+    app.pages = pages
+
+    def cached_page(name):
+        page = pages.get(name)
+        gzipped = page.gzipped is not None and request.accept_encodings['gzip']
+        response = Response(page.gzipped if gzipped else page.body, mimetype='text/html')
+        if gzipped:
+            response.headers['Content-Encoding'] = 'gzip'
+        # Each encoding is a different representation, so it gets its own ETag
+        response.set_etag(page.etag + '-gz' if gzipped else page.etag)
+        response.vary.add('Accept-Encoding')
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
 
     # Routes
     @app.route("/")
     def index():
-        return render_template("index.html")
+        return cached_page("index.html")
 
     @app.route('/student')
     def student_dashboard():
@@ -142,7 +629,7 @@ def create_app():
         token = request.cookies.get('token')
         if token:
             try:
-                data = signer.loads(token, max_age=86400)  # 24 hours
+                data = load_student_token(token)
                 # Token is valid, render the dashboard
                 return render_template('student.html')
             except (BadSignature, SignatureExpired):
@@ -163,7 +650,7 @@ def create_app():
         token = request.cookies.get('token')
         if token:
             try:
-                signer.loads(token, max_age=86400)  # 24 hours
+                load_student_token(token)
                 # Already logged in, redirect to dashboard
                 return redirect('/student')
             except (BadSignature, SignatureExpired):
@@ -187,7 +674,7 @@ def create_app():
         
         try:
             # Verify the token
-            data = signer.loads(token, max_age=86400)  # 24 hours
+            data = load_student_token(token)
             # Token is valid, render the history page and set the token as a cookie
             response = make_response(render_template('history.html'))
             response.set_cookie('token', token, max_age=86400)  # 24 hours
@@ -200,33 +687,39 @@ def create_app():
 
     @app.route("/student/register")
     def student_register_page():
-        return render_template("student_register.html")
+        return cached_page("student_register.html")
 
     @app.route("/faculty")
     def faculty_page():
-        return render_template("faculty.html")
+        return cached_page("faculty.html")
 
     @app.route("/timetable")
     def timetable_page():
-        return render_template("timetable.html")
+        return cached_page("timetable.html")
 
     @app.route("/subject-attendance")
     def subject_attendance_page():
-        return render_template("subject_attendance.html")
+        return cached_page("subject_attendance.html")
 
     # Separate faculty pages for views (avoid conflicting with API endpoints)
     @app.route("/faculty/students_view")
     def faculty_students_view():
-        return render_template("faculty_students.html")
+        return cached_page("faculty_students.html")
 
     @app.route("/faculty/attendance_view")
     def faculty_attendance_view():
-        return render_template("faculty_attendance.html")
+        return cached_page("faculty_attendance.html")
 
     @app.route("/health")
     def health():
         return jsonify({"status": "ok"})
 
+    @app.route("/metrics")
+    def metrics_endpoint():
+        if not metrics_enabled:
+            return jsonify({"error": "metrics are disabled"}), 404
+        return Response(metrics.render(), content_type=request_metrics.CONTENT_TYPE)
+
     # ---- Student Auth ----
     @app.post('/register_student')
     def register_student():
@@ -251,6 +744,8 @@ def create_app():
         existing_name = Employee.query.filter_by(name=name).first()
         if existing_name:
             return jsonify({"error": "A user with this name already exists"}), 400
+
+        password_hash = hashing_pool.hash_password(password)
         
         try:
             # Create new student
@@ -258,14 +753,14 @@ def create_app():
                 name=name,
                 email=email,
                 position='student',
-                password_hash=generate_password_hash(password),
+                password_hash=password_hash,
                 role='student'
             )
             db.session.add(student)
             db.session.commit()
             
             # Generate auth token
-            token = signer.dumps({"employee_id": student.id, "role": "student"})
+            token = dump_student_token({"employee_id": student.id, "role": "student"})
             return jsonify({
                 "token": token,
                 "student": {
@@ -289,10 +784,11 @@ def create_app():
             return jsonify({"error": "Name and password are required"}), 400
             
         student = Employee.query.filter_by(name=name, role='student').first()
-        if not student or not check_password_hash(student.password_hash, password):
+        if not student or not hashing_pool.check_password(student.password_hash, password):
             return jsonify({"error": "Invalid credentials"}), 401
+        upgrade_password_hash(student, password)
             
-        token = signer.dumps({"employee_id": student.id, "role": "student"})
+        token = dump_student_token({"employee_id": student.id, "role": "student"})
         return jsonify({"token": token, "student": {"id": student.id, "name": student.name}})
 
     # ---- Faculty Auth ----
@@ -309,9 +805,10 @@ def create_app():
         if not fac:
             fac = Employee.query.filter_by(email=identifier, role='faculty').first()
         
-        if not fac or not check_password_hash(fac.password_hash, password):
+        if not fac or not hashing_pool.check_password(fac.password_hash, password):
             return jsonify({"error": "Invalid credentials"}), 401
-        token = faculty_signer.dumps({"role": "faculty", "name": fac.name, "employee_id": fac.id})
+        upgrade_password_hash(fac, password)
+        token = dump_faculty_token({"role": "faculty", "name": fac.name, "employee_id": fac.id})
         return jsonify({"token": token, "faculty": {"name": fac.name, "email": fac.email}})
 
     def require_student(fn):
@@ -327,7 +824,7 @@ def create_app():
                 
             try:
                 # Verify the token
-                data = signer.loads(token, max_age=86400)  # 24 hours
+                data = load_student_token(token)
                 request.student_id = data.get('employee_id')
                 if not request.student_id:
                     raise ValueError("Invalid token payload")
@@ -352,7 +849,7 @@ def create_app():
                 
             try:
                 # Verify the faculty token
-                data = faculty_signer.loads(token, max_age=86400)  # 24 hours
+                data = load_faculty_token(token)
                 request.faculty_name = data.get('name')
                 request.faculty_id = data.get('employee_id')
                 if not request.faculty_name:
@@ -365,34 +862,10 @@ def create_app():
             return fn(*args, **kwargs)
         return decorated
 
-    @app.post('/student/loginout')
-    @require_student
-    def student_loginout():
-        student_id = request.student_id
-        data = request.get_json(force=True)
-        latitude = data.get('latitude')
-        longitude = data.get('longitude')
-        action = data.get('action')
-        timestamp_str = data.get('timestamp')
-        location_name = data.get('location_name') or 'Office'
-        subject = data.get('subject')  # New parameter for subject
-        
-        if latitude is None or longitude is None:
-            return jsonify({"error": "latitude and longitude required"}), 400
-            
-        # Enforce geofence: find nearest location and require within radius
-        nearest = None
-        min_dist = float('inf')
-        for l in Location.query.all():
-            d = haversine_distance(float(latitude), float(longitude), l.latitude, l.longitude)
-            if d < min_dist:
-                min_dist = d
-                nearest = l
-        if nearest and min_dist > (nearest.radius or 100):
-            return jsonify({"error": "outside allowed radius", "distance": int(min_dist), "allowedRadius": nearest.radius}), 400
-
-        today = date.today()
-        
+    MAX_BATCH_EVENTS = int(os.getenv('MAX_BATCH_EVENTS', '500'))
+
+    def event_time_ist(timestamp_str):
+        """Parse a client ISO timestamp (default: now) and convert it to IST."""
         try:
             if timestamp_str:
                 # Parse the provided timestamp
@@ -402,138 +875,604 @@ def create_app():
                     timestamp = timestamp.replace(tzinfo=timezone.utc)
             else:
                 timestamp = datetime.now(timezone.utc)
-        except (ValueError, TypeError):
+        except (ValueError, TypeError, AttributeError):
             timestamp = datetime.now(timezone.utc)
-        
-        # Convert to IST timezone (Presidency University time)
-        current_time_ist = timestamp.astimezone(timezone(timedelta(hours=5, minutes=30)))
-        # Use IST calendar date for logs
-        today = current_time_ist.date()
+        return timestamp.astimezone(IST)
+
+    def event_coordinates(event):
+        """Return (latitude, longitude) as floats, or None if missing or not numeric."""
+        latitude = event.get('latitude')
+        longitude = event.get('longitude')
+        if latitude is None or longitude is None:
+            return None
+        try:
+            return float(latitude), float(longitude)
+        except (ValueError, TypeError):
+            return None
+
+    def format_duration(ci, co):
+        # Handle naive vs aware datetimes
+        if ci.tzinfo is None and co.tzinfo is not None:
+            ci = ci.replace(tzinfo=co.tzinfo)
+        elif co.tzinfo is None and ci.tzinfo is not None:
+            co = co.replace(tzinfo=ci.tzinfo)
+        duration_seconds = (co - ci).total_seconds()
+        hours = int(duration_seconds // 3600)
+        minutes = int((duration_seconds % 3600) // 60)
+        return f"{hours}h {minutes}m"
+
+    def geofence_error(fence):
+        # Enforce geofence: nearest containing location, else report the nearest one
+        nearest, min_dist, inside = fence
+        if nearest and not inside:
+            return {"error": "outside allowed radius", "distance": int(min_dist), "allowedRadius": nearest.radius}, 400
+        return None
+
+    def checkin_window_error(current_time_ist):
+        # 9 AM to 3 PM IST
+        if not (time(9, 0) <= current_time_ist.time() <= time(15, 0)):
+            return {"error": "Check-in allowed only between 9 AM and 3 PM IST"}, 400
+        return None
+
+    def checkout_window_error(current_time_ist):
+        # 4 PM to 9 PM IST
+        if not (time(16, 0) <= current_time_ist.time() <= time(21, 0)):
+            return {"error": "Check-out allowed only between 4 PM and 9 PM IST"}, 400
+        return None
+
+    def apply_loginout_events(events, fences):
+        """Validate and apply check-in/check-out events without committing.
+
+        ``events`` are request payloads with an ``employee_id`` added and
+        ``fences`` the matching (nearest location, distance, inside) results.
+        Open sessions for every (employee, IST date) involved are fetched in
+        one query, and events are applied in event-time order so a check-in
+        and its check-out can arrive in the same batch. Returns one
+        (body, status) pair per event, in input order.
+        """
+        results = [None] * len(events)
+        pending = []
+        for i, (event, fence) in enumerate(zip(events, fences)):
+            results[i] = geofence_error(fence)
+            if results[i]:
+                continue
+            pending.append((event_time_ist(event.get('timestamp')), i))
+        pending.sort(key=lambda p: p[0])
+
+        # Open campus sessions, newest check-in first, keyed by (employee, IST date)
+        open_logs = {}
+        keys = {(events[i]['employee_id'], t.date()) for t, i in pending}
+        # Check-ins still in the write-behind queue must be visible below; a
+        # day whose check-in cannot be written right now has to wait for it
+        unsaved = flush_pending_checkins(keys)
+        if unsaved:
+            for t, i in pending:
+                if (events[i]['employee_id'], t.date()) in unsaved:
+                    results[i] = ({"error": "Check-in is still being saved, please retry shortly"}, 503)
+            pending = [(t, i) for t, i in pending if results[i] is None]
+            keys -= set(unsaved)
+        if keys:
+            rows = AttendanceLog.query.filter(
+                AttendanceLog.employee_id.in_({k[0] for k in keys}),
+                AttendanceLog.date.in_({k[1] for k in keys}),
+                AttendanceLog.check_out_time.is_(None),
+                campus_session()
+            ).order_by(AttendanceLog.check_in_time.desc())
+            for log in rows:
+                if (log.employee_id, log.date) in keys:
+                    open_logs.setdefault((log.employee_id, log.date), []).append(log)
+
+        for current_time_ist, i in pending:
+            event = events[i]
+            student_id = event['employee_id']
+            nearest = fences[i][0]
+            action = event.get('action')
+            latitude, longitude = event_coordinates(event)
+            location_name = nearest.name if nearest else (event.get('location_name') or 'Office')
+            subject = event.get('subject')
+            # Use IST calendar date for logs
+            today = current_time_ist.date()
+            sessions = open_logs.setdefault((student_id, today), [])
+
+            if action == 'checkin':
+                results[i] = checkin_window_error(current_time_ist)
+                if results[i]:
+                    continue
+                # Do not allow a second active check-in for the same IST date
+                if any(log.check_in_time is not None for log in sessions):
+                    results[i] = ({"error": "Already checked in today"}, 400)
+                    continue
+
+                log = AttendanceLog(
+                    employee_id=student_id,
+                    date=today,
+                    check_in_time=current_time_ist,
+                    latitude=latitude,
+                    longitude=longitude,
+                    location_name=location_name,
+                    subject=subject,
+                    subject_id=get_subject_id(subject, create=True) if subject else None
+                )
+                db.session.add(log)
+                sessions.insert(0, log)
+                results[i] = ({
+                    "message": "Checked in successfully",
+                    "checkInTime": log.check_in_time.isoformat(),
+                    "location": log.location_name
+                }, 200)
+
+            elif action == 'checkout':
+                results[i] = checkout_window_error(current_time_ist)
+                if results[i]:
+                    continue
+                # The most recent check-in without a check-out (for this IST date)
+                log = sessions[0] if sessions else None
+                if not log or not log.check_in_time:
+                    results[i] = ({"error": "No active check-in found to check out"}, 400)
+                    continue
+
+                log.check_out_time = current_time_ist
+                log.latitude = latitude
+                log.longitude = longitude
+                log.location_name = location_name
+                sessions.remove(log)
+                results[i] = ({
+                    "message": "Checked out successfully",
+                    "checkOutTime": log.check_out_time.isoformat(),
+                    "checkInTime": log.check_in_time.isoformat(),
+                    "location": log.location_name,
+                    "duration": format_duration(log.check_in_time, log.check_out_time)
+                }, 200)
+
+            else:
+                results[i] = ({"error": "Invalid action"}, 400)
+        return results
+
+    def apply_loginout_batch(events):
+        """Geofence a batch of events in one vectorized pass and apply them.
+
+        Events that fail basic validation get their error without touching
+        the database. Nothing is committed; callers commit once for the whole
+        batch. Returns the per-event results list for the response.
+        """
+        results = [None] * len(events)
+        valid = []
+        for i, event in enumerate(events):
+            if not isinstance(event, dict) or event_coordinates(event) is None:
+                results[i] = ({"error": "latitude and longitude required"}, 400)
+            else:
+                valid.append(i)
+
+        if valid:
+            snapshot = location_cache.get()
+            coords = [event_coordinates(events[i]) for i in valid]
+            found, dist, inside = snapshot.engine.locate([c[0] for c in coords], [c[1] for c in coords])
+            fences = [
+                (snapshot.locations[j], float(d), bool(ok)) if j >= 0 else (None, None, False)
+                for j, d, ok in zip(found.tolist(), dist.tolist(), inside.tolist())
+            ]
+            applied = apply_loginout_events([events[i] for i in valid], fences)
+            for i, result in zip(valid, applied):
+                results[i] = result
+
+        return [dict(body, index=i, status=status) for i, (body, status) in enumerate(results)]
+
+    def batch_events():
+        """The request's event list, or an error response tuple."""
+        data = request.get_json(force=True, silent=True) or {}
+        events = data.get('events')
+        if not isinstance(events, list) or not events:
+            return None, (jsonify({"error": "events list required"}), 400)
+        if len(events) > MAX_BATCH_EVENTS:
+            return None, (jsonify({"error": f"at most {MAX_BATCH_EVENTS} events per batch"}), 413)
+        return events, None
+
+    def loginout_response(body, status):
+        # 503: a queued check-in could not be written yet; the client may retry
+        resp = jsonify(body)
+        resp.status_code = status
+        if status == 503:
+            resp.headers['Retry-After'] = '1'
+        return resp
+
+    @app.post('/student/loginout')
+    @require_student
+    def student_loginout():
+        data = request.get_json(force=True)
+        if data.get('event_id'):
+            # Retries of an identified event are answered once, like /student/sync
+            (result,) = sync_with_retry(request.student_id, [data])
+            status = result.pop('status')
+            result.pop('index')
+            return loginout_response(result, status)
+
+        coords = event_coordinates(data)
+        if coords is None:
+            return jsonify({"error": "latitude and longitude required"}), 400
+
+        event = dict(data, employee_id=request.student_id)
+        fence = location_cache.get().index.locate(*coords)
+        if app.config['WRITE_BEHIND'] and data.get('action') == 'checkin':
+            body, status = buffered_checkin(event, fence)
+            return jsonify(body), status
+        (body, status), = apply_loginout_events([event], [fence])
+        db.session.commit()
+        return loginout_response(body, status)
+
+    @app.post('/student/loginout/batch')
+    @require_student
+    def student_loginout_batch():
+        """Replay many check-in/check-out events for the calling student."""
+        events, error = batch_events()
+        if error:
+            return error
+        events = [dict(e, employee_id=request.student_id) if isinstance(e, dict) else e for e in events]
+        results = apply_loginout_batch(events)
+        db.session.commit()
+        return jsonify({"results": results})
+
+    @app.post('/kiosk/loginout/batch')
+    @require_faculty
+    def kiosk_loginout_batch():
+        """Check-in/check-out events for many students, e.g. from a classroom kiosk.
+
+        Each event names its student in ``employee_id``; missing, non-integer
+        and unknown ids are rejected per event.
+        """
+        events, error = batch_events()
+        if error:
+            return error
+        results = [None] * len(events)
+        ids = {}
+        for i, event in enumerate(events):
+            employee_id = event.get('employee_id') if isinstance(event, dict) else None
+            if isinstance(employee_id, int) and not isinstance(employee_id, bool):
+                ids[i] = employee_id
+            else:
+                results[i] = {"error": "employee_id must be an integer", "index": i, "status": 400}
+        students = {i for (i,) in db.session.query(Employee.id).filter(Employee.id.in_(set(ids.values())), Employee.role == 'student')}
+        known = []
+        for i, employee_id in ids.items():
+            if employee_id in students:
+                known.append(i)
+            else:
+                results[i] = {"error": "unknown student", "index": i, "status": 400}
+        for i, result in zip(known, apply_loginout_batch([events[i] for i in known])):
+            results[i] = dict(result, index=i)
+        db.session.commit()
+        return jsonify({"results": results})
+
+    # Offline sync: events carry a client-generated id so retries are harmless
+    recent_events = RecentEvents(int(os.getenv('RECENT_EVENTS_SIZE', '10000')))
+    app.recent_events = recent_events
+
+    def sync_student_events(student_id, events):
+        """Apply offline events once each, keyed by the client's ``event_id``.
+
+        Retried events are answered from the in-memory recent set, then from
+        the sync_events table, with the result recorded the first time and
+        ``duplicate`` set. New events go through apply_loginout_batch, in
+        device-timestamp order, and are recorded in the same transaction.
+        """
+        results = [None] * len(events)
+        fresh = {}
+        for i, event in enumerate(events):
+            event_id = event.get('event_id') if isinstance(event, dict) else None
+            error = None
+            if event_id is None or event_id == '':
+                error = "event_id required"
+            elif not isinstance(event_id, str):
+                error = "event_id must be a string"
+            elif len(event_id) > 64:
+                error = "event_id too long (at most 64 characters)"
+            if error:
+                results[i] = {"error": error, "index": i, "status": 400}
+                continue
+            cached = recent_events.get((student_id, event_id))
+            if cached is not None:
+                body, status = cached
+                results[i] = dict(body, index=i, status=status, eventId=event_id, duplicate=True)
+            elif event_id in fresh:
+                results[i] = fresh[event_id]  # repeated within the request; filled in below
+            else:
+                fresh[event_id] = i
+
+        if fresh:
+            for row in SyncEvent.query.filter(SyncEvent.employee_id == student_id, SyncEvent.event_id.in_(fresh)):
+                i = fresh.pop(row.event_id)
+                body = json.loads(row.result)
+                recent_events.add((student_id, row.event_id), body, row.status)
+                results[i] = dict(body, index=i, status=row.status, eventId=row.event_id, duplicate=True)
+
+        new = list(fresh.values())
+        if app.config['WRITE_BEHIND'] and not any(events[i].get('action') == 'checkout' for i in new):
+            # Check-ins go to the write-behind queue (a check-out in the same
+            # request needs them in order, so then everything is written now)
+            buffered = set()
+            for i in new:
+                event = events[i]
+                coords = event_coordinates(event)
+                if event.get('action') != 'checkin' or coords is None:
+                    continue
+                body, status = buffered_checkin(dict(event, employee_id=student_id),
+                                                location_cache.get().index.locate(*coords), event['event_id'])
+                if status == 200:
+                    recent_events.add((student_id, event['event_id']), body, status)
+                    results[i] = dict(body, index=i, status=status, eventId=event['event_id'])
+                    buffered.add(i)
+            # Rejected ones are re-checked and recorded below like any other event
+            new = [i for i in new if i not in buffered]
+        applied = apply_loginout_batch([dict(events[i], employee_id=student_id) for i in new])
+        records = []
+        for i, result in zip(new, applied):
+            body = {k: v for k, v in result.items() if k not in ('index', 'status')}
+            event = events[i]
+            results[i] = dict(result, index=i, eventId=event['event_id'])
+            if result['status'] >= 500:
+                continue  # not an answer: the device keeps the event and sends it again
+            db.session.add(SyncEvent(
+                employee_id=student_id,
+                event_id=event['event_id'],
+                action=str(event.get('action'))[:20],
+                device_time=event_time_ist(event.get('timestamp')).replace(tzinfo=None),
+                status=result['status'],
+                result=json.dumps(body)
+            ))
+            records.append((event['event_id'], body, result['status']))
+        db.session.commit()
+        for event_id, body, status in records:
+            recent_events.add((student_id, event_id), body, status)
+
+        for i, result in enumerate(results):
+            if isinstance(result, int):
+                results[i] = dict(results[result], index=i, duplicate=True)
+        return results
+
+    def sync_with_retry(student_id, events):
+        try:
+            return sync_student_events(student_id, events)
+        except IntegrityError:
+            # A concurrent request recorded one of these ids first; replaying
+            # now answers it from sync_events
+            db.session.rollback()
+            return sync_student_events(student_id, events)
+
+    # Optional write-behind mode (WRITE_BEHIND=1): check-ins (from
+    # /student/loginout and from /student/sync, which the dashboard uses) are
+    # validated on the request and group-committed by a background thread.
+    # Each one is recorded in sync_events too, which makes journal replay
+    # after a crash idempotent.
+    def write_checkins(entries):
+        """Commit buffered check-ins, skipping any that were already written.
+
+        Reservations only cover this process, so another worker may have
+        committed a check-in for the same student and day in the meantime.
+        Open campus sessions are therefore looked up again in this
+        transaction, and a check-in that would open a second one is recorded
+        in sync_events as rejected instead. (On SQLite a concurrent writer
+        makes this commit fail, and the retry sees its row.)
+        """
+        with app.app_context():
+            written = set(db.session.query(SyncEvent.employee_id, SyncEvent.event_id).filter(
+                SyncEvent.event_id.in_({e['event_id'] for e in entries})
+            ))
+            days = {(e['employee_id'], date.fromisoformat(e['date'])) for e in entries}
+            open_days = set(db.session.query(AttendanceLog.employee_id, AttendanceLog.date).filter(
+                AttendanceLog.employee_id.in_({k[0] for k in days}),
+                AttendanceLog.date.in_({k[1] for k in days}),
+                AttendanceLog.check_in_time.isnot(None),
+                AttendanceLog.check_out_time.is_(None),
+                campus_session()
+            )) & days
+            rejected = []
+            for e in entries:
+                if (e['employee_id'], e['event_id']) in written:
+                    continue
+                written.add((e['employee_id'], e['event_id']))
+                check_in_time = datetime.fromisoformat(e['check_in_time'])
+                day = (e['employee_id'], date.fromisoformat(e['date']))
+                if day in open_days:
+                    body = {"error": "Already checked in today"}
+                    db.session.add(SyncEvent(
+                        employee_id=e['employee_id'],
+                        event_id=e['event_id'],
+                        action='checkin',
+                        device_time=check_in_time.replace(tzinfo=None),
+                        status=400,
+                        result=json.dumps(body)
+                    ))
+                    rejected.append(((e['employee_id'], e['event_id']), body))
+                    continue
+                open_days.add(day)
+                db.session.add(AttendanceLog(
+                    employee_id=e['employee_id'],
+                    date=day[1],
+                    check_in_time=check_in_time,
+                    latitude=e['latitude'],
+                    longitude=e['longitude'],
+                    location_name=e['location_name'],
+                    subject=e['subject'],
+                    subject_id=get_subject_id(e['subject'], create=True) if e['subject'] else None
+                ))
+                db.session.add(SyncEvent(
+                    employee_id=e['employee_id'],
+                    event_id=e['event_id'],
+                    action='checkin',
+                    device_time=check_in_time.replace(tzinfo=None),
+                    status=200,
+                    result=json.dumps(e['result'])
+                ))
+            db.session.commit()
+            for key, body in rejected:
+                recent_events.add(key, body, 400)
 
-        if action == 'checkin':
-            # 9 AM to 3 PM IST
-            if not (time(9, 0) <= current_time_ist.time() <= time(15, 0)):
-                return jsonify({"error": "Check-in allowed only between 9 AM and 3 PM IST"}), 400
+    app.config['WRITE_BEHIND'] = os.getenv('WRITE_BEHIND') == '1'
+    os.makedirs(app.instance_path, exist_ok=True)
+    write_behind = WriteBehindQueue(
+        write_checkins,
+        journal_path=os.getenv('WRITE_BEHIND_JOURNAL', os.path.join(app.instance_path, 'checkins.journal')) or None,
+        interval=float(os.getenv('WRITE_BEHIND_INTERVAL_MS', '50')) / 1000,
+        max_rows=int(os.getenv('WRITE_BEHIND_MAX_ROWS', '200')),
+        fsync=os.getenv('WRITE_BEHIND_FSYNC', '1') == '1'
+    )
+    app.write_behind = write_behind
+    if app.config['WRITE_BEHIND']:
+        # Replay check-ins that workers which have since exited journaled but may
+        # not have committed; live workers' segments are left to them
+        recovered = write_behind.recover()
+        if recovered:
+            write_checkins(recovered)
+        write_behind.discard_recovered()
+        write_behind.start()
+        atexit.register(write_behind.stop)
 
-            # Do not allow a second active check-in for the same IST date
-            existing_open = AttendanceLog.query.filter(
+    def buffered_checkin(event, fence, event_id=None):
+        """Write-behind check-in: validated now, written by the next group commit.
+
+        ``event_id`` is the client's id for synced events; it is recorded in
+        sync_events with the row, so a retry after the flush is a duplicate.
+        """
+        error = geofence_error(fence)
+        if error:
+            return error
+        current_time_ist = event_time_ist(event.get('timestamp'))
+        error = checkin_window_error(current_time_ist)
+        if error:
+            return error
+
+        # Reserve first so concurrent requests cannot both pass the checks below
+        student_id = event['employee_id']
+        today = current_time_ist.date()
+        key = (student_id, today)
+        if not write_behind.reserve(key):
+            return {"error": "Already checked in today"}, 400
+        try:
+            existing_open = db.session.query(AttendanceLog.id).filter(
                 AttendanceLog.employee_id == student_id,
                 AttendanceLog.date == today,
                 AttendanceLog.check_in_time.isnot(None),
-                AttendanceLog.check_out_time.is_(None)
+                AttendanceLog.check_out_time.is_(None),
+                campus_session()
             ).first()
             if existing_open:
-                return jsonify({"error": "Already checked in today"}), 400
+                write_behind.release(key)
+                return {"error": "Already checked in today"}, 400
 
-            # Create a new check-in log
-            log = AttendanceLog(
-                employee_id=student_id,
-                date=today,
-                check_in_time=current_time_ist,
-                latitude=latitude,
-                longitude=longitude,
-                location_name=nearest.name if nearest else location_name,
-                subject=subject  # Add subject to the log
-            )
-            db.session.add(log)
-            db.session.commit()
-            return jsonify({
-                "message": "Checked in successfully", 
-                "checkInTime": log.check_in_time.isoformat(), 
-                "location": log.location_name
+            nearest = fence[0]
+            latitude, longitude = event_coordinates(event)
+            result = {
+                "message": "Checked in successfully",
+                "checkInTime": current_time_ist.isoformat(),
+                "location": nearest.name if nearest else (event.get('location_name') or 'Office')
+            }
+            write_behind.submit(key, {
+                "employee_id": student_id,
+                "event_id": event_id or f"wb-{uuid.uuid4().hex}",
+                "date": today.isoformat(),
+                "check_in_time": current_time_ist.isoformat(),
+                "latitude": latitude,
+                "longitude": longitude,
+                "location_name": result["location"],
+                "subject": event.get('subject'),
+                "result": result
             })
-            
-        elif action == 'checkout':
-            # 4 PM to 9 PM IST
-            if not (time(16, 0) <= current_time_ist.time() <= time(21, 0)):
-                return jsonify({"error": "Check-out allowed only between 4 PM and 9 PM IST"}), 400
-                
-            # Find the most recent check-in without a check-out (for this IST date)
-            log = AttendanceLog.query.filter(
-                AttendanceLog.employee_id == student_id,
-                AttendanceLog.date == today,
-                AttendanceLog.check_out_time.is_(None)
-            ).order_by(AttendanceLog.check_in_time.desc()).first()
-            
-            if not log or not log.check_in_time:
-                return jsonify({"error": "No active check-in found to check out"}), 400
-                
-            # Update the log with checkout details
-            log.check_out_time = current_time_ist
-            log.latitude = latitude
-            log.longitude = longitude
-            log.location_name = nearest.name if nearest else location_name
-            
-            # Calculate duration in hours and minutes (handle naive vs aware datetimes)
-            duration = None
-            if log.check_in_time:
-                ci = log.check_in_time
-                co = log.check_out_time
-                if ci.tzinfo is None and co.tzinfo is not None:
-                    ci = ci.replace(tzinfo=co.tzinfo)
-                elif co.tzinfo is None and ci.tzinfo is not None:
-                    co = co.replace(tzinfo=ci.tzinfo)
-
-                duration_seconds = (co - ci).total_seconds()
-                hours = int(duration_seconds // 3600)
-                minutes = int((duration_seconds % 3600) // 60)
-                duration = f"{hours}h {minutes}m"
-            
-            db.session.commit()
-                
-            return jsonify({
-                "message": "Checked out successfully", 
-                "checkOutTime": log.check_out_time.isoformat(),
-                "checkInTime": log.check_in_time.isoformat(),
-                "location": log.location_name,
-                "duration": duration
-            })
-            
-        return jsonify({"error": "Invalid action"}), 400
+        except BaseException:
+            write_behind.release(key)
+            raise
+        return result, 200
+
+    @app.post('/student/sync')
+    @require_student
+    def student_sync():
+        """Flush a device's queued check-in/check-out events in one request."""
+        events, error = batch_events()
+        if error:
+            return error
+        return jsonify({"results": sync_with_retry(request.student_id, events)})
 
     # ---- Student status & history APIs used by dashboard ----
     @app.get('/student/status')
     @require_student
     def student_status():
-        student_id = request.student_id
-        # Use IST date for "today" status
-        now_utc = datetime.now(timezone.utc)
-        now_ist = now_utc.astimezone(timezone(timedelta(hours=5, minutes=30)))
-        today_ist = now_ist.date()
-
-        log = AttendanceLog.query.filter_by(employee_id=student_id, date=today_ist).order_by(AttendanceLog.id.desc()).first()
-        
-        # Check if student is currently checked in
-        is_checked_in = is_student_checked_in(student_id)
+        return jsonify(status_payload(today_state(request.student_id)))
 
+    def status_payload(state):
+        # Latest session of the IST day; both flags come from the same row
         status = {
             "checkedIn": False,
             "checkedOut": False,
             "checkInTime": None,
             "checkOutTime": None,
             "location": None,
-            "isCurrentlyCheckedIn": is_checked_in
+            "isCurrentlyCheckedIn": bool(state and state.checked_in_now)
         }
 
-        if log:
-            if log.check_in_time:
-                status["checkedIn"] = True
-                status["checkInTime"] = log.check_in_time.isoformat()
-                status["location"] = log.location_name
-            if log.check_out_time:
+        if state:
+            status["checkedIn"] = True
+            status["checkInTime"] = state.check_in_time.isoformat()
+            status["location"] = state.location
+            if state.check_out_time:
                 status["checkedOut"] = True
-                status["checkOutTime"] = log.check_out_time.isoformat()
+                status["checkOutTime"] = state.check_out_time.isoformat()
+        return status
 
-        return jsonify(status)
+    def attendance_percentage(attended, held):
+        return round(100.0 * attended / held, 1) if held else None
+
+    @app.get('/student/attendance_percentage')
+    @require_student
+    def student_attendance_percentage():
+        """Days attended out of days held, per subject, from attendance_counters.
+
+        Covers the subjects the student is enrolled in or has attended. A
+        subject counts as held on any day some student was marked for it.
+        """
+        student_id = request.student_id
+        attended = db.aliased(AttendanceCounter)
+        held = db.aliased(AttendanceCounter)
+        rows = db.session.query(
+            Subject.id, Subject.name, Subject.display_name, attended.count.label('attended'), held.count.label('held')
+        ).outerjoin(attended, db.and_(attended.subject_id == Subject.id, attended.employee_id == student_id)).outerjoin(
+            held, db.and_(held.subject_id == Subject.id, held.employee_id == attendance_summary.HELD)
+        ).filter(db.or_(
+            Subject.id.in_(db.select(Enrollment.subject_id).where(Enrollment.student_id == student_id)),
+            attended.count > 0
+        )).order_by(Subject.name).all()
+        return jsonify([{
+            "subjectId": r.id,
+            "subject": r.display_name or r.name,
+            "attended": r.attended or 0,
+            "held": r.held or 0,
+            "percentage": attendance_percentage(r.attended or 0, r.held or 0)
+        } for r in rows])
 
     @app.get('/student/history')
     @require_student
     def student_history():
+        """A student's attendance rows, newest first.
+
+        Without paging parameters the whole (date-filtered) history is
+        returned as before. ``limit`` (at least 1) returns one page and, when
+        more rows follow, an opaque ``X-Next-Cursor`` header to pass back as
+        ``cursor``. ``format=ndjson`` (or Accept: application/x-ndjson)
+        writes one JSON object per line. Without ``limit`` the rows are
+        streamed straight from the database cursor, so memory stays flat
+        however long the history is; with it the response is one page, with
+        the same cursor header.
+
+        Responses carry ``X-Change-Seq``; passing it back as ``since``
+        returns only the rows inserted or updated after it, oldest change
+        first, so a client can keep its copy current without refetching.
+        """
         student_id = request.student_id
         start_date_str = request.args.get('startDate')
         end_date_str = request.args.get('endDate')
+        cursor = request.args.get('cursor')
+        limit = request.args.get('limit')
+        since = request.args.get('since')
+        ndjson = request.args.get('format') == 'ndjson' or request.accept_mimetypes.best == 'application/x-ndjson'
 
-        q = AttendanceLog.query.filter_by(employee_id=student_id)
+        q = history_query(student_id)
         if start_date_str:
             try:
                 sd = datetime.strptime(start_date_str, '%Y-%m-%d').date()
@@ -547,38 +1486,158 @@ def create_app():
             except ValueError:
                 pass
 
-        logs = q.order_by(AttendanceLog.date.desc(), AttendanceLog.check_in_time.desc()).all()
+        try:
+            since_seq = int(since) if since is not None else None
+            if cursor:
+                q = q.filter(history_after(*decode_history_cursor(cursor)))
+            page_size = min(int(limit), MAX_HISTORY_PAGE) if limit is not None else None
+            if page_size is not None and page_size < 1:
+                raise ValueError(limit)
+        except (ValueError, TypeError):
+            return jsonify({"error": "invalid cursor, limit or since"}), 400
+
+        if since_seq is not None:
+            rows = q.filter(AttendanceLog.change_seq > since_seq).order_by(None).order_by(AttendanceLog.change_seq).all()
+            response = jsonify([history_row(l) for l in rows])
+            response.headers['X-Change-Seq'] = str(rows[-1].change_seq if rows else since_seq)
+            return response
+
+        # Read before the rows: a change landing in between is simply sent again next time
+        change_seq = None if cursor else latest_change_seq(student_id)
+
+        if ndjson and not page_size:
+            def generate():
+                for row in q.yield_per(HISTORY_STREAM_BATCH):
+                    yield json.dumps(history_row(row)) + '\n'
+            response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        elif not page_size and not cursor:
+            response = jsonify([history_row(l) for l in q.all()])
+        else:
+            # A page is bounded, so it is read whole (plus one row to see whether more follow)
+            page_size = page_size or DEFAULT_HISTORY_PAGE
+            rows = q.limit(page_size + 1).all()
+            page = [history_row(l) for l in rows[:page_size]]
+            if ndjson:
+                response = Response(''.join(json.dumps(r) + '\n' for r in page), mimetype='application/x-ndjson')
+            else:
+                response = jsonify(page)
+            if len(rows) > page_size:
+                response.headers['X-Next-Cursor'] = encode_history_cursor(rows[page_size - 1])
+        if change_seq is not None:
+            response.headers['X-Change-Seq'] = str(change_seq)
+        return response
+
+    # History is ordered and paged on (date, check_in_time, id), newest first
+    DEFAULT_HISTORY_PAGE = 50
+    MAX_HISTORY_PAGE = 500
+    HISTORY_STREAM_BATCH = 500
+
+    def history_query(student_id):
+        return db.session.query(
+            AttendanceLog.id, AttendanceLog.date, AttendanceLog.check_in_time,
+            AttendanceLog.check_out_time, AttendanceLog.location_name, AttendanceLog.change_seq
+        ).filter(AttendanceLog.employee_id == student_id).order_by(
+            AttendanceLog.date.desc(), AttendanceLog.check_in_time.desc(), AttendanceLog.id.desc()
+        )
+
+    def latest_change_seq(employee_id):
+        """Highest change sequence among an employee's rows; 0 if none."""
+        return db.session.query(db.func.max(AttendanceLog.change_seq)).filter(
+            AttendanceLog.employee_id == employee_id
+        ).scalar() or 0
+
+    def history_after(day, check_in_time, log_id):
+        """Rows that sort after the cursor row; NULL check-in times sort last."""
+        ci = AttendanceLog.check_in_time
+        if check_in_time is None:
+            same_day = db.and_(ci.is_(None), AttendanceLog.id < log_id)
+        else:
+            same_day = db.or_(ci < check_in_time, ci.is_(None), db.and_(ci == check_in_time, AttendanceLog.id < log_id))
+        return db.or_(AttendanceLog.date < day, db.and_(AttendanceLog.date == day, same_day))
+
+    def encode_history_cursor(row):
+        key = [row.date.isoformat(), row.check_in_time.isoformat() if row.check_in_time else None, row.id]
+        return base64.urlsafe_b64encode(json.dumps(key, separators=(',', ':')).encode()).decode().rstrip('=')
 
-        result = []
-        for l in logs:
+    def decode_history_cursor(cursor):
+        day, check_in_time, log_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return (date.fromisoformat(day),
+                datetime.fromisoformat(check_in_time) if check_in_time else None,
+                int(log_id))
+
+    def history_row(l):
+        return {
+            "id": l.id,
+            "change_seq": l.change_seq,
+            "date": l.date.isoformat(),
+            "check_in_time": l.check_in_time.isoformat() if l.check_in_time else None,
+            "check_out_time": l.check_out_time.isoformat() if l.check_out_time else None,
+            "location_name": l.location_name,
             # Duration in hours/minutes if both times exist
-            duration = None
-            if l.check_in_time and l.check_out_time:
-                ci = l.check_in_time
-                co = l.check_out_time
-                if ci.tzinfo is None and co.tzinfo is not None:
-                    ci = ci.replace(tzinfo=co.tzinfo)
-                elif co.tzinfo is None and ci.tzinfo is not None:
-                    co = co.replace(tzinfo=ci.tzinfo)
-                secs = (co - ci).total_seconds()
-                h = int(secs // 3600)
-                m = int((secs % 3600) // 60)
-                duration = f"{h}h {m}m"
-
-            result.append({
-                "date": l.date.isoformat(),
-                "check_in_time": l.check_in_time.isoformat() if l.check_in_time else None,
-                "check_out_time": l.check_out_time.isoformat() if l.check_out_time else None,
-                "location_name": l.location_name,
-                "duration": duration
-            })
+            "duration": format_duration(l.check_in_time, l.check_out_time) if l.check_in_time and l.check_out_time else None
+        }
+
+    @app.get('/student/bootstrap')
+    @require_student
+    def student_bootstrap():
+        """Everything the dashboard renders on load, in one response.
+
+        Profile and the last ``history`` rows take one query each; today's
+        status and the nearest locations (when ``lat``/``lng`` are given)
+        come from the in-memory caches. Responses carry an ETag, so an
+        unchanged dashboard costs a 304.
+        """
+        student_id = request.student_id
+        profile = db.session.query(
+            Employee.id, Employee.name, Employee.email, Employee.phone, Employee.position, Employee.photo_path
+        ).filter(Employee.id == student_id, Employee.role == 'student').first()
+        if not profile:
+            return jsonify({"error": "student not found"}), 404
+
+        try:
+            history_limit = min(max(int(request.args.get('history', 10)), 0), 100)
+            limit = int(request.args.get('limit', 5))
+            lat, lng = request.args.get('lat'), request.args.get('lng')
+            point = (float(lat), float(lng)) if lat is not None and lng is not None else None
+        except ValueError:
+            return jsonify({"error": "history, limit, lat and lng must be numbers"}), 400
+
+        logs = history_query(student_id).limit(history_limit).all() if history_limit else []
 
-        return jsonify(result)
+        response = jsonify({
+            "student": {
+                "id": profile.id,
+                "name": profile.name,
+                "email": profile.email,
+                "phone": profile.phone,
+                "position": profile.position,
+                "hasPhoto": bool(profile.photo_path)
+            },
+            "status": status_payload(today_state(student_id)),
+            "nearestLocations": nearest_payload(location_cache.get().engine, [point[0]], [point[1]], limit)[0] if point else [],
+            "history": [history_row(l) for l in logs]
+        })
+        # Per-student content: revalidate every time, never share
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.vary.add('Authorization')
+        response.add_etag()
+        return response.make_conditional(request)
 
     @app.get('/LogInOut/allemp/<int:employee_id>')
     def employee_logs(employee_id):
-        logs = AttendanceLog.query.filter_by(employee_id=employee_id).order_by(AttendanceLog.id.desc()).all()
-        return jsonify([
+        """All of an employee's rows, newest first; ``since`` works as on /student/history."""
+        try:
+            since_seq = int(request.args['since']) if 'since' in request.args else None
+        except ValueError:
+            return jsonify({"error": "since must be an integer"}), 400
+        q = AttendanceLog.query.filter_by(employee_id=employee_id)
+        if since_seq is None:
+            change_seq = latest_change_seq(employee_id)
+            logs = q.order_by(AttendanceLog.id.desc()).all()
+        else:
+            logs = q.filter(AttendanceLog.change_seq > since_seq).order_by(AttendanceLog.change_seq).all()
+            change_seq = logs[-1].change_seq if logs else since_seq
+        response = jsonify([
             {
                 "id": l.id,
                 "employee_id": l.employee_id,
@@ -587,9 +1646,12 @@ def create_app():
                 "latitude": l.latitude,
                 "longitude": l.longitude,
                 "location_name": l.location_name,
-                "date": l.date.isoformat()
+                "date": l.date.isoformat(),
+                "change_seq": l.change_seq
             } for l in logs
         ])
+        response.headers['X-Change-Seq'] = str(change_seq)
+        return response
 
     @app.post('/student/subject_attendance')
     @require_student
@@ -620,10 +1682,11 @@ def create_app():
         now_ist = now_utc.astimezone(timezone(timedelta(hours=5, minutes=30)))
 
         # If a log already exists for this student/date/subject with a check-in, do nothing
+        subject_id = get_subject_id(subject_raw, create=True)
         existing = AttendanceLog.query.filter_by(
             employee_id=student_id,
             date=target_date,
-            subject=subject
+            subject_id=subject_id
         ).filter(AttendanceLog.check_in_time.isnot(None)).first()
 
         if existing:
@@ -637,9 +1700,13 @@ def create_app():
             employee_id=student_id,
             date=target_date,
             check_in_time=now_ist,
-            subject=subject
+            subject=subject,
+            subject_id=subject_id
         )
         db.session.add(log)
+        # Marking attendance for a subject enrolls the student in it
+        if student_id not in roster_cache.get(subject_id):
+            db.session.add(Enrollment(subject_id=subject_id, student_id=student_id))
         db.session.commit()
 
         return jsonify({
@@ -651,42 +1718,95 @@ def create_app():
     # ---- Nearest Locations ----
     @app.post('/get_nearest_locations')
     def get_nearest_locations():
+        # Accepts a single {lat, lng} or a batch {points: [[lat, lng], ...]}
         data = request.get_json(force=True)
-        lat = float(data.get('lat'))
-        lng = float(data.get('lng'))
         limit = int(data.get('limit') or 5)
-        locs = Location.query.all()
-        res = []
-        for l in locs:
-            dist = round(haversine_distance(lat, lng, l.latitude, l.longitude))
-            res.append({"id": l.id, "name": l.name, "latitude": l.latitude, "longitude": l.longitude, "radius": l.radius, "distance": dist})
-        res.sort(key=lambda x: x['distance'])
-        return jsonify(res[:limit])
+        points = data.get('points')
+        try:
+            if points is None:
+                lats, lngs = [float(data.get('lat'))], [float(data.get('lng'))]
+            else:
+                lats = [float(p['lat'] if isinstance(p, dict) else p[0]) for p in points]
+                lngs = [float(p['lng'] if isinstance(p, dict) else p[1]) for p in points]
+        except (TypeError, ValueError, KeyError, IndexError):
+            return jsonify({"error": "lat and lng required"}), 400
+
+        results = nearest_payload(location_cache.get().engine, lats, lngs, limit)
+        return jsonify(results if points is not None else results[0])
+
+    def nearest_payload(engine, lats, lngs, limit):
+        results = []
+        for nearest in engine.nearest(lats, lngs, limit):
+            res = []
+            for i, dist in nearest:
+                l = engine.locations[i]
+                res.append({"id": l.id, "name": l.name, "latitude": l.latitude, "longitude": l.longitude, "radius": l.radius, "distance": round(dist)})
+            results.append(res)
+        return results
 
     # ---- Photos ----
     @app.get('/get_photo/<int:employee_id>')
     def get_photo(employee_id):
-        e = Employee.query.get_or_404(employee_id)
-        if not e.photo_path or not os.path.isfile(e.photo_path):
+        """An employee's photo, or its ``size`` thumbnail (e.g. ?size=64).
+
+        The ETag is the photo's content hash, so a client revalidating an
+        unchanged photo gets a 304 after one primary-key lookup, without the
+        file being touched.
+        """
+        row = db.session.query(Employee.photo_path).filter(Employee.id == employee_id).first()
+        if row is None:
+            return jsonify({"error": "employee not found"}), 404
+        key = row.photo_path
+        if key and not photo_store.is_key(key):
+            # Uploaded before the photo store: a plain file path
+            if not os.path.isfile(key):
+                return jsonify({"error": "photo not found"}), 404
+            return send_from_directory(os.path.dirname(key), os.path.basename(key))
+        if not key:
             return jsonify({"error": "photo not found"}), 404
-        directory = os.path.dirname(e.photo_path)
-        filename = os.path.basename(e.photo_path)
-        return send_from_directory(directory, filename)
+
+        size = request.args.get('size', type=int)
+        if size is not None and size not in photo_store.sizes:
+            return jsonify({"error": f"size must be one of {list(photo_store.sizes)}"}), 400
+        etag = key.partition('.')[0] + (f"-{size}" if size else '')
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            path, mimetype = photo_store.lookup(key, size)
+            if not os.path.isfile(path):
+                return jsonify({"error": "photo not found"}), 404
+            response = send_file(path, mimetype=mimetype, etag=etag, conditional=True, max_age=0)
+        response.set_etag(etag)
+        # The URL is per employee and the photo can be replaced: revalidate every time
+        response.cache_control.no_cache = True
+        response.cache_control.private = True
+        return response
 
     @app.post('/upload_photo/<int:employee_id>')
     def upload_photo(employee_id):
+        """Store a photo sent as multipart ``file`` or as a raw image/* body."""
         e = Employee.query.get_or_404(employee_id)
-        if 'file' not in request.files:
-            return jsonify({"error": "file field is required"}), 400
-        file = request.files['file']
-        if file.filename == '':
-            return jsonify({"error": "empty filename"}), 400
-        fname = secure_filename(file.filename)
-        save_path = os.path.join(app.config['UPLOAD_FOLDER'], f"emp_{employee_id}_{fname}")
-        file.save(save_path)
-        e.photo_path = save_path
+        # Refuse oversized uploads before reading any of the body
+        if request.content_length and request.content_length > photo_store.max_bytes + 64 * 1024:
+            return jsonify({"error": f"photo is larger than {photo_store.max_bytes} bytes"}), 413
+        if request.mimetype.startswith('image/'):
+            stream = request.stream
+        else:
+            if 'file' not in request.files:
+                return jsonify({"error": "file field is required"}), 400
+            file = request.files['file']
+            if file.filename == '':
+                return jsonify({"error": "empty filename"}), 400
+            stream = file.stream
+        try:
+            key = photo_store.save(stream)
+        except PhotoTooLarge as exc:
+            return jsonify({"error": str(exc)}), 413
+        except NotAnImage as exc:
+            return jsonify({"error": str(exc)}), 400
+        e.photo_path = key
         db.session.commit()
-        return jsonify({"message": "uploaded", "path": save_path}), 201
+        return jsonify({"message": "uploaded", "path": key}), 201
 
     # (Facial recognition removed)
 
@@ -694,8 +1814,67 @@ def create_app():
     @app.get('/faculty/students')
     @require_faculty
     def faculty_students():
-        emps = Employee.query.filter_by(role='student').order_by(Employee.id.asc()).all()
-        return jsonify([{ "id": e.id, "name": e.name, "position": e.position } for e in emps])
+        faculty = load_faculty(request.faculty_name)
+        if not faculty:
+            return jsonify({"error": "Faculty not found"}), 404
+        if faculty.subject_id is None:
+            return jsonify({"error": "Faculty subject not configured"}), 400
+        return jsonify([{ "id": s.id, "name": s.name, "position": s.position } for s in roster_cache.get(faculty.subject_id)])
+
+    @app.get('/faculty/enrollments')
+    @require_faculty
+    def faculty_enrollments():
+        faculty = load_faculty(request.faculty_name)
+        if not faculty:
+            return jsonify({"error": "Faculty not found"}), 404
+        if faculty.subject_id is None:
+            return jsonify({"error": "Faculty subject not configured"}), 400
+        return jsonify([
+            {"id": s.id, "name": s.name, "position": s.position, "section": s.section}
+            for s in roster_cache.get(faculty.subject_id)
+        ])
+
+    @app.post('/faculty/enrollments')
+    @require_faculty
+    def faculty_enroll_students():
+        faculty = load_faculty(request.faculty_name)
+        if not faculty:
+            return jsonify({"error": "Faculty not found"}), 404
+        if faculty.subject_id is None:
+            return jsonify({"error": "Faculty subject not configured"}), 400
+
+        data = request.get_json(force=True) or {}
+        student_ids = data.get('student_ids')
+        section = (data.get('section') or '').strip() or None
+        if not isinstance(student_ids, list) or not student_ids:
+            return jsonify({"error": "student_ids must be a non-empty list"}), 400
+        try:
+            student_ids = {int(i) for i in student_ids}
+        except (TypeError, ValueError):
+            return jsonify({"error": "student_ids must be integers"}), 400
+
+        found = {i for (i,) in db.session.query(Employee.id).filter(Employee.id.in_(student_ids), Employee.role == 'student')}
+        if found != student_ids:
+            return jsonify({"error": "Unknown students", "ids": sorted(student_ids - found)}), 400
+
+        roster = roster_cache.get(faculty.subject_id)
+        new_ids = sorted(found - roster.ids)
+        db.session.add_all([Enrollment(subject_id=faculty.subject_id, student_id=i, section=section) for i in new_ids])
+        db.session.commit()
+        return jsonify({"enrolled": new_ids, "alreadyEnrolled": sorted(found & roster.ids)}), 201
+
+    @app.delete('/faculty/enrollments/<int:student_id>')
+    @require_faculty
+    def faculty_unenroll_student(student_id):
+        faculty = load_faculty(request.faculty_name)
+        if not faculty:
+            return jsonify({"error": "Faculty not found"}), 404
+        enrollment = Enrollment.query.filter_by(subject_id=faculty.subject_id, student_id=student_id).first()
+        if not enrollment:
+            return jsonify({"error": "Student is not enrolled"}), 404
+        db.session.delete(enrollment)
+        db.session.commit()
+        return jsonify({"message": "Student unenrolled"})
 
     @app.get('/faculty/attendance')
     @require_faculty
@@ -703,16 +1882,13 @@ def create_app():
         # Get faculty information from token
         faculty_name = request.faculty_name  # From token
         
-        # Get faculty member to determine their subject
-        faculty = Employee.query.filter_by(name=faculty_name, role='faculty').first()
+        # Get faculty member and the subject they teach
+        faculty = load_faculty(faculty_name)
         if not faculty:
             return jsonify({"error": "Faculty not found"}), 404
-        
-        # Extract subject from faculty position (e.g., "Professor - DBMS")
-        faculty_subject_raw = faculty.position.replace("Professor - ", "") if faculty.position else None
-        if not faculty_subject_raw:
-            return jsonify({"error": "Faculty subject not configured in position field"}), 400
-        faculty_subject = faculty_subject_raw.strip().lower()
+        if faculty.subject_id is None:
+            return jsonify({"error": "Faculty subject not configured"}), 400
+        faculty_subject = faculty.subject_name
 
         # For a single date, show each student's status for the faculty's subject
         day_str = request.args.get('date') or date.today().isoformat()
@@ -720,17 +1896,31 @@ def create_app():
             target_date = datetime.strptime(day_str, '%Y-%m-%d').date()
         except ValueError:
             target_date = date.today()
-        rows = []
-        students = Employee.query.filter_by(role='student').all()
-        
-        for s in students:
-            # Get attendance log for this student on this date for the faculty's subject (case-insensitive)
-            l = AttendanceLog.query.filter(
-                AttendanceLog.employee_id == s.id,
+
+        # Only students enrolled in the subject are listed; the roster is cached
+        roster = roster_cache.get(faculty.subject_id)
+
+        # Latest log per student for this date and subject, in one query
+        logs = {}
+        if roster:
+            latest = db.session.query(
+                db.func.max(AttendanceLog.id).label('log_id')
+            ).filter(
                 AttendanceLog.date == target_date,
-                db.func.lower(AttendanceLog.subject) == faculty_subject
-            ).order_by(AttendanceLog.id.desc()).first()
-            
+                AttendanceLog.subject_id == faculty.subject_id
+            ).group_by(AttendanceLog.employee_id).subquery()
+
+            for l in db.session.query(
+                AttendanceLog.employee_id,
+                AttendanceLog.check_in_time,
+                AttendanceLog.check_out_time,
+                AttendanceLog.location_name
+            ).join(latest, AttendanceLog.id == latest.c.log_id):
+                logs[l.employee_id] = l
+
+        rows = []
+        for s in roster:
+            l = logs.get(s.id)
             rows.append({
                 "id": s.id,
                 "name": s.name,
@@ -743,6 +1933,97 @@ def create_app():
             })
         return jsonify(rows)
 
+    @app.get('/faculty/attendance_percentage')
+    @require_faculty
+    def faculty_attendance_percentage():
+        """Each enrolled student's days attended out of days held for the faculty's subject."""
+        faculty = load_faculty(request.faculty_name)
+        if not faculty:
+            return jsonify({"error": "Faculty not found"}), 404
+        if faculty.subject_id is None:
+            return jsonify({"error": "Faculty subject not configured"}), 400
+
+        # One primary-key range read: every student's counter plus the "held" row
+        counts = dict(db.session.query(AttendanceCounter.employee_id, AttendanceCounter.count).filter(
+            AttendanceCounter.subject_id == faculty.subject_id
+        ).all())
+        held = counts.pop(attendance_summary.HELD, 0)
+        return jsonify({
+            "subject": faculty.subject_name,
+            "held": held,
+            "students": [{
+                "id": s.id,
+                "name": s.name,
+                "attended": counts.get(s.id, 0),
+                "percentage": attendance_percentage(counts.get(s.id, 0), held)
+            } for s in roster_cache.get(faculty.subject_id)]
+        })
+
+    EXPORT_COLUMNS = ('date', 'student_id', 'student_name', 'subject', 'check_in_time', 'check_out_time', 'location')
+    EXPORT_BATCH = 1000
+
+    @app.get('/faculty/attendance/export')
+    @require_faculty
+    def faculty_attendance_export():
+        """Every attendance mark for the faculty's subject between two dates.
+
+        ``startDate``/``endDate`` (inclusive) are required. The body is CSV,
+        or NDJSON with ``format=ndjson`` (or Accept: application/x-ndjson),
+        streamed from a server-side cursor in (date, student) order and
+        gzip-compressed on the fly when the client accepts it, so memory use
+        does not depend on the size of the range.
+        """
+        faculty = load_faculty(request.faculty_name)
+        if not faculty:
+            return jsonify({"error": "Faculty not found"}), 404
+        if faculty.subject_id is None:
+            return jsonify({"error": "Faculty subject not configured"}), 400
+        try:
+            start = datetime.strptime(request.args['startDate'], '%Y-%m-%d').date()
+            end = datetime.strptime(request.args['endDate'], '%Y-%m-%d').date()
+        except (KeyError, ValueError):
+            return jsonify({"error": "startDate and endDate are required (YYYY-MM-DD)"}), 400
+        if end < start:
+            return jsonify({"error": "endDate is before startDate"}), 400
+        ndjson = request.args.get('format') == 'ndjson' or request.accept_mimetypes.best == 'application/x-ndjson'
+
+        # Rows come off ix_attendance_logs_date_subject in date order, so SQLite
+        # only sorts one day at a time rather than the whole range up front
+        stmt = db.select(
+            AttendanceLog.date, AttendanceLog.employee_id, Employee.name,
+            AttendanceLog.check_in_time, AttendanceLog.check_out_time, AttendanceLog.location_name
+        ).join(Employee, Employee.id == AttendanceLog.employee_id).where(
+            AttendanceLog.date >= start, AttendanceLog.date <= end,
+            AttendanceLog.subject_id == faculty.subject_id
+        ).order_by(AttendanceLog.date, AttendanceLog.employee_id, AttendanceLog.id)
+        subject = faculty.subject_name
+
+        def rows():
+            result = db.session.execute(stmt.execution_options(yield_per=EXPORT_BATCH))
+            for l in result:
+                yield (l.date.isoformat(), l.employee_id, l.name, subject,
+                       l.check_in_time.isoformat() if l.check_in_time else None,
+                       l.check_out_time.isoformat() if l.check_out_time else None,
+                       l.location_name)
+
+        body = (ndjson_chunks if ndjson else csv_chunks)(EXPORT_COLUMNS, rows())
+        gzip = request.accept_encodings['gzip'] > 0
+        if gzip:
+            body = gzip_chunks(body)
+        response = Response(stream_with_context(body),
+                            mimetype='application/x-ndjson' if ndjson else 'text/csv')
+        filename = f"attendance-{subject}-{start.isoformat()}-{end.isoformat()}.{'ndjson' if ndjson else 'csv'}"
+        response.headers['Content-Disposition'] = f'attachment; filename="{secure_filename(filename)}"'
+        response.vary.add('Accept-Encoding')
+        if gzip:
+            response.headers['Content-Encoding'] = 'gzip'
+        return response
+
+    # Hit and miss counters reported by /metrics
+    for name, cache in (('token', token_cache), ('location', location_cache), ('roster', roster_cache),
+                        ('student_state', student_states), ('recent_events', recent_events)):
+        metrics.add_cache(name, cache)
+
     return app, Employee
 
 
@@ -0,0 +1,106 @@
+"""Fingerprinted, precompressed static assets.
+
+``build`` (run by build_assets.py) copies every static/*.js and *.css file to
+static/dist/<name>.<hash>.<ext>, writes gzip (and, when the ``brotli``
+module is installed, brotli) variants next to it, and records the mapping in
+static/dist/manifest.json. A fingerprinted URL never changes content, so it
+can be cached "forever"; editing a file and rebuilding produces a new URL.
+``AssetManifest`` gives templates those URLs and picks the variant to send
+for a request's Accept-Encoding.
+"""
+import gzip
+import hashlib
+import json
+import os
+
+try:
+    import brotli
+except ImportError:  # brotli variants are optional
+    brotli = None
+
+EXTENSIONS = ('.js', '.css')
+MANIFEST = 'manifest.json'
+
+# Preferred first; suffix of the precompressed file
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def fingerprint(data):
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def _write(path, data):
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def build(static_dir, dist_dir):
+    """Build every asset in ``static_dir`` into ``dist_dir``; returns the manifest.
+
+    Files from earlier builds that the new manifest no longer mentions are
+    deleted, so the directory only ever holds the current set.
+    """
+    os.makedirs(dist_dir, exist_ok=True)
+    manifest = {}
+    keep = {MANIFEST}
+    for name in sorted(os.listdir(static_dir)):
+        if not name.endswith(EXTENSIONS) or not os.path.isfile(os.path.join(static_dir, name)):
+            continue
+        with open(os.path.join(static_dir, name), 'rb') as f:
+            data = f.read()
+        stem, ext = os.path.splitext(name)
+        built = f"{stem}.{fingerprint(data)}{ext}"
+        _write(os.path.join(dist_dir, built), data)
+        keep.add(built)
+        # mtime=0 keeps rebuilds byte-for-byte identical
+        variants = [('.gz', gzip.compress(data, 9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(data, quality=11)))
+        for suffix, compressed in variants:
+            if len(compressed) < len(data):
+                _write(os.path.join(dist_dir, built + suffix), compressed)
+                keep.add(built + suffix)
+        manifest[name] = built
+    _write(os.path.join(dist_dir, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    for name in os.listdir(dist_dir):
+        if name not in keep:
+            os.remove(os.path.join(dist_dir, name))
+    return manifest
+
+
+class AssetManifest:
+    """The built assets in ``dist_dir``; empty until build_assets.py has run."""
+
+    def __init__(self, dist_dir):
+        self.dist_dir = dist_dir
+        self.load()
+
+    def load(self):
+        try:
+            with open(os.path.join(self.dist_dir, MANIFEST), encoding='utf-8') as f:
+                files = json.load(f)
+        except (OSError, ValueError):
+            files = {}
+        # Which precompressed variants exist, found once rather than per request
+        self.variants = {
+            built: tuple((encoding, suffix) for encoding, suffix in ENCODINGS
+                         if os.path.isfile(os.path.join(self.dist_dir, built + suffix)))
+            for built in files.values()
+        }
+        self.files = files
+
+    def __len__(self):
+        return len(self.files)
+
+    def built_name(self, name):
+        """Fingerprinted file name for static/``name``, or None if it was not built."""
+        return self.files.get(name)
+
+    def choose(self, built, accept_encodings):
+        """(file to send, Content-Encoding or None) for a werkzeug Accept-Encoding."""
+        for encoding, suffix in self.variants.get(built, ()):
+            if accept_encodings[encoding]:
+                return built + suffix, encoding
+        return built, None
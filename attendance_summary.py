@@ -0,0 +1,207 @@
+"""Daily attendance summary kept next to the raw attendance logs.
+
+One ``daily_attendance`` row per (student, subject, date) holds how many
+sessions the student had that day, how many are still open, and the minutes
+between check-in and check-out. Campus sessions without a subject use
+subject id 0. The app applies each flush's attendance writes as deltas in the
+same transaction (see ``apply_deltas``), so reports read a few summary rows
+instead of aggregating every log. ``rebuild`` recomputes the table from the
+raw logs, a range of dates at a time.
+
+``attendance_counters`` is maintained from the same deltas: per subject, the
+number of days each student attended (a summary row exists) and, under
+employee id 0 (``HELD``), the number of days the subject was held at all
+(any student has a row). Attendance percentages are then a two-row read.
+"""
+from datetime import timedelta
+
+import sqlalchemy as sa
+
+NO_SUBJECT = 0
+# attendance_counters row holding a subject's "days held"
+HELD = 0
+
+PRESENT = 'present'
+CHECKED_IN = 'checked_in'
+
+
+def is_subject_mark(subject_id, latitude):
+    """Subject attendance marks carry a subject but no coordinates, and never check out."""
+    return subject_id is not None and latitude is None
+
+
+def contribution(check_in_time, check_out_time, mark=False):
+    """(sessions, open sessions, minutes) one log adds to its summary row.
+
+    Times are naive IST, as stored. A log without a check-in adds nothing;
+    a subject mark counts as one closed session.
+    """
+    if check_in_time is None:
+        return 0, 0, 0
+    if mark:
+        return 1, 0, 0
+    if check_out_time is None:
+        return 1, 1, 0
+    return 1, 0, max(int((check_out_time - check_in_time).total_seconds() // 60), 0)
+
+
+def summary_key(employee_id, subject_id, day):
+    return employee_id, subject_id if subject_id is not None else NO_SUBJECT, day
+
+
+def status(open_sessions):
+    return CHECKED_IN if open_sessions > 0 else PRESENT
+
+
+def add_delta(deltas, key, sessions, open_sessions, minutes, sign=1):
+    """Accumulate a (signed) contribution for ``key`` into ``deltas``."""
+    s, o, m = deltas.get(key, (0, 0, 0))
+    deltas[key] = (s + sign * sessions, o + sign * open_sessions, m + sign * minutes)
+
+
+def apply_deltas(conn, table, deltas, counters=None):
+    """Add ``{(employee_id, subject_id, date): (sessions, open, minutes)}`` to the table.
+
+    Each key is one UPDATE of the existing row (new values computed from the
+    old ones in SQL, so concurrent writers cannot lose an increment), or an
+    INSERT when the row does not exist yet. Rows appearing or disappearing
+    are counted in ``counters`` when given.
+    """
+    # Keys in a fixed order, so two writers never lock rows in opposite orders
+    for (employee_id, subject_id, day), (sessions, open_sessions, minutes) in sorted(deltas.items()):
+        if not (sessions or open_sessions or minutes):
+            continue
+        where = sa.and_(table.c.employee_id == employee_id, table.c.subject_id == subject_id, table.c.date == day)
+        now_open = table.c.open_sessions + open_sessions
+        updated = conn.execute(table.update().where(where).values(
+            sessions=table.c.sessions + sessions,
+            open_sessions=now_open,
+            minutes=table.c.minutes + minutes,
+            status=sa.case((now_open > 0, CHECKED_IN), else_=PRESENT),
+        ))
+        if updated.rowcount == 0:
+            if sessions <= 0:
+                # Nothing summarized for this day yet (logs older than the table): leave it to rebuild
+                continue
+            conn.execute(table.insert().values(
+                employee_id=employee_id, subject_id=subject_id, date=day, sessions=sessions,
+                open_sessions=open_sessions, minutes=minutes, status=status(open_sessions),
+            ))
+            if counters is not None:
+                count_day(conn, table, counters, employee_id, subject_id, day, 1)
+        elif sessions < 0:
+            # The last session of the day went away
+            deleted = conn.execute(table.delete().where(where, table.c.sessions <= 0))
+            if deleted.rowcount and counters is not None:
+                count_day(conn, table, counters, employee_id, subject_id, day, -1)
+
+
+def count_day(conn, table, counters, employee_id, subject_id, day, n):
+    """A summary row was inserted (n=1) or deleted (n=-1): adjust the counters."""
+    bump(conn, counters, subject_id, employee_id, n)
+    # The subject was held that day iff any student has a row for it
+    others = conn.execute(sa.select(table.c.employee_id).where(
+        table.c.subject_id == subject_id, table.c.date == day, table.c.employee_id != employee_id
+    ).limit(1)).first()
+    if others is None:
+        bump(conn, counters, subject_id, HELD, n)
+
+
+def bump(conn, counters, subject_id, employee_id, n):
+    where = sa.and_(counters.c.subject_id == subject_id, counters.c.employee_id == employee_id)
+    updated = conn.execute(counters.update().where(where).values(count=counters.c.count + n))
+    if updated.rowcount == 0 and n > 0:
+        conn.execute(counters.insert().values(subject_id=subject_id, employee_id=employee_id, count=n))
+
+
+def recount(session, logs):
+    """Counters recomputed from the raw logs: {(subject_id, employee_id): days}."""
+    subject = sa.func.coalesce(logs.c.subject_id, NO_SUBJECT)
+    attended = logs.c.check_in_time.isnot(None)
+    expected = {}
+    for subject_id, employee_id, days in session.execute(
+            sa.select(subject, logs.c.employee_id, sa.func.count(sa.distinct(logs.c.date)))
+            .where(attended, logs.c.date.isnot(None)).group_by(subject, logs.c.employee_id)):
+        expected[(subject_id, employee_id)] = days
+    for subject_id, days in session.execute(
+            sa.select(subject, sa.func.count(sa.distinct(logs.c.date)))
+            .where(attended, logs.c.date.isnot(None)).group_by(subject)):
+        expected[(subject_id, HELD)] = days
+    return expected
+
+
+def check_counters(session, logs, counters):
+    """[(subject_id, employee_id, stored, expected)] for every counter that is off."""
+    expected = recount(session, logs)
+    stored = {(r.subject_id, r.employee_id): r.count for r in session.execute(sa.select(counters))}
+    mismatches = []
+    for key in sorted(set(stored) | set(expected)):
+        if stored.get(key, 0) != expected.get(key, 0):
+            mismatches.append((key[0], key[1], stored.get(key, 0), expected.get(key, 0)))
+    return mismatches
+
+
+def reset_counters(session, logs, counters):
+    """Replace every counter with a full recount, in one transaction."""
+    # Delete first: it takes the write lock, so no write lands between recount and insert
+    session.execute(counters.delete())
+    rows = [{"subject_id": s, "employee_id": e, "count": n} for (s, e), n in recount(session, logs).items()]
+    if rows:
+        session.execute(counters.insert(), rows)
+    session.commit()
+    return len(rows)
+
+
+def summarize(logs):
+    """Summary rows for an iterable of (employee_id, subject_id, date, latitude, check_in, check_out)."""
+    totals = {}
+    for employee_id, subject_id, day, latitude, check_in_time, check_out_time in logs:
+        add_delta(totals, summary_key(employee_id, subject_id, day),
+                  *contribution(check_in_time, check_out_time, is_subject_mark(subject_id, latitude)))
+    return [
+        {"employee_id": k[0], "subject_id": k[1], "date": k[2], "sessions": s, "open_sessions": o,
+         "minutes": m, "status": status(o)}
+        for k, (s, o, m) in totals.items() if s
+    ]
+
+
+def date_chunks(first, last, chunk_days):
+    """Inclusive (start, end) date ranges covering first..last."""
+    start = first
+    while start <= last:
+        end = min(start + timedelta(days=chunk_days - 1), last)
+        yield start, end
+        start = end + timedelta(days=1)
+
+
+def rebuild(session, logs, summary, chunk_days=7, progress=None):
+    """Recompute ``summary`` from the ``logs`` table; returns the rows written.
+
+    Each chunk of dates is replaced in its own transaction: the DELETE takes
+    the write lock first, so check-ins landing meanwhile wait for the chunk
+    instead of being counted twice or lost.
+    """
+    first, last = session.execute(sa.select(sa.func.min(logs.c.date), sa.func.max(logs.c.date))).one()
+    session.rollback()
+    written = 0
+    if first is None:
+        session.execute(summary.delete())
+        session.commit()
+        return written
+    # Summary rows outside the logged range are stale by definition
+    session.execute(summary.delete().where(sa.or_(summary.c.date < first, summary.c.date > last)))
+    session.commit()
+    for start, end in date_chunks(first, last, chunk_days):
+        session.execute(summary.delete().where(summary.c.date >= start, summary.c.date <= end))
+        rows = summarize(session.execute(
+            sa.select(logs.c.employee_id, logs.c.subject_id, logs.c.date, logs.c.latitude,
+                      logs.c.check_in_time, logs.c.check_out_time)
+            .where(logs.c.date >= start, logs.c.date <= end)
+        ))
+        if rows:
+            session.execute(summary.insert(), rows)
+        session.commit()
+        written += len(rows)
+        if progress:
+            progress(start, end, written)
+    return written
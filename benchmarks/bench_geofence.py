@@ -0,0 +1,84 @@
+"""Compare the geofence grid index against the linear haversine scan.
+
+Usage: python benchmarks/bench_geofence.py [--queries N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from geo import Geofence, GeofenceIndex, nearest_location  # noqa: E402
+
+
+def make_locations(n, rng):
+    # Campus-sized geofences spread over southern India
+    return [
+        Geofence(i, f"loc{i}", rng.uniform(8.0, 20.0), rng.uniform(72.0, 85.0), rng.choice([100, 250, 500]))
+        for i in range(n)
+    ]
+
+
+def make_queries(locations, n, rng):
+    # Mostly points inside a geofence, like real check-ins, plus some strays
+    queries = []
+    for _ in range(n):
+        if rng.random() < 0.9:
+            l = rng.choice(locations)
+            queries.append((l.latitude + rng.uniform(-0.0005, 0.0005), l.longitude + rng.uniform(-0.0005, 0.0005)))
+        else:
+            queries.append((rng.uniform(8.0, 20.0), rng.uniform(72.0, 85.0)))
+    return queries
+
+
+def linear_check(lat, lon, locations):
+    nearest, dist = nearest_location(lat, lon, locations)
+    return nearest, dist, nearest is not None and dist <= (nearest.radius or 100)
+
+
+def run(n, num_queries, rng):
+    locations = make_locations(n, rng)
+    queries = make_queries(locations, num_queries, rng)
+
+    t0 = time.perf_counter()
+    index = GeofenceIndex(locations)
+    build = time.perf_counter() - t0
+
+    # Strays fall back to a linear scan by design, so time them separately
+    hits = [q for q in queries if index.nearest_containing(*q)[0] is not None]
+    t0 = time.perf_counter()
+    for lat, lon in hits:
+        index.locate(lat, lon)
+    indexed_hit = (time.perf_counter() - t0) / max(len(hits), 1)
+    t0 = time.perf_counter()
+    for lat, lon in queries:
+        index.locate(lat, lon)
+    indexed = time.perf_counter() - t0
+
+    linear_queries = queries if n <= 1000 else queries[:max(1, num_queries // 20)]
+    t0 = time.perf_counter()
+    for lat, lon in linear_queries:
+        linear_check(lat, lon, locations)
+    linear = (time.perf_counter() - t0) / len(linear_queries) * len(queries)
+
+    print(f"{n:>7} locations | build {build * 1000:8.1f} ms | "
+          f"index (inside) {indexed_hit * 1e6:7.1f} us | "
+          f"index (mixed) {indexed / len(queries) * 1e6:9.1f} us | "
+          f"linear {linear / len(queries) * 1e6:9.1f} us | "
+          f"speedup {linear / indexed:6.1f}x | inside {len(hits)}/{len(queries)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    for n in (10, 1000, 100000):
+        run(n, args.queries, rng)
+
+
+if __name__ == '__main__':
+    main()
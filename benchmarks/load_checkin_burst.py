@@ -0,0 +1,139 @@
+"""Load test: the 9 AM check-in burst against a SQLite file.
+
+Every student checks in once, from many threads at the same time, while a
+few more threads poll /student/status every --status-interval-ms. Each
+configuration runs in a fresh process against a temporary database:
+  default      - stock SQLite settings (rollback journal, fsync per commit)
+  production   - SQLITE_PROFILE=production (WAL, synchronous=NORMAL, busy_timeout, ...)
+  write-behind - production plus WRITE_BEHIND=1 (group-committed check-ins)
+Reports check-in throughput, p50/p99 latency of both endpoints, and
+responses by status code (500 is usually "database is locked").
+
+Usage: python benchmarks/load_checkin_burst.py [--students N] [--threads T] [--status-threads S]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 09:05 IST, inside the check-in window
+CHECKIN_AT = "2025-01-06T03:35:00Z"
+
+
+def percentile(values, p):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))]
+
+
+def run_child(args):
+    sys.path.insert(0, ROOT)
+    from itsdangerous import URLSafeTimedSerializer
+    from app import create_app, db
+
+    app, Employee = create_app()
+    with app.app_context():
+        db.session.add(app.Location(name="Campus", latitude=12.9338, longitude=77.6929, radius=500))
+        students = [Employee(name=f"burst{i}", email=f"burst{i}@example.com", password_hash="x", role='student')
+                    for i in range(args.students)]
+        db.session.add_all(students)
+        db.session.commit()
+        ids = [s.id for s in students]
+    signer = URLSafeTimedSerializer(app.config['SECRET_KEY'], salt='student-auth')
+    tokens = [signer.dumps({"employee_id": i, "role": "student"}) for i in ids]
+
+    lock = threading.Lock()
+    next_student = iter(range(len(tokens)))
+    checkin_ms, status_ms, codes = [], [], {}
+    done = threading.Event()
+
+    def checkin_loop():
+        client = app.test_client()
+        while True:
+            with lock:
+                n = next(next_student, None)
+            if n is None:
+                return
+            t0 = time.perf_counter()
+            r = client.post('/student/loginout', headers={"Authorization": f"Bearer {tokens[n]}"}, json={
+                "action": "checkin", "latitude": 12.9338, "longitude": 77.6929, "timestamp": CHECKIN_AT
+            })
+            elapsed = (time.perf_counter() - t0) * 1000
+            with lock:
+                checkin_ms.append(elapsed)
+                codes[r.status_code] = codes.get(r.status_code, 0) + 1
+
+    def status_loop(token):
+        client = app.test_client()
+        while not done.is_set():
+            t0 = time.perf_counter()
+            client.get('/student/status', headers={"Authorization": f"Bearer {token}"})
+            status_ms.append((time.perf_counter() - t0) * 1000)
+            # Dashboards poll; a tight loop would only measure GIL contention
+            done.wait(args.status_interval_ms / 1000.0)
+
+    writers = [threading.Thread(target=checkin_loop) for _ in range(args.threads)]
+    readers = [threading.Thread(target=status_loop, args=(tokens[i],)) for i in range(args.status_threads)]
+    start = time.perf_counter()
+    for t in writers + readers:
+        t.start()
+    for t in writers:
+        t.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    for t in readers:
+        t.join()
+    app.write_behind.stop()
+    with app.app_context():
+        written = app.AttendanceLog.query.count()
+
+    print(json.dumps({
+        "throughput": len(checkin_ms) / elapsed,
+        "checkin_p50": percentile(checkin_ms, 50), "checkin_p99": percentile(checkin_ms, 99),
+        "status_p50": percentile(status_ms, 50), "status_p99": percentile(status_ms, 99),
+        "codes": codes, "written": written,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--status-threads', type=int, default=4)
+    parser.add_argument('--status-interval-ms', type=float, default=20)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        run_child(args)
+        return
+
+    modes = {
+        'default': {},
+        'production': {'SQLITE_PROFILE': 'production'},
+        'write-behind': {'SQLITE_PROFILE': 'production', 'WRITE_BEHIND': '1'},
+    }
+    for mode, extra in modes.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, DATABASE_URL='sqlite:///' + os.path.join(tmp, 'burst.db'),
+                       WRITE_BEHIND_JOURNAL=os.path.join(tmp, 'checkins.journal'), **extra)
+            out = subprocess.run(
+                [sys.executable, __file__, '--child', '--students', str(args.students),
+                 '--threads', str(args.threads), '--status-threads', str(args.status_threads),
+                 '--status-interval-ms', str(args.status_interval_ms)],
+                env=env, cwd=tmp, capture_output=True, text=True, check=True
+            ).stdout
+            r = json.loads(out.strip().splitlines()[-1])
+            print(f"{mode:>12} | {r['throughput']:7.1f} check-ins/s | check-in p50/p99 "
+                  f"{r['checkin_p50']:6.1f}/{r['checkin_p99']:7.1f} ms | status p50/p99 "
+                  f"{r['status_p50']:6.1f}/{r['status_p99']:7.1f} ms | {r['codes']} written={r['written']}")
+
+
+if __name__ == '__main__':
+    main()
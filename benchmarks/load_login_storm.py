@@ -0,0 +1,114 @@
+"""Load test: /student/status latency during a login storm.
+
+Runs each configuration in a fresh process against a temporary SQLite file:
+  bounded   - hashing pool sized from the defaults (HASH_POOL_SIZE / HASH_QUEUE_LIMIT)
+  unbounded - one hashing worker per login thread, i.e. the old inline behaviour
+Each run measures status latency before and during the storm and counts
+login responses by status code (503 means the queue limit kicked in).
+
+Usage: python benchmarks/load_login_storm.py [--logins-threads N] [--seconds S]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(values, p):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))]
+
+
+def poll_status(client, headers, stop, samples):
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        client.get('/student/status', headers=headers)
+        samples.append((time.perf_counter() - t0) * 1000)
+
+
+def login_loop(client, names, stop, codes, lock):
+    i = 0
+    while not stop.is_set():
+        r = client.post('/login_student', json={"name": names[i % len(names)], "password": "storm-password"})
+        with lock:
+            codes[r.status_code] = codes.get(r.status_code, 0) + 1
+        if r.status_code == 503:
+            time.sleep(float(r.headers.get('Retry-After', 1)) / 10)
+        i += 1
+
+
+def run_child(args):
+    sys.path.insert(0, ROOT)
+    from app import create_app, db
+
+    app, Employee = create_app()
+    with app.app_context():
+        pwhash = app.hashing_pool.hash_password("storm-password")
+        names = [f"storm{i}" for i in range(args.login_threads)]
+        db.session.add_all([Employee(name=n, email=f"{n}@example.com", password_hash=pwhash, role='student') for n in names])
+        db.session.commit()
+
+    client = app.test_client()
+    token = client.post('/login_student', json={"name": names[0], "password": "storm-password"}).get_json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def measure(with_storm):
+        stop = threading.Event()
+        samples, codes, lock = [], {}, threading.Lock()
+        threads = [threading.Thread(target=poll_status, args=(app.test_client(), headers, stop, samples))]
+        if with_storm:
+            threads += [threading.Thread(target=login_loop, args=(app.test_client(), names, stop, codes, lock))
+                        for _ in range(args.login_threads)]
+        for t in threads:
+            t.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+        return samples, codes
+
+    baseline, _ = measure(False)
+    storm, codes = measure(True)
+    print(json.dumps({
+        "pool": [app.hashing_pool.max_workers, app.hashing_pool.max_queue],
+        "baseline_p50": percentile(baseline, 50), "baseline_p99": percentile(baseline, 99),
+        "storm_p50": percentile(storm, 50), "storm_p99": percentile(storm, 99),
+        "logins": codes,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--login-threads', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        run_child(args)
+        return
+
+    for mode in ('bounded', 'unbounded'):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, DATABASE_URL='sqlite:///' + os.path.join(tmp, 'storm.db'))
+            if mode == 'unbounded':
+                env.update(HASH_POOL_SIZE=str(args.login_threads), HASH_QUEUE_LIMIT=str(args.login_threads))
+            out = subprocess.run(
+                [sys.executable, __file__, '--child', '--login-threads', str(args.login_threads), '--seconds', str(args.seconds)],
+                env=env, cwd=tmp, capture_output=True, text=True, check=True
+            ).stdout
+            r = json.loads(out.strip().splitlines()[-1])
+            print(f"{mode:>9} pool={r['pool'][0]}+{r['pool'][1]} | status p50/p99 idle "
+                  f"{r['baseline_p50']:6.1f}/{r['baseline_p99']:6.1f} ms | during storm "
+                  f"{r['storm_p50']:6.1f}/{r['storm_p99']:6.1f} ms | logins {r['logins']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+"""Fingerprint and precompress static/*.js and *.css into static/dist/.
+
+Run after changing any static file and before deploying; the app links the
+built files (served from /assets/ with immutable cache headers) whenever it
+is not in debug mode. Brotli variants need the optional ``brotli`` package.
+
+Usage: python build_assets.py
+"""
+import argparse
+import os
+
+import assets
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--static-dir', default=os.path.join(ROOT, 'static'))
+    args = parser.parse_args()
+
+    dist = os.path.join(args.static_dir, 'dist')
+    manifest = assets.build(args.static_dir, dist)
+    for name, built in sorted(manifest.items()):
+        sizes = [f"{os.path.getsize(os.path.join(dist, built))} B"]
+        for encoding, suffix in assets.ENCODINGS:
+            if os.path.exists(os.path.join(dist, built + suffix)):
+                sizes.append(f"{encoding} {os.path.getsize(os.path.join(dist, built + suffix))} B")
+        print(f"{name:>24} -> {built}  ({', '.join(sizes)})")
+    if assets.brotli is None:
+        print("brotli is not installed: only gzip variants were written")
+
+
+if __name__ == '__main__':
+    main()
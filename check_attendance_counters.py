@@ -0,0 +1,41 @@
+"""Verify attendance_counters against a full recount of attendance_logs.
+
+Prints every counter that differs from the recount and exits with status 1
+if any do. With --fix the counters are replaced by the recount (in one
+transaction) instead.
+
+The counters are kept up to date from daily_attendance rows. After the
+migrations, run rebuild_attendance_summary.py (which also resets the
+counters) rather than --fix on its own.
+
+Usage: python check_attendance_counters.py [--fix]
+"""
+import argparse
+import sys
+
+import attendance_summary
+from app import create_app, db
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fix', action='store_true', help='replace the counters with the recount')
+    args = parser.parse_args()
+
+    app, _ = create_app()
+    logs, counters = app.AttendanceLog.__table__, app.AttendanceCounter.__table__
+    with app.app_context():
+        if args.fix:
+            written = attendance_summary.reset_counters(db.session, logs, counters)
+            print(f"Rewrote attendance_counters: {written} rows")
+            return 0
+        mismatches = attendance_summary.check_counters(db.session, logs, counters)
+    for subject_id, employee_id, stored, expected in mismatches:
+        who = 'held' if employee_id == attendance_summary.HELD else f'student {employee_id}'
+        print(f"subject {subject_id}, {who}: counter {stored}, recount {expected}")
+    print("attendance_counters OK" if not mismatches else f"{len(mismatches)} counters differ; rerun with --fix")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,132 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+# Standalone scripts that are run by hand against the instance database
+collect_ignore = ['test_add_faculty.py', 'test_location_validation.py']
+
+# Tests get a private in-memory database; must be set before create_app() runs
+os.environ['DATABASE_URL'] = 'sqlite://'
+# ...and a throwaway photo store
+os.environ['PHOTO_FOLDER'] = tempfile.mkdtemp(prefix='photos-')
+
+from app import create_app, db  # noqa: E402
+
+CAMPUS = (12.9338, 77.6929)
+CHECKIN = "2025-01-06T04:00:00Z"   # 09:30 IST
+CHECKOUT = "2025-01-06T11:00:00Z"  # 16:30 IST
+
+
+@pytest.fixture(scope='session')
+def app():
+    # create_app() defines the models, so it can only run once per process
+    app, _ = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        # Seeded by migration a4d81e6c5f27 on real databases
+        db.session.add(app.ChangeCounter(name='attendance_logs', value=0))
+        db.session.commit()
+    return app
+
+
+@pytest.fixture
+def client(app):
+    yield app.test_client()
+    with app.app_context():
+        for table in reversed(db.metadata.sorted_tables):
+            # The change counter only ever grows, like in production
+            if table is not app.ChangeCounter.__table__:
+                db.session.execute(table.delete())
+        db.session.commit()
+    app.location_cache.invalidate()
+    app.subject_ids.clear()
+    app.roster_cache.invalidate()
+    app.recent_events.clear()
+    app.student_states.clear()
+
+
+@pytest.fixture
+def student_token(client):
+    r = client.post('/register_student', json={"name": "student1", "email": "student1@example.com", "password": "secret"})
+    return r.get_json()["token"]
+
+
+@pytest.fixture
+def campus(app, client):
+    """The Campus geofence plus a kiosk faculty (kiosk_faculty / kiosk@123); returns (lat, lng)."""
+    with app.app_context():
+        db.session.add(app.Location(name="Campus", latitude=CAMPUS[0], longitude=CAMPUS[1], radius=200))
+        db.session.add(app.Employee(name="kiosk_faculty", email="kiosk@example.com", position="Professor",
+                                    password_hash=generate_password_hash("kiosk@123"), role="faculty"))
+        db.session.commit()
+    return CAMPUS
+
+
+@pytest.fixture
+def loginout_event():
+    """Function building a check-in/check-out payload, on campus unless told otherwise.
+
+    Without a timestamp, check-outs happen at 16:30 IST on 2025-01-06 and
+    everything else at 09:30 IST that day.
+    """
+    def event(action, timestamp=None, lat=CAMPUS[0], lng=CAMPUS[1], **extra):
+        if timestamp is None:
+            timestamp = CHECKOUT if action == 'checkout' else CHECKIN
+        return dict(action=action, timestamp=timestamp, latitude=lat, longitude=lng, **extra)
+    return event
+
+
+@pytest.fixture
+def seed_dbms(app, client):
+    """Function adding the DBMS subject, its faculty (dbms_faculty / dbms@123)
+    and students s0, s1, ...; returns ``(subject, students)``.
+
+    Call it inside an app context; the caller adds its own logs and commits.
+    """
+    def seed(num_students=0, enroll=True):
+        dbms = app.Subject(name="dbms", display_name="DBMS")
+        db.session.add(dbms)
+        db.session.flush()
+        db.session.add(app.Employee(name="dbms_faculty", email="dbms@example.com", position="Professor - DBMS",
+                                    password_hash=generate_password_hash("dbms@123"), role="faculty",
+                                    subject_id=dbms.id))
+        students = [app.Employee(name=f"s{i}", email=f"s{i}@example.com", position="student",
+                                 password_hash="x", role="student") for i in range(num_students)]
+        db.session.add_all(students)
+        db.session.flush()
+        if enroll:
+            db.session.add_all([app.Enrollment(subject_id=dbms.id, student_id=s.id) for s in students])
+        return dbms, students
+    return seed
+
+
+@pytest.fixture
+def faculty_login(client):
+    """Function logging a faculty member in; returns the Authorization header."""
+    def login(name="dbms_faculty", password="dbms@123"):
+        token = client.post('/login_faculty', json={"name": name, "password": password}).get_json()["token"]
+        return {"Authorization": f"Bearer {token}"}
+    return login
+
+
+@pytest.fixture
+def count_queries(app):
+    """Context manager collecting the SQL statements executed inside it."""
+    @contextmanager
+    def counter():
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with app.app_context():
+            engine = db.engine
+        db.event.listen(engine, 'before_cursor_execute', record)
+        try:
+            yield statements
+        finally:
+            db.event.remove(engine, 'before_cursor_execute', record)
+    return counter
@@ -0,0 +1,53 @@
+"""Streaming encoders for the attendance export.
+
+Rows are turned into CSV or NDJSON text and handed out in chunks of about
+``chunk_size`` bytes, optionally gzip-compressed on the fly, so a response of
+any length is produced with constant memory: nothing holds more than one
+chunk of encoded output, and rows come straight from the database cursor.
+"""
+import csv
+import io
+import json
+import zlib
+
+CHUNK_SIZE = 64 * 1024
+
+
+def csv_chunks(columns, rows, chunk_size=CHUNK_SIZE):
+    """Header line plus one CSV line per row, in chunks of about chunk_size characters."""
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator='\n')
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow(row)
+        if buf.tell() >= chunk_size:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+
+def ndjson_chunks(columns, rows, chunk_size=CHUNK_SIZE):
+    """One JSON object per row, keyed by ``columns``."""
+    parts, size = [], 0
+    for row in rows:
+        line = json.dumps(dict(zip(columns, row))) + '\n'
+        parts.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield ''.join(parts)
+            parts, size = [], 0
+    if parts:
+        yield ''.join(parts)
+
+
+def gzip_chunks(chunks, level=6):
+    """Gzip-compress a stream of text chunks (UTF-8) as they are produced."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
@@ -0,0 +1,237 @@
+"""Geospatial helpers for the geofence checks in app.py."""
+from collections import namedtuple
+from math import radians, degrees, sin, cos, asin, atan2, sqrt, floor
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371000.0
+DEFAULT_RADIUS_M = 100
+
+
+class Geofence(namedtuple('Geofence', ['id', 'name', 'latitude', 'longitude', 'radius', 'lat_rad', 'lon_rad', 'cos_lat'])):
+    """Detached copy of a Location row with precomputed radians and cos(lat)."""
+    __slots__ = ()
+
+    def __new__(cls, id, name, latitude, longitude, radius):
+        lat_rad = radians(latitude)
+        return super().__new__(cls, id, name, latitude, longitude, radius, lat_rad, radians(longitude), cos(lat_rad))
+
+    def __getnewargs__(self):
+        return tuple(self[:5])
+
+
+def haversine_distance(lat1, lon1, lat2, lon2):
+    R = EARTH_RADIUS_M
+    phi1, phi2 = radians(lat1), radians(lat2)
+    dphi = radians(lat2 - lat1)
+    dlambda = radians(lon2 - lon1)
+    a = sin(dphi/2)**2 + cos(phi1) * cos(phi2) * sin(dlambda/2)**2
+    c = 2 * atan2(sqrt(a), sqrt(1-a))
+    return R * c
+
+
+def fence_distance(lat_rad, lon_rad, cos_lat, l):
+    """Haversine distance from a point (already in radians) to a Geofence."""
+    a = sin((l.lat_rad - lat_rad)/2)**2 + cos_lat * l.cos_lat * sin((l.lon_rad - lon_rad)/2)**2
+    return EARTH_RADIUS_M * 2 * atan2(sqrt(a), sqrt(1-a))
+
+
+def to_geofence(location):
+    return Geofence(location.id, location.name, location.latitude, location.longitude, location.radius)
+
+
+def nearest_location(lat, lon, locations):
+    """Exact linear scan: return (nearest location, distance in meters)."""
+    nearest = None
+    min_dist = float('inf')
+    for l in locations:
+        d = haversine_distance(lat, lon, l.latitude, l.longitude)
+        if d < min_dist:
+            min_dist = d
+            nearest = l
+    return nearest, min_dist
+
+
+class GeofenceIndex:
+    """Grid index over geofence discs.
+
+    Every geofence is registered in each lat/lon cell its disc overlaps, so a
+    point lookup only has to look at the single bucket the point falls in.
+    Discs that reach a pole, or would cover more than ``max_cells`` cells, are
+    kept in a short ``wide`` list that is checked on every lookup instead.
+    Longitudes wrap, so discs straddling the antimeridian are handled too.
+    """
+
+    # Pad bounding boxes by ~1 cm so float error never drops a boundary point
+    PAD_DEG = 1e-7
+
+    def __init__(self, locations, cell_deg=0.01, max_cells=4096):
+        self.cell_deg = cell_deg
+        self.max_cells = max_cells
+        self.rows = int(floor(180.0 / cell_deg)) + 1
+        self.cols = int(floor(360.0 / cell_deg)) + 1
+        self.locations = list(locations)
+        self.buckets = {}
+        self.wide = []
+        for l in self.locations:
+            self._insert(l)
+
+    def __len__(self):
+        return len(self.locations)
+
+    def _row(self, lat):
+        return min(max(int(floor((lat + 90.0) / self.cell_deg)), 0), self.rows - 1)
+
+    def _col(self, lon):
+        lon = ((lon + 180.0) % 360.0) - 180.0
+        return min(int(floor((lon + 180.0) / self.cell_deg)), self.cols - 1)
+
+    def _insert(self, l):
+        radius = l.radius or DEFAULT_RADIUS_M
+        delta = radius / EARTH_RADIUS_M  # angular radius
+        dlat = degrees(delta) + self.PAD_DEG
+        lat_lo, lat_hi = l.latitude - dlat, l.latitude + dlat
+        if lat_lo <= -90.0 or lat_hi >= 90.0:
+            # Disc contains a pole: every longitude is inside its bounding box
+            self.wide.append(l)
+            return
+        dlon = degrees(asin(min(sin(delta) / cos(radians(l.latitude)), 1.0))) + self.PAD_DEG
+        if dlon >= 180.0:
+            self.wide.append(l)
+            return
+
+        r0, r1 = self._row(lat_lo), self._row(lat_hi)
+        c0, c1 = self._col(l.longitude - dlon), self._col(l.longitude + dlon)
+        ncols = (c1 - c0) % self.cols + 1  # wraps across the antimeridian
+        if (r1 - r0 + 1) * ncols > self.max_cells:
+            self.wide.append(l)
+            return
+        for r in range(r0, r1 + 1):
+            for i in range(ncols):
+                key = (r, (c0 + i) % self.cols)
+                self.buckets.setdefault(key, []).append(l)
+
+    def candidates(self, lat, lon):
+        """Locations whose geofence bounding box covers the point."""
+        bucket = self.buckets.get((self._row(lat), self._col(lon)), [])
+        if self.wide:
+            return bucket + self.wide
+        return bucket
+
+    def nearest_containing(self, lat, lon):
+        """Return (location, distance) of the nearest geofence containing the point, or (None, None)."""
+        best = None
+        best_dist = None
+        lat_rad, lon_rad = radians(lat), radians(lon)
+        cos_lat = cos(lat_rad)
+        for l in self.candidates(lat, lon):
+            d = fence_distance(lat_rad, lon_rad, cos_lat, l)
+            if d <= (l.radius or DEFAULT_RADIUS_M) and (best_dist is None or d < best_dist):
+                best = l
+                best_dist = d
+        return best, best_dist
+
+    def locate(self, lat, lon):
+        """Return (location, distance, inside) for a point.
+
+        If any geofence contains the point the nearest such one is returned.
+        Otherwise this falls back to the exact nearest location by linear scan,
+        which is only needed to report how far outside the point is.
+        """
+        best, dist = self.nearest_containing(lat, lon)
+        if best is not None:
+            return best, dist, True
+        if not self.locations:
+            return None, None, False
+        best, dist = nearest_location(lat, lon, self.locations)
+        return best, dist, False
+
+
+class DistanceEngine:
+    """Vectorized haversine over all locations.
+
+    Latitude, longitude and radius are held as contiguous float64 arrays (in
+    radians for the angles), so distances from one or many query points to
+    every location are computed in a single NumPy pass.
+    """
+
+    # Upper bound on distance-matrix elements computed at once (~32 MB)
+    CHUNK_ELEMENTS = 1 << 22
+
+    def __init__(self, locations):
+        self.locations = list(locations)
+        self.lat = np.array([l.lat_rad for l in self.locations], dtype=np.float64)
+        self.lon = np.array([l.lon_rad for l in self.locations], dtype=np.float64)
+        self.cos_lat = np.array([l.cos_lat for l in self.locations], dtype=np.float64)
+        self.radius = np.array([l.radius or DEFAULT_RADIUS_M for l in self.locations], dtype=np.float64)
+
+    def __len__(self):
+        return len(self.locations)
+
+    def distances(self, lats, lons):
+        """Distance matrix in meters, shape (len(lats), len(locations))."""
+        phi = np.radians(np.asarray(lats, dtype=np.float64))[:, None]
+        lam = np.radians(np.asarray(lons, dtype=np.float64))[:, None]
+        a = np.sin((self.lat - phi) / 2) ** 2 + np.cos(phi) * self.cos_lat * np.sin((self.lon - lam) / 2) ** 2
+        np.clip(a, 0.0, 1.0, out=a)
+        return EARTH_RADIUS_M * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+    def _chunks(self, count):
+        step = max(1, self.CHUNK_ELEMENTS // max(len(self.locations), 1))
+        for start in range(0, count, step):
+            yield start, min(start + step, count)
+
+    def nearest(self, lats, lons, k):
+        """Top-k nearest locations for every query point.
+
+        Returns a list with one entry per query point, each a list of
+        (location index, distance in meters) sorted by rounded distance and
+        then by location order, matching the old sort-everything behaviour.
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        n = len(self.locations)
+        k = max(0, min(int(k), n))
+        if k == 0:
+            return [[] for _ in range(len(lats))]
+
+        results = []
+        for start, stop in self._chunks(len(lats)):
+            dist = self.distances(lats[start:stop], lons[start:stop])
+            if k < n:
+                top = np.argpartition(dist, k - 1, axis=1)[:, :k]
+            else:
+                top = np.broadcast_to(np.arange(n), dist.shape)
+            top_dist = np.take_along_axis(dist, top, axis=1)
+            for idx, d in zip(top, top_dist):
+                order = np.lexsort((idx, np.round(d)))
+                results.append(list(zip(idx[order].tolist(), d[order].tolist())))
+        return results
+
+    def locate(self, lats, lons):
+        """Vectorized GeofenceIndex.locate for many points.
+
+        Returns (index, distance, inside) arrays: the nearest geofence that
+        contains each point, else the nearest location. Index is -1 when
+        there are no locations at all.
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        count = len(lats)
+        index = np.full(count, -1, dtype=np.int64)
+        distance = np.full(count, np.nan)
+        inside = np.zeros(count, dtype=bool)
+        if not self.locations:
+            return index, distance, inside
+
+        for start, stop in self._chunks(count):
+            dist = self.distances(lats[start:stop], lons[start:stop])
+            rows = np.arange(stop - start)
+            containing = np.where(dist <= self.radius, dist, np.inf)
+            best_inside = np.argmin(containing, axis=1)
+            has_inside = np.isfinite(containing[rows, best_inside])
+            best = np.where(has_inside, best_inside, np.argmin(dist, axis=1))
+            index[start:stop] = best
+            distance[start:stop] = dist[rows, best]
+            inside[start:stop] = has_inside
+        return index, distance, inside
@@ -0,0 +1,80 @@
+"""Bounded worker pool for password hashing.
+
+Password hashing is deliberately slow (~100 ms of CPU per call with the
+default scrypt parameters). Running it inline on request threads lets a burst
+of logins take every core and stall quick endpoints. Hashing is instead done
+by a fixed number of worker threads (hashlib releases the GIL while hashing),
+and once the workers and a bounded queue are full new requests are refused
+immediately so the caller can answer 503 instead of piling up.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class PoolSaturated(Exception):
+    """Raised when the hashing queue is full; ``retry_after`` is in seconds."""
+
+    def __init__(self, retry_after):
+        super().__init__("password hashing queue is full")
+        self.retry_after = retry_after
+
+
+class HashingPool:
+    """Fixed-size executor with a bounded number of queued jobs.
+
+    ``method`` is passed to werkzeug's generate_password_hash. Hashes stored
+    with other parameters (an older method or cost) are reported by
+    ``needs_rehash`` so they can be upgraded on the next successful login.
+    """
+
+    def __init__(self, max_workers=2, max_queue=32, method='scrypt', retry_after=1):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.method = method
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._pending = 0
+        self._lock = threading.Lock()
+        # e.g. "scrypt:32768:8:1": the parameter prefix of a freshly made hash
+        self.current_params = generate_password_hash('', method=method).split('$', 1)[0]
+        self.rejected = 0
+
+    @property
+    def pending(self):
+        """Jobs running or waiting in the queue."""
+        return self._pending
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PoolSaturated(self.retry_after)
+        with self._lock:
+            self._pending += 1
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(lambda f: self._release())
+        return future.result()
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def hash_password(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def check_password(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        return pwhash.split('$', 1)[0] != self.current_params
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
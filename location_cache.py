@@ -0,0 +1,91 @@
+"""In-process read-through cache of Location rows.
+
+Locations almost never change, so check-ins and nearest-location lookups read
+them from memory instead of the database. The cache holds a snapshot tagged
+with a version number; bumping the version (on any insert, update or delete of
+a location) makes the next read reload the table.
+"""
+import threading
+import time
+
+from geo import DistanceEngine, GeofenceIndex, to_geofence
+
+
+class LocationSnapshot:
+    """Immutable set of locations plus the lookup structures built over it."""
+
+    def __init__(self, version, locations):
+        self.version = version
+        self.locations = tuple(locations)
+        self.loaded_at = time.monotonic()
+        self._index = None
+        self._engine = None
+
+    def __len__(self):
+        return len(self.locations)
+
+    @property
+    def index(self):
+        # Built on first use; a concurrent double build is harmless
+        if self._index is None:
+            self._index = GeofenceIndex(self.locations)
+        return self._index
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            self._engine = DistanceEngine(self.locations)
+        return self._engine
+
+
+class LocationCache:
+    """Version-invalidated cache of Location rows.
+
+    ``loader`` returns the current Location rows and is called inside the
+    caller's app context. ``max_age`` (seconds) optionally forces a reload
+    so writes made by other processes are picked up eventually.
+    """
+
+    def __init__(self, loader, max_age=None):
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self.max_age = max_age
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _is_fresh(self, snapshot):
+        if snapshot is None or snapshot.version != self.version:
+            return False
+        return self.max_age is None or time.monotonic() - snapshot.loaded_at < self.max_age
+
+    def get(self):
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot):
+            self.hits += 1
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if self._is_fresh(snapshot):
+                self.hits += 1
+                return snapshot
+            self.misses += 1
+            # Read the version first: a bump during the load leaves this snapshot stale
+            version = self.version
+            snapshot = LocationSnapshot(version, [to_geofence(l) for l in self._loader()])
+            self._snapshot = snapshot
+            return snapshot
+
+    def invalidate(self):
+        with self._lock:
+            self.version += 1
+
+    def refresh(self):
+        """Drop the cached rows and reload them now.
+
+        For scripts that write to the locations table directly (raw SQL,
+        another process) where the ORM change events do not fire.
+        """
+        self.invalidate()
+        return self.get()
@@ -0,0 +1,175 @@
+"""Request, database and cache metrics in the Prometheus text format.
+
+Recording is kept cheap because it happens on every request: a request adds
+one observation to a few fixed-bucket histograms under a single lock, and a
+SQL statement costs two clock reads and a counter update. Nothing is formatted until ``/metrics``
+is scraped. Cache hit counts are not recorded here at all; the caches already
+count their own hits and misses, and those counters are read at scrape time.
+
+Latency is measured until the view returns its response, so for streamed
+responses (the attendance export) it does not include sending the body.
+"""
+import bisect
+import threading
+import time
+
+from sqlalchemy import event
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# Label for requests that matched no route (404s, bad methods)
+UNMATCHED = '(unmatched)'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if isinstance(value, float):
+        return '+Inf' if value == float('inf') else repr(value)
+    return str(value)
+
+
+class Histogram:
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        # One slot per bound plus the +Inf overflow; made cumulative when rendered
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        total = 0
+        for bound, count in zip(self.bounds + (float('inf'),), self.counts):
+            total += count
+            yield f"{name}_bucket{_labels(labels + (('le', _number(float(bound))),))} {total}"
+        yield f"{name}_sum{_labels(labels)} {_number(self.sum)}"
+        yield f"{name}_count{_labels(labels)} {self.count}"
+
+
+class _Request:
+    __slots__ = ('started', 'statements', 'db_seconds')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.db_seconds = 0.0
+
+
+class Metrics:
+    def __init__(self, namespace='geoattendance', latency_buckets=LATENCY_BUCKETS,
+                 statement_buckets=STATEMENT_BUCKETS):
+        self.namespace = namespace
+        self.latency_buckets = tuple(latency_buckets)
+        self.statement_buckets = tuple(statement_buckets)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._latency = {}
+        self._db_time = {}
+        self._statements = {}
+        self._responses = {}
+        self._caches = []
+        # Every statement, including those run outside requests (write-behind, startup)
+        self.db_statements = 0
+        self.db_seconds = 0.0
+
+    def add_cache(self, name, cache):
+        """Report ``cache.hits`` and ``cache.misses`` under ``name``."""
+        self._caches.append((name, cache))
+
+    def install(self, engine):
+        """Time every SQL statement ``engine`` runs."""
+        @event.listens_for(engine, 'before_cursor_execute')
+        def start_statement(conn, cursor, statement, parameters, context, executemany):
+            conn.info['metrics_started'] = time.perf_counter()
+
+        @event.listens_for(engine, 'after_cursor_execute')
+        def end_statement(conn, cursor, statement, parameters, context, executemany):
+            elapsed = time.perf_counter() - conn.info.pop('metrics_started', time.perf_counter())
+            with self._lock:
+                self.db_statements += 1
+                self.db_seconds += elapsed
+            current = getattr(self._local, 'request', None)
+            if current is not None:
+                current.statements += 1
+                current.db_seconds += elapsed
+
+    def start_request(self):
+        self._local.request = _Request()
+
+    def end_request(self, endpoint, method, status):
+        """Record the request started on this thread; a no-op if there is none."""
+        current = getattr(self._local, 'request', None)
+        if current is None:
+            return
+        self._local.request = None
+        elapsed = time.perf_counter() - current.started
+        endpoint = endpoint or UNMATCHED
+        with self._lock:
+            latency = self._latency.get(endpoint)
+            if latency is None:
+                latency = self._latency[endpoint] = Histogram(self.latency_buckets)
+                self._db_time[endpoint] = Histogram(self.latency_buckets)
+                self._statements[endpoint] = Histogram(self.statement_buckets)
+            latency.observe(elapsed)
+            self._db_time[endpoint].observe(current.db_seconds)
+            self._statements[endpoint].observe(current.statements)
+            key = (endpoint, method, status)
+            self._responses[key] = self._responses.get(key, 0) + 1
+
+    def render(self):
+        """The current values as a Prometheus text exposition."""
+        ns = self.namespace
+        out = []
+
+        def header(name, kind, help_text):
+            out.append(f"# HELP {ns}_{name} {help_text}")
+            out.append(f"# TYPE {ns}_{name} {kind}")
+
+        with self._lock:
+            histograms = [
+                ('request_duration_seconds', 'Time to produce a response, by endpoint.', self._latency),
+                ('request_db_seconds', 'Time spent in SQL statements per request, by endpoint.', self._db_time),
+                ('request_db_statements', 'SQL statements executed per request, by endpoint.', self._statements),
+            ]
+            for name, help_text, by_endpoint in histograms:
+                header(name, 'histogram', help_text)
+                for endpoint in sorted(by_endpoint):
+                    out.extend(by_endpoint[endpoint].lines(f"{ns}_{name}", (('endpoint', endpoint),)))
+            header('requests_total', 'counter', 'Responses sent, by endpoint, method and status code.')
+            for (endpoint, method, status), count in sorted(self._responses.items()):
+                labels = (('endpoint', endpoint), ('method', method), ('status', status))
+                out.append(f"{ns}_requests_total{_labels(labels)} {count}")
+            db_statements, db_seconds = self.db_statements, self.db_seconds
+
+        header('db_statements_total', 'counter', 'SQL statements executed, in and outside requests.')
+        out.append(f"{ns}_db_statements_total {db_statements}")
+        header('db_seconds_total', 'counter', 'Time spent in SQL statements, in and outside requests.')
+        out.append(f"{ns}_db_seconds_total {_number(float(db_seconds))}")
+
+        caches = [(name, cache.hits, cache.misses) for name, cache in self._caches]
+        header('cache_hits_total', 'counter', 'Lookups answered from an in-process cache.')
+        out.extend(f"{ns}_cache_hits_total{_labels((('cache', name),))} {hits}" for name, hits, _ in caches)
+        header('cache_misses_total', 'counter', 'Lookups an in-process cache had to load.')
+        out.extend(f"{ns}_cache_misses_total{_labels((('cache', name),))} {misses}" for name, _, misses in caches)
+        header('cache_hit_ratio', 'gauge', 'Hits over all lookups since startup.')
+        out.extend(f"{ns}_cache_hit_ratio{_labels((('cache', name),))} {_number(hits / (hits + misses) if hits + misses else 0.0)}"
+                   for name, hits, misses in caches)
+        return '\n'.join(out) + '\n'
@@ -0,0 +1,36 @@
+"""Add sync_events table for idempotent offline check-ins
+
+Revision ID: 3f0a7c2d9b14
+Revises: e88a00d523e5
+Create Date: 2026-10-18 15:20:41.218764
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f0a7c2d9b14'
+down_revision = 'e88a00d523e5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('sync_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('employee_id', sa.Integer(), nullable=False),
+        sa.Column('event_id', sa.String(length=64), nullable=False),
+        sa.Column('action', sa.String(length=20), nullable=True),
+        sa.Column('device_time', sa.DateTime(), nullable=True),
+        sa.Column('received_at', sa.DateTime(), nullable=True),
+        sa.Column('status', sa.Integer(), nullable=False),
+        sa.Column('result', sa.Text(), nullable=False),
+        sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('employee_id', 'event_id', name='uq_sync_event')
+    )
+
+
+def downgrade():
+    op.drop_table('sync_events')
@@ -0,0 +1,86 @@
+"""Add subjects table referenced by attendance logs and faculty
+
+Revision ID: 53c9db490458
+Revises: 8b58e889d332
+Create Date: 2026-10-18 11:40:07.215934
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '53c9db490458'
+down_revision = '8b58e889d332'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('subjects',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('display_name', sa.String(length=50), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name', name='uq_subject_name')
+    )
+
+    # Replaced by an index on subject_id; drop it before the batch table copy
+    op.drop_index('ix_attendance_logs_date_subject', table_name='attendance_logs')
+
+    with op.batch_alter_table('attendance_logs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('subject_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_attendance_logs_subject_id', 'subjects', ['subject_id'], ['id'])
+        batch_op.drop_index('ix_attendance_logs_employee_date_subject')
+        batch_op.create_index('ix_attendance_logs_employee_date_subject', ['employee_id', 'date', 'subject_id'], unique=False)
+        batch_op.create_index('ix_attendance_logs_date_subject', ['date', 'subject_id', 'employee_id'], unique=False)
+
+    with op.batch_alter_table('employees', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('subject_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_employees_subject_id', 'subjects', ['subject_id'], ['id'])
+
+    # Backfill: one subject per distinct normalized name found in the logs, and
+    # the faculty subject that used to be parsed from "Professor - <subject>"
+    op.execute("""
+        INSERT INTO subjects (name, display_name)
+        SELECT lower(trim(subject)), min(trim(subject))
+        FROM attendance_logs
+        WHERE subject IS NOT NULL AND trim(subject) <> ''
+        GROUP BY lower(trim(subject))
+    """)
+    op.execute("""
+        INSERT INTO subjects (name, display_name)
+        SELECT lower(trim(replace(position, 'Professor - ', ''))), min(trim(replace(position, 'Professor - ', '')))
+        FROM employees
+        WHERE role = 'faculty' AND trim(replace(coalesce(position, ''), 'Professor - ', '')) <> ''
+          AND lower(trim(replace(position, 'Professor - ', ''))) NOT IN (SELECT name FROM subjects)
+        GROUP BY lower(trim(replace(position, 'Professor - ', '')))
+    """)
+    op.execute("""
+        UPDATE attendance_logs
+        SET subject_id = (SELECT id FROM subjects WHERE subjects.name = lower(trim(attendance_logs.subject)))
+        WHERE subject IS NOT NULL
+    """)
+    op.execute("""
+        UPDATE employees
+        SET subject_id = (SELECT id FROM subjects WHERE subjects.name = lower(trim(replace(employees.position, 'Professor - ', ''))))
+        WHERE role = 'faculty' AND position IS NOT NULL
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('employees', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_employees_subject_id', type_='foreignkey')
+        batch_op.drop_column('subject_id')
+
+    with op.batch_alter_table('attendance_logs', schema=None) as batch_op:
+        batch_op.drop_index('ix_attendance_logs_date_subject')
+        batch_op.drop_index('ix_attendance_logs_employee_date_subject')
+        batch_op.create_index('ix_attendance_logs_employee_date_subject', ['employee_id', 'date', 'subject'], unique=False)
+        batch_op.drop_constraint('fk_attendance_logs_subject_id', type_='foreignkey')
+        batch_op.drop_column('subject_id')
+
+    op.create_index('ix_attendance_logs_date_subject', 'attendance_logs',
+                    ['date', sa.text('lower(subject)'), 'employee_id'], unique=False)
+
+    op.drop_table('subjects')
@@ -0,0 +1,35 @@
+"""Add attendance_counters table
+
+Revision ID: 5b3e8d1f7a92
+Revises: c7e2f9a41b06
+Create Date: 2026-10-18 18:04:27.335912
+
+Fill it afterwards with: python rebuild_attendance_summary.py
+That rebuilds daily_attendance first and then these counters. Later writes
+adjust the counters from daily_attendance rows (a new row is a newly attended
+day), so the summary must be complete before the counters are trusted. Do not
+run check_attendance_counters.py --fix in place of the rebuild. Use it only
+once the summary is current.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b3e8d1f7a92'
+down_revision = 'c7e2f9a41b06'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('attendance_counters',
+        sa.Column('subject_id', sa.Integer(), nullable=False),
+        sa.Column('employee_id', sa.Integer(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('subject_id', 'employee_id')
+    )
+
+
+def downgrade():
+    op.drop_table('attendance_counters')
@@ -0,0 +1,34 @@
+"""Add composite indexes to attendance_logs
+
+Revision ID: 8b58e889d332
+Revises: 1c92adef227d
+Create Date: 2026-10-18 09:12:31.482105
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b58e889d332'
+down_revision = '1c92adef227d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('attendance_logs', schema=None) as batch_op:
+        batch_op.create_index('ix_attendance_logs_employee_date_checkin', ['employee_id', 'date', 'check_in_time'], unique=False)
+        batch_op.create_index('ix_attendance_logs_employee_date_subject', ['employee_id', 'date', 'subject'], unique=False)
+
+    # Expression index: faculty attendance compares lower(subject)
+    op.create_index('ix_attendance_logs_date_subject', 'attendance_logs',
+                    ['date', sa.text('lower(subject)'), 'employee_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_attendance_logs_date_subject', table_name='attendance_logs')
+
+    with op.batch_alter_table('attendance_logs', schema=None) as batch_op:
+        batch_op.drop_index('ix_attendance_logs_employee_date_subject')
+        batch_op.drop_index('ix_attendance_logs_employee_date_checkin')
@@ -0,0 +1,40 @@
+"""Add attendance_logs.change_seq and change_counters for delta sync
+
+Revision ID: a4d81e6c5f27
+Revises: 3f0a7c2d9b14
+Create Date: 2026-10-18 16:02:13.507381
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4d81e6c5f27'
+down_revision = '3f0a7c2d9b14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('change_counters',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('value', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+    with op.batch_alter_table('attendance_logs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('change_seq', sa.Integer(), nullable=True))
+        batch_op.create_index('ix_attendance_logs_employee_change_seq', ['employee_id', 'change_seq'], unique=False)
+
+    # Existing rows count as changed in id order; new changes continue after them
+    op.execute('UPDATE attendance_logs SET change_seq = id')
+    op.execute("INSERT INTO change_counters (name, value) "
+               "SELECT 'attendance_logs', COALESCE(MAX(id), 0) FROM attendance_logs")
+
+
+def downgrade():
+    with op.batch_alter_table('attendance_logs', schema=None) as batch_op:
+        batch_op.drop_index('ix_attendance_logs_employee_change_seq')
+        batch_op.drop_column('change_seq')
+
+    op.drop_table('change_counters')
@@ -0,0 +1,40 @@
+"""Add daily_attendance summary table
+
+Revision ID: c7e2f9a41b06
+Revises: a4d81e6c5f27
+Create Date: 2026-10-18 17:11:48.920133
+
+Fill it afterwards with: python rebuild_attendance_summary.py
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e2f9a41b06'
+down_revision = 'a4d81e6c5f27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('daily_attendance',
+        sa.Column('employee_id', sa.Integer(), nullable=False),
+        sa.Column('subject_id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('sessions', sa.Integer(), nullable=False),
+        sa.Column('open_sessions', sa.Integer(), nullable=False),
+        sa.Column('minutes', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ),
+        sa.PrimaryKeyConstraint('employee_id', 'subject_id', 'date')
+    )
+    with op.batch_alter_table('daily_attendance', schema=None) as batch_op:
+        batch_op.create_index('ix_daily_attendance_subject_date', ['subject_id', 'date', 'employee_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('daily_attendance', schema=None) as batch_op:
+        batch_op.drop_index('ix_daily_attendance_subject_date')
+
+    op.drop_table('daily_attendance')
@@ -0,0 +1,47 @@
+"""Add enrollments table linking students to subjects
+
+Revision ID: e88a00d523e5
+Revises: 53c9db490458
+Create Date: 2026-10-18 13:02:55.604318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e88a00d523e5'
+down_revision = '53c9db490458'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('enrollments',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('subject_id', sa.Integer(), nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('section', sa.String(length=20), nullable=True),
+        sa.ForeignKeyConstraint(['student_id'], ['employees.id'], ),
+        sa.ForeignKeyConstraint(['subject_id'], ['subjects.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('subject_id', 'student_id', name='uq_enrollment_subject_student')
+    )
+    with op.batch_alter_table('enrollments', schema=None) as batch_op:
+        batch_op.create_index('ix_enrollments_student', ['student_id'], unique=False)
+
+    # Every student who has marked attendance for a subject is enrolled in it
+    op.execute("""
+        INSERT INTO enrollments (subject_id, student_id)
+        SELECT DISTINCT attendance_logs.subject_id, attendance_logs.employee_id
+        FROM attendance_logs
+        JOIN employees ON employees.id = attendance_logs.employee_id
+        WHERE attendance_logs.subject_id IS NOT NULL AND employees.role = 'student'
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('enrollments', schema=None) as batch_op:
+        batch_op.drop_index('ix_enrollments_student')
+
+    op.drop_table('enrollments')
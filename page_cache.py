@@ -0,0 +1,55 @@
+"""In-memory cache of the pages that render the same for every visitor.
+
+The landing, registration, faculty and timetable pages carry no per-user
+data (everything personal is fetched by their scripts), so each one is
+rendered once, on its first request, and kept with a gzip copy and an ETag.
+Later requests skip Jinja entirely and are answered from memory, or with a
+304 when the browser already has the page.
+
+When Jinja's auto-reload is on (debug mode), every hit asks Jinja whether the
+template file changed and renders again if it did; otherwise pages live until
+``clear()`` or a restart.
+"""
+import gzip
+import hashlib
+import threading
+
+
+class Page:
+    __slots__ = ('template', 'body', 'gzipped', 'etag')
+
+    def __init__(self, template, body):
+        self.template = template
+        self.body = body
+        compressed = gzip.compress(body, 9, mtime=0)
+        # Tiny pages can grow when compressed
+        self.gzipped = compressed if len(compressed) < len(body) else None
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+
+
+class PageCache:
+    def __init__(self, jinja_env, render):
+        """``render(template)`` returns the page's HTML; called on first request."""
+        self.jinja_env = jinja_env
+        self._render = render
+        self._pages = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._pages)
+
+    def get(self, name):
+        page = self._pages.get(name)
+        if page is not None and not self.jinja_env.auto_reload:
+            return page
+        # Auto-reload: get_template() hands back a new object once the file changes
+        template = self.jinja_env.get_template(name)
+        if page is None or page.template is not template:
+            page = Page(template, self._render(template).encode('utf-8'))
+            with self._lock:
+                self._pages[name] = page
+        return page
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
@@ -0,0 +1,130 @@
+"""Content-addressed store for employee photos.
+
+An upload is streamed to a temporary file while it is hashed and measured, so
+nothing larger than ``max_bytes`` is ever kept and nothing is held in memory.
+The file is then named after its SHA-256 (``ab/abcdef....jpg``): identical
+photos are stored once, and a key never changes content, which makes the key
+itself a perfect ETag. Thumbnails for ``sizes`` are generated once at upload
+time when Pillow is installed; without it (or for images Pillow cannot
+decode) every size is served from the original.
+"""
+import hashlib
+import os
+import tempfile
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # thumbnails are optional
+    Image = None
+
+CHUNK_SIZE = 64 * 1024
+
+# Leading bytes of the formats accepted as photos
+SIGNATURES = (
+    (b'\xff\xd8\xff', 'jpg', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'png', 'image/png'),
+    (b'GIF87a', 'gif', 'image/gif'),
+    (b'GIF89a', 'gif', 'image/gif'),
+)
+MIMETYPES = {ext: mimetype for _, ext, mimetype in SIGNATURES}
+MIMETYPES['webp'] = 'image/webp'
+
+
+class PhotoTooLarge(Exception):
+    pass
+
+
+class NotAnImage(Exception):
+    pass
+
+
+def sniff(head):
+    """File extension for the leading bytes of an upload, or None."""
+    for magic, ext, _ in SIGNATURES:
+        if head.startswith(magic):
+            return ext
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+class PhotoStore:
+    def __init__(self, root, max_bytes=5 * 1024 * 1024, sizes=(64, 256)):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.sizes = tuple(sizes)
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def is_key(value):
+        """True for keys made by ``save`` (legacy rows hold a file path instead)."""
+        if not value or '/' in value or '\\' in value:
+            return False
+        digest, _, ext = value.partition('.')
+        return len(digest) == 64 and ext in MIMETYPES
+
+    def _path(self, key, size=None):
+        digest, _, ext = key.partition('.')
+        name = key if size is None else f"{digest}_{size}.jpg"
+        return os.path.join(self.root, digest[:2], name)
+
+    def save(self, stream):
+        """Store the bytes read from ``stream``; returns the photo's key."""
+        digest = hashlib.sha256()
+        total = 0
+        head = b''
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix='.upload')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    total += len(chunk)
+                    if total > self.max_bytes:
+                        raise PhotoTooLarge(f"photo is larger than {self.max_bytes} bytes")
+                    if len(head) < 16:
+                        head += chunk[:16]
+                    digest.update(chunk)
+                    out.write(chunk)
+            ext = sniff(head)
+            if ext is None:
+                raise NotAnImage("only JPEG, PNG, GIF and WebP photos are accepted")
+            key = f"{digest.hexdigest()}.{ext}"
+            path = self._path(key)
+            if os.path.exists(path):
+                # Same content already stored
+                os.remove(tmp)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp, path)
+                self._make_thumbnails(key)
+            return key
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def _make_thumbnails(self, key):
+        if Image is None:
+            return
+        try:
+            with Image.open(self._path(key)) as im:
+                im = ImageOps.exif_transpose(im).convert('RGB')
+                for size in self.sizes:
+                    thumb = im.copy()
+                    thumb.thumbnail((size, size))
+                    tmp = self._path(key, size) + '.tmp'
+                    thumb.save(tmp, 'JPEG', quality=85)
+                    os.replace(tmp, self._path(key, size))
+        except (OSError, ValueError):
+            # Undecodable or unusual image: serve the original for every size
+            pass
+
+    def lookup(self, key, size=None):
+        """(path, mimetype) of the stored file, preferring the ``size`` thumbnail."""
+        if size is not None:
+            path = self._path(key, size)
+            if os.path.exists(path):
+                return path, 'image/jpeg'
+        return self._path(key), MIMETYPES[key.partition('.')[2]]
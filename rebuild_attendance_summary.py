@@ -0,0 +1,38 @@
+"""Recompute the daily_attendance summary and attendance_counters from attendance_logs.
+
+The app keeps the table current on every write; run this once after the
+migration that creates it, or whenever the summary is suspected to be off.
+Dates are processed in chunks, each in its own short transaction, so the
+app can keep serving check-ins while it runs.
+
+Usage: python rebuild_attendance_summary.py [--chunk-days N]
+"""
+import argparse
+import time
+
+import attendance_summary
+from app import create_app, db
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--chunk-days', type=int, default=7, help='days of logs per transaction (default 7)')
+    args = parser.parse_args()
+
+    app, _ = create_app()
+    start = time.perf_counter()
+
+    def progress(first, last, written):
+        print(f"{first} .. {last}: {written} summary rows so far")
+
+    with app.app_context():
+        written = attendance_summary.rebuild(db.session, app.AttendanceLog.__table__, app.DailyAttendance.__table__,
+                                             chunk_days=max(args.chunk_days, 1), progress=progress)
+        counters = attendance_summary.reset_counters(db.session, app.AttendanceLog.__table__,
+                                                     app.AttendanceCounter.__table__)
+    print(f"Rebuilt daily_attendance ({written} rows) and attendance_counters ({counters} rows) "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""Bounded in-memory record of recently applied client event ids.
+
+Clients on flaky networks resend the same offline events many times. The
+sync_events table is the source of truth for duplicates, but most retries
+arrive within minutes of the original, so the latest results are also kept
+here and a retried event is answered without touching the database.
+"""
+import threading
+from collections import OrderedDict
+
+
+class RecentEvents:
+    """LRU of (employee id, event id) -> (result body, status)."""
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def add(self, key, body, status):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (body, status)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
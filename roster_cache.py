@@ -0,0 +1,73 @@
+"""In-process cache of per-subject class rosters.
+
+Faculty views only need the students enrolled in their subject, and rosters
+change rarely compared with how often those views are loaded. Each subject's
+roster is loaded once and kept until an enrollment for that subject changes
+(or a student record changes, which invalidates every roster).
+"""
+import threading
+from collections import namedtuple
+
+RosterStudent = namedtuple('RosterStudent', ['id', 'name', 'position', 'section'])
+
+
+class Roster:
+    """Enrolled students of one subject, ordered by student id."""
+
+    def __init__(self, students):
+        self.students = tuple(students)
+        self.ids = frozenset(s.id for s in self.students)
+
+    def __len__(self):
+        return len(self.students)
+
+    def __iter__(self):
+        return iter(self.students)
+
+    def __contains__(self, student_id):
+        return student_id in self.ids
+
+
+class RosterCache:
+    """Subject id -> Roster, invalidated per subject or all at once.
+
+    ``loader(subject_id)`` returns RosterStudent rows and is called inside the
+    caller's app context.
+    """
+
+    def __init__(self, loader):
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._rosters = {}
+        self._versions = {}
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _version(self, subject_id):
+        return self.generation, self._versions.get(subject_id, 0)
+
+    def get(self, subject_id):
+        entry = self._rosters.get(subject_id)
+        if entry is not None and entry[0] == self._version(subject_id):
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        # Read the version first: an invalidation during the load leaves this entry stale
+        version = self._version(subject_id)
+        roster = Roster(self._loader(subject_id))
+        with self._lock:
+            if version == self._version(subject_id):
+                self._rosters[subject_id] = (version, roster)
+        return roster
+
+    def invalidate(self, subject_ids=None):
+        """Drop the given subjects' rosters, or every roster if None."""
+        with self._lock:
+            if subject_ids is None:
+                self.generation += 1
+                self._rosters.clear()
+                return
+            for subject_id in subject_ids:
+                self._versions[subject_id] = self._versions.get(subject_id, 0) + 1
+                self._rosters.pop(subject_id, None)
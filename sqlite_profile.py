@@ -0,0 +1,53 @@
+"""SQLite settings for running the app under concurrent workers.
+
+With the stock settings SQLite uses a rollback journal, so a writer blocks
+every reader and concurrent check-ins fail with "database is locked" once
+pysqlite's lock wait runs out. The production profile switches the database
+to WAL (readers no longer wait for the writer), stops fsyncing on every
+commit (with synchronous=NORMAL a WAL database only syncs at checkpoints; it
+survives application crashes but may lose the last commits on power loss),
+waits ``busy_timeout`` for the write lock instead of failing,
+and gives each connection a larger page cache and a memory-mapped read
+path. Connections are pooled, so the pragmas are paid once per connection.
+"""
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+
+def is_sqlite_file(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+
+def engine_options(busy_timeout_ms=5000, pool_size=10, max_overflow=20):
+    """SQLALCHEMY_ENGINE_OPTIONS for a file-backed SQLite database."""
+    return {
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        # Connections are shared by the worker threads that check them out
+        'connect_args': {'timeout': busy_timeout_ms / 1000.0, 'check_same_thread': False},
+    }
+
+
+def pragmas(busy_timeout_ms=5000, mmap_size=256 * 1024 * 1024, cache_size_kib=64 * 1024):
+    return (
+        ('journal_mode', 'WAL'),
+        ('synchronous', 'NORMAL'),
+        ('busy_timeout', busy_timeout_ms),
+        ('mmap_size', mmap_size),
+        # Negative values are KiB rather than pages
+        ('cache_size', -cache_size_kib),
+        ('temp_store', 'MEMORY'),
+    )
+
+
+def install(engine, settings):
+    """Run ``settings`` (name, value) pragmas on every new pooled connection."""
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in settings:
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
@@ -1,20 +1,47 @@
 let authToken = null;
+// Rows are fetched a page at a time; the server hands back a cursor for the next page
+const PAGE_SIZE = 50;
+let nextCursor = null;
+
+// The loaded rows are cached in localStorage together with the server's change
+// sequence; reopening the page or polling only asks for rows changed since then
+const HISTORY_CACHE_KEY = 'historyCache';
+const HISTORY_POLL_MS = 60000;
+let cache = null;
+let syncing = null;
 
 // API functions
 const api = {
-    async history(startDate, endDate) {
+    async history(startDate, endDate, cursor) {
         const url = new URL(window.location.origin + '/student/history');
         if (startDate && endDate) { 
             url.searchParams.set('startDate', startDate); 
             url.searchParams.set('endDate', endDate); 
         }
+        url.searchParams.set('limit', PAGE_SIZE);
+        if (cursor) url.searchParams.set('cursor', cursor);
         const r = await fetch(url.toString(), { 
             headers: { 'Authorization': `Bearer ${authToken}` } 
         });
-        return r.ok ? r.json() : [];
+        if (!r.ok) return { logs: [], next: null, seq: null };
+        return { logs: await r.json(), next: r.headers.get('X-Next-Cursor'), seq: r.headers.get('X-Change-Seq') };
+    },
+
+    // Rows inserted or updated after `since`, oldest change first
+    async changes(startDate, endDate, since) {
+        const url = new URL(window.location.origin + '/student/history');
+        url.searchParams.set('startDate', startDate);
+        url.searchParams.set('endDate', endDate);
+        url.searchParams.set('since', since);
+        const r = await fetch(url.toString(), {
+            headers: { 'Authorization': `Bearer ${authToken}` }
+        });
+        if (!r.ok) return null;
+        return { logs: await r.json(), seq: r.headers.get('X-Change-Seq') };
     },
     
     async logout() {
+        try { localStorage.removeItem(HISTORY_CACHE_KEY); } catch {}
         await fetch('/logout', { 
             method: 'POST',
             headers: { 'Authorization': `Bearer ${authToken}` }
@@ -50,9 +77,14 @@ function calculateDuration(start, end) {
     return `${hours}h ${minutes}m`;
 }
 
-// Render history table
-function renderHistory(logs) {
+// Render history table; later pages are appended to the same table
+function renderHistory(logs, append) {
     const holder = document.getElementById('historyList');
+    const tbody = holder.querySelector('tbody');
+    if (append && tbody) {
+        tbody.insertAdjacentHTML('beforeend', historyRows(logs));
+        return;
+    }
     if (!Array.isArray(logs) || !logs.length) { 
         holder.innerHTML = '<div class="no-data">No attendance records found for the selected period.</div>';
         return; 
@@ -71,7 +103,11 @@ function renderHistory(logs) {
             </thead>
             <tbody>`;
     
-    const rows = logs.map(log => {
+    holder.innerHTML = `${header}${historyRows(logs)}</tbody></table>`;
+}
+
+function historyRows(logs) {
+    return logs.map(log => {
         const checkInTime = formatTime(log.check_in_time || log.checkInTime);
         const checkOutTime = formatTime(log.check_out_time || log.checkOutTime);
         const duration = calculateDuration(
@@ -88,8 +124,102 @@ function renderHistory(logs) {
                 <td>${log.location_name || log.location || '-'}</td>
             </tr>`;
     }).join('');
-    
-    holder.innerHTML = `${header}${rows}</tbody></table>`;
+}
+
+function readCache(startDate, endDate) {
+    try {
+        const c = JSON.parse(localStorage.getItem(HISTORY_CACHE_KEY));
+        if (c && c.token === authToken && c.start === startDate && c.end === endDate) return c;
+    } catch {}
+    return null;
+}
+
+function saveCache() {
+    if (!cache) return;
+    cache.next = nextCursor;
+    try { localStorage.setItem(HISTORY_CACHE_KEY, JSON.stringify(cache)); } catch {}
+}
+
+// Server order: date, then check-in time (missing last), then id, all newest first
+function compareRows(a, b) {
+    if (a.date !== b.date) return a.date < b.date ? 1 : -1;
+    const ai = a.check_in_time, bi = b.check_in_time;
+    if (ai !== bi) {
+        if (!ai) return 1;
+        if (!bi) return -1;
+        return ai < bi ? 1 : -1;
+    }
+    return b.id - a.id;
+}
+
+// Fold changed rows into the cache. While later pages are still unloaded, a new
+// row that sorts below the last loaded one is left for "Load more" to fetch.
+function mergeChanges(changed) {
+    const rows = cache.rows;
+    const last = rows[rows.length - 1];
+    changed.forEach(row => {
+        const i = rows.findIndex(r => r.id === row.id);
+        if (i >= 0) rows[i] = row;
+        else if (!nextCursor || !last || compareRows(row, last) <= 0) rows.push(row);
+    });
+    rows.sort(compareRows);
+}
+
+async function syncHistory() {
+    if (!cache || cache.seq == null) return;
+    if (syncing) return syncing;
+    syncing = (async () => {
+        const delta = await api.changes(cache.start, cache.end, cache.seq);
+        if (!delta) return;
+        if (delta.logs.length) {
+            mergeChanges(delta.logs);
+            renderHistory(cache.rows);
+            updateLoadMore();
+        }
+        cache.seq = delta.seq;
+        saveCache();
+    })();
+    try { await syncing; } catch (error) {
+        console.error('Error syncing history:', error);
+    } finally { syncing = null; }
+}
+
+// Show a "Load more" button while the server reports further pages
+function updateLoadMore() {
+    let btn = document.getElementById('loadMoreBtn');
+    if (!nextCursor) {
+        if (btn) btn.remove();
+        return;
+    }
+    if (!btn) {
+        btn = document.createElement('button');
+        btn.id = 'loadMoreBtn';
+        btn.className = 'btn';
+        btn.textContent = 'Load more';
+        btn.addEventListener('click', loadMoreHistory);
+        document.getElementById('historyList').after(btn);
+    }
+}
+
+async function loadMoreHistory() {
+    if (!nextCursor) return;
+    try {
+        const page = await api.history(
+            document.getElementById('histStart').value,
+            document.getElementById('histEnd').value,
+            nextCursor
+        );
+        renderHistory(page.logs, true);
+        nextCursor = page.next;
+        if (cache) {
+            cache.rows = cache.rows.concat(page.logs);
+            saveCache();
+        }
+        updateLoadMore();
+    } catch (error) {
+        console.error('Error loading history:', error);
+        toast('Failed to load history', 'error');
+    }
 }
 
 // Initialize the page
@@ -115,6 +245,10 @@ async function init() {
     // Event Listeners
     document.getElementById('loadHistoryBtn').addEventListener('click', loadHistory);
     document.getElementById('logoutBtn').addEventListener('click', () => api.logout());
+
+    // Keep the table current without reloading it
+    setInterval(() => { if (!document.hidden) syncHistory(); }, HISTORY_POLL_MS);
+    document.addEventListener('visibilitychange', () => { if (!document.hidden) syncHistory(); });
 }
 
 // Load history based on selected dates
@@ -128,9 +262,24 @@ async function loadHistory() {
             return;
         }
         
+        const cached = readCache(startDate, endDate);
+        if (cached) {
+            // Show what we had at once, then fetch only what changed
+            cache = cached;
+            nextCursor = cache.next;
+            renderHistory(cache.rows);
+            updateLoadMore();
+            await syncHistory();
+            return;
+        }
+
         document.getElementById('historyList').textContent = 'Loading...';
-        const logs = await api.history(startDate, endDate);
-        renderHistory(logs);
+        const page = await api.history(startDate, endDate);
+        renderHistory(page.logs);
+        nextCursor = page.next;
+        cache = { token: authToken, start: startDate, end: endDate, seq: page.seq, rows: page.logs };
+        saveCache();
+        updateLoadMore();
     } catch (error) {
         console.error('Error loading history:', error);
         toast('Failed to load history', 'error');
@@ -11,7 +11,13 @@ const api = {
     const r = await fetch('/login_student', { method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({ name, password }) });
     return r.json();
   },
-  async me(){ const r = await fetch('/student/me', { headers:{ 'Authorization': `Bearer ${authToken}` } }); return r.ok ? r.json() : null; },
+  async bootstrap(coords){
+    // Profile, today's status, recent history (and nearby locations) in one request
+    const url = new URL(window.location.origin + '/student/bootstrap');
+    if (coords){ url.searchParams.set('lat', coords.latitude); url.searchParams.set('lng', coords.longitude); }
+    const r = await fetch(url.toString(), { headers:{ 'Authorization': `Bearer ${authToken}` } });
+    return r.ok ? r.json() : null;
+  },
   async status(){ const r = await fetch('/student/status', { headers:{ 'Authorization': `Bearer ${authToken}` } }); return r.ok ? r.json() : null; },
   async history(startDate, endDate){
     const url = new URL(window.location.origin + '/student/history');
@@ -24,6 +30,7 @@ const api = {
     const now = timestamp || new Date();
 
     const body = {
+      event_id: newEventId(),
       latitude: lat,
       longitude: lng,
       action: action,
@@ -35,15 +42,32 @@ const api = {
       body.subject = subject;
     }
 
-    const r = await fetch('/student/loginout', {
+    // Queue first so the event survives a dropped connection, then flush
+    // everything still pending in one request
+    if (student) { try { localStorage.setItem(PENDING_OWNER_KEY, String(student.id)); } catch {} }
+    savePendingEvents(pendingEvents().concat([body]));
+    const res = await flushPendingEvents();
+    if (!res) return { queued: true };
+    if (res.error) return { error: res.error };
+    const result = res.results[body.event_id];
+    if (result && result.status >= 500) {
+      return { error: 'Server busy. Your attendance is saved and will be sent again later' };
+    }
+    return result || { queued: true };
+  },
+  async sync(events){
+    // Rejects only when no response arrived (offline); HTTP errors resolve with ok=false
+    const r = await fetch('/student/sync', {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
         'Authorization': `Bearer ${authToken}`
       },
-      body: JSON.stringify(body)
+      body: JSON.stringify({ events })
     });
-    return r.json();
+    let body = null;
+    try { body = await r.json(); } catch {}
+    return { ok: r.ok, status: r.status, body };
   },
   async uploadPhoto(file){ const fd = new FormData(); fd.append('file', file); const r = await fetch(`/upload_photo/${student?.id}`, { method:'POST', body: fd }); return r.json(); },
   async facultyLogin(name, password){ const r = await fetch('/login_faculty', { method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({ name, password }) }); return r.json(); },
@@ -51,6 +75,80 @@ const api = {
   async facultyAttendance(ftoken, day){ const url = new URL(window.location.origin + '/faculty/attendance'); if(day) url.searchParams.set('date', day); const r = await fetch(url.toString(), { headers:{ 'Authorization': `Bearer ${ftoken}` } }); return r.json(); }
 }
 
+// Check-ins/outs are kept in localStorage until the server has answered them,
+// so taps made on a dead connection are replayed (once) when it comes back
+const PENDING_EVENTS_KEY = 'pendingAttendanceEvents';
+// Student the queued events belong to; they are never sent with another login
+const PENDING_OWNER_KEY = 'pendingAttendanceOwner';
+let flushing = null;
+
+function newEventId(){
+  if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+  return Date.now().toString(36) + '-' + Math.random().toString(36).slice(2);
+}
+function pendingEvents(){ try { return JSON.parse(localStorage.getItem(PENDING_EVENTS_KEY)) || []; } catch { return []; } }
+function savePendingEvents(events){ try { localStorage.setItem(PENDING_EVENTS_KEY, JSON.stringify(events)); } catch {} }
+function pendingOwner(){ try { return localStorage.getItem(PENDING_OWNER_KEY); } catch { return null; } }
+
+// Send every queued event to /student/sync. Returns {results: {event_id: result}},
+// {error, status} when the server refused the request, or null if offline.
+async function flushPendingEvents(){
+  if (flushing) await flushing.catch(()=>{});
+  const events = pendingEvents();
+  if (!authToken || !events.length) return { results: {} };
+  flushing = (async ()=>{
+    let res;
+    try { res = await api.sync(events); } catch { return null; }
+    if (res.status === 401){
+      // Expired token: keep the events for after the next login
+      authToken = null; student = null; clearToken(); showAuth();
+      return { error: 'Your session has expired. Log in again to send your saved attendance', status: 401 };
+    }
+    if (!res.ok || !res.body || !Array.isArray(res.body.results)){
+      if (res.status >= 400 && res.status < 500){
+        // Refused as sent: retrying the same request cannot succeed
+        const sent = new Set(events.map(e => e.event_id));
+        savePendingEvents(pendingEvents().filter(e => !sent.has(e.event_id)));
+      }
+      if (res.status >= 500){
+        return { error: `Server error (HTTP ${res.status}). Your attendance is saved and will be sent again later`, status: res.status };
+      }
+      return { error: (res.body && res.body.error) || `Could not sync attendance (HTTP ${res.status})`, status: res.status };
+    }
+    const results = {};
+    res.body.results.forEach(r => { if (r.eventId) results[r.eventId] = r; });
+    // Keep anything queued while this request was in flight, and events the
+    // server could not process yet (5xx results)
+    const answered = id => id in results && results[id].status < 500;
+    savePendingEvents(pendingEvents().filter(e => !answered(e.event_id)));
+    return { results };
+  })();
+  try { return await flushing; } finally { flushing = null; }
+}
+
+async function syncPendingEvents(){
+  const queued = pendingEvents().length;
+  if (!queued || !student) return;
+  if (pendingOwner() && pendingOwner() !== String(student.id)){
+    // Left behind by another account on this device
+    savePendingEvents([]);
+    return;
+  }
+  const res = await flushPendingEvents();
+  if (!res) return;
+  if (res.error){
+    toast(res.error, 'error');
+    return;
+  }
+  const synced = Object.values(res.results).filter(r => r.status < 500).length;
+  if (synced){
+    toast(`Synced ${synced} offline attendance event(s)`, 'success');
+    await refreshStatus();
+  }
+}
+
+window.addEventListener('online', syncPendingEvents);
+
 function showAuth(){
   document.getElementById('authCard').style.display='';
   document.getElementById('dash').style.display='none';
@@ -106,7 +204,10 @@ function getLocation(){
 
 async function refreshStatus(){
   if (!authToken) return;
-  const st = await api.status();
+  applyStatus(await api.status());
+}
+
+function applyStatus(st){
   renderTodayStatus(st);
   if (st && st.checkedIn && !st.checkedOut) updateStatusBadge('Checked In');
   else if (st && st.checkedIn && st.checkedOut) updateStatusBadge('Checked Out');
@@ -153,7 +254,9 @@ async function doCheckIn() {
   const checkInTime = new Date();
   
   const res = await api.loginout(currentCoords.latitude, currentCoords.longitude, 'checkin');
-  if (res && res.error) {
+  if (res && res.queued) {
+    toast('You are offline. Check-in saved and will sync when you reconnect', 'info');
+  } else if (res && res.error) {
     if (res.distance !== undefined && res.allowedRadius !== undefined) {
       toast(`Not in campus: ${res.distance}m away (allowed ${res.allowedRadius}m)`, 'error');
     } else {
@@ -173,7 +276,9 @@ async function doCheckOut() {
   const checkOutTime = new Date();
   
   const res = await api.loginout(currentCoords.latitude, currentCoords.longitude, 'checkout');
-  if (res && res.error) {
+  if (res && res.queued) {
+    toast('You are offline. Check-out saved and will sync when you reconnect', 'info');
+  } else if (res && res.error) {
     if (res.distance !== undefined && res.allowedRadius !== undefined) {
       toast(`Not in campus: ${res.distance}m away (allowed ${res.allowedRadius}m)`, 'error');
     } else {
@@ -215,6 +320,7 @@ function clearToken(){
   try {
     localStorage.removeItem('studentToken');
     localStorage.removeItem('authToken');
+    localStorage.removeItem('historyCache');
   } catch {}
 }
 
@@ -261,12 +367,13 @@ window.addEventListener('DOMContentLoaded', async ()=>{
         try { document.getElementById('dash').scrollIntoView({behavior:'smooth', block:'start'}); } catch {}
         await refreshStatus();
         toast('Logged in', 'success');
+        await syncPendingEvents();
       } else {
         toast((res && res.error) || 'Invalid credentials', 'error');
       }
     });
   }
-  document.getElementById('logoutBtn').addEventListener('click', ()=>{ authToken=null; student=null; clearToken(); showAuth(); updateStatusBadge('-'); document.getElementById('todayStatus').textContent='-'; });
+  document.getElementById('logoutBtn').addEventListener('click', ()=>{ authToken=null; student=null; clearToken(); savePendingEvents([]); showAuth(); updateStatusBadge('-'); document.getElementById('todayStatus').textContent='-'; });
   document.getElementById('getLocationBtn').addEventListener('click', getLocation);
   document.getElementById('checkInBtn').addEventListener('click', doCheckIn);
   document.getElementById('checkOutBtn').addEventListener('click', doCheckOut);
@@ -325,8 +432,15 @@ window.addEventListener('DOMContentLoaded', async ()=>{
   const saved = readToken();
   if (saved){
     authToken = saved;
-    const me = await api.me();
-    if (me){ student = me; document.getElementById('studentName').textContent = student.name; showDash(); await refreshStatus(); }
+    const boot = await api.bootstrap(currentCoords);
+    if (boot){
+      student = boot.student;
+      document.getElementById('studentName').textContent = student.name;
+      showDash();
+      applyStatus(boot.status);
+      renderHistory(boot.history);
+      await syncPendingEvents();
+    }
     else { clearToken(); showAuth(); }
   } else {
     showAuth();
@@ -0,0 +1,92 @@
+"""Write-through cache of each student's attendance state for today (IST).
+
+The student dashboard and the subject attendance page poll /student/status
+constantly, and its answer only changes when that student checks in or out.
+The state is loaded once per student per day and then kept current from the
+commit hooks in app.py, so repeat polls never reach the database.
+"""
+import threading
+import time
+from collections import namedtuple
+
+
+class StudentState(namedtuple('StudentState', ['log_id', 'check_in_time', 'check_out_time', 'location'])):
+    """The latest campus session of a day; times are naive IST like the database."""
+    __slots__ = ()
+
+    @property
+    def checked_in_now(self):
+        return self.check_in_time is not None and self.check_out_time is None
+
+
+class StudentStateCache:
+    """Student id -> (day, StudentState or None when there is no session).
+
+    ``loader(student_id, day)`` returns the state and runs inside the
+    caller's app context. ``update`` only replaces an entry it can prove is
+    stale (same day, and the written session is at least as recent as the
+    cached one); anything else just drops the entry so the next ``get``
+    reloads. ``max_age`` bounds staleness when other processes write too.
+    """
+
+    def __init__(self, loader, max_age=None, clock=time.monotonic):
+        self._loader = loader
+        self.max_age = max_age
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._versions = {}
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _version(self, student_id):
+        return self.generation, self._versions.get(student_id, 0)
+
+    def _bump(self, student_id):
+        self._versions[student_id] = self._versions.get(student_id, 0) + 1
+        self._entries.pop(student_id, None)
+
+    def get(self, student_id, day):
+        entry = self._entries.get(student_id)
+        if entry is not None and entry[0] == day and (
+                self.max_age is None or self._clock() - entry[2] < self.max_age):
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        # Read the version first: a write during the load leaves this entry unstored
+        version = self._version(student_id)
+        state = self._loader(student_id, day)
+        with self._lock:
+            if version == self._version(student_id):
+                self._entries[student_id] = (day, state, self._clock())
+        return state
+
+    def update(self, student_id, day, state):
+        """Record a committed write of ``state`` (a session dated ``day``)."""
+        with self._lock:
+            entry = self._entries.get(student_id)
+            if entry is None or entry[0] != day:
+                self._bump(student_id)
+                return
+            cached = entry[1]
+            if cached is None or cached.log_id == state.log_id or state.check_in_time >= cached.check_in_time:
+                self._bump(student_id)
+                self._entries[student_id] = (day, state, self._clock())
+            # else an older session of the day changed; the cached one is still the latest
+
+    def invalidate(self, student_ids=None):
+        """Drop the given students' states, or every state if None."""
+        with self._lock:
+            if student_ids is None:
+                self.generation += 1
+                self._entries.clear()
+                return
+            for student_id in student_ids:
+                self._bump(student_id)
+
+    def clear(self):
+        self.invalidate()
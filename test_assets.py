@@ -0,0 +1,92 @@
+import gzip
+import json
+
+import pytest
+
+import assets
+
+
+@pytest.fixture
+def static_dir(tmp_path):
+    static = tmp_path / 'static'
+    static.mkdir()
+    (static / 'styles.css').write_text('body { color: red; }\n' * 200)
+    (static / 'tiny.js').write_text('1')
+    (static / 'notes.txt').write_text('not an asset')
+    return static
+
+
+def test_build_fingerprints_and_precompresses(static_dir):
+    dist = static_dir / 'dist'
+    manifest = assets.build(str(static_dir), str(dist))
+    assert set(manifest) == {'styles.css', 'tiny.js'}
+    assert json.loads((dist / assets.MANIFEST).read_text()) == manifest
+
+    css = manifest['styles.css']
+    assert css.startswith('styles.') and css.endswith('.css')
+    assert gzip.decompress((dist / (css + '.gz')).read_bytes()) == (static_dir / 'styles.css').read_bytes()
+    # Compressing a one-byte file only makes it bigger
+    assert not (dist / (manifest['tiny.js'] + '.gz')).exists()
+
+    # Rebuilding after an edit gives a new name and removes the old files
+    (static_dir / 'styles.css').write_text('body { color: blue; }\n' * 200)
+    rebuilt = assets.build(str(static_dir), str(dist))
+    assert rebuilt['styles.css'] != css and rebuilt['tiny.js'] == manifest['tiny.js']
+    assert not (dist / css).exists() and not (dist / (css + '.gz')).exists()
+
+
+def test_manifest_chooses_by_accept_encoding(static_dir):
+    dist = static_dir / 'dist'
+    css = assets.build(str(static_dir), str(dist))['styles.css']
+    manifest = assets.AssetManifest(str(dist))
+    assert manifest.built_name('styles.css') == css and manifest.built_name('missing.js') is None
+
+    from werkzeug.datastructures import Accept
+    assert manifest.choose(css, Accept([('gzip', 1)])) == (css + '.gz', 'gzip')
+    assert manifest.choose(css, Accept([])) == (css, None)
+    assert len(assets.AssetManifest(str(static_dir / 'nowhere'))) == 0
+
+
+@pytest.fixture
+def built_app(app, static_dir):
+    dist = static_dir / 'dist'
+    assets.build(str(static_dir), str(dist))
+    original = app.assets.dist_dir
+    app.assets.dist_dir = str(dist)
+    app.assets.load()
+    # Cached pages hold the asset URLs they were rendered with
+    app.pages.clear()
+    yield app
+    app.assets.dist_dir = original
+    app.assets.load()
+    app.pages.clear()
+
+
+def test_built_asset_is_served_precompressed_and_immutable(built_app, client):
+    css = built_app.assets.built_name('styles.css')
+    r = client.get(f'/assets/{css}', headers={"Accept-Encoding": "gzip, deflate"})
+    assert r.status_code == 200 and r.mimetype == 'text/css'
+    assert r.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(r.data).startswith(b'body { color: red; }')
+    assert 'immutable' in r.headers['Cache-Control'] and 'max-age=31536000' in r.headers['Cache-Control']
+    assert 'Accept-Encoding' in r.headers['Vary']
+
+    r = client.get(f'/assets/{css}')
+    assert 'Content-Encoding' not in r.headers and r.data.startswith(b'body { color: red; }')
+    assert client.get('/assets/manifest.json').status_code == 404
+    assert client.get('/assets/styles.css').status_code == 404
+
+
+def test_templates_link_built_assets(built_app, client):
+    css = built_app.assets.built_name('styles.css')
+    page = client.get('/student/register').data
+    assert f'/assets/{css}'.encode() in page
+    # Files missing from the build fall back to /static
+    assert b'/static/student_register.js' in page
+
+    built_app.debug = True
+    built_app.pages.clear()
+    try:
+        assert b'/static/styles.css' in client.get('/student/register').data
+    finally:
+        built_app.debug = False
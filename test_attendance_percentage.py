@@ -0,0 +1,69 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from itsdangerous import URLSafeTimedSerializer
+
+import attendance_summary
+from app import db
+
+
+@pytest.fixture
+def marks(app, seed_dbms):
+    """DBMS held on four days: s0 marked on three of them, s1 on one, s2 never."""
+    with app.app_context():
+        dbms, students = seed_dbms(3)
+        days = [date(2025, 1, 6) + timedelta(days=n) for n in range(4)]
+        for student, attended in zip(students, (days[:3], days[3:], [])):
+            for day in attended:
+                db.session.add(app.AttendanceLog(employee_id=student.id, date=day, subject="dbms", subject_id=dbms.id,
+                                                 check_in_time=datetime.combine(day, datetime.min.time())))
+        # A second mark on the same day counts once
+        db.session.add(app.AttendanceLog(employee_id=students[0].id, date=days[0], subject="dbms", subject_id=dbms.id,
+                                         check_in_time=datetime.combine(days[0], datetime.min.time())))
+        db.session.commit()
+        return {"subject_id": dbms.id, "students": [s.id for s in students]}
+
+
+def token_for(app, student_id):
+    return URLSafeTimedSerializer(app.config['SECRET_KEY'], salt='student-auth').dumps(
+        {"employee_id": student_id, "role": "student"})
+
+
+def test_student_percentages_come_from_counters(app, client, marks, count_queries):
+    headers = {"Authorization": f"Bearer {token_for(app, marks['students'][0])}"}
+    with count_queries() as statements:
+        r = client.get('/student/attendance_percentage', headers=headers)
+    assert r.get_json() == [{"subjectId": marks["subject_id"], "subject": "DBMS", "attended": 3, "held": 4,
+                             "percentage": 75.0}]
+    assert not [s for s in statements if 'attendance_logs' in s]
+
+    # Enrolled but never marked still lists the subject
+    headers = {"Authorization": f"Bearer {token_for(app, marks['students'][2])}"}
+    assert client.get('/student/attendance_percentage', headers=headers).get_json()[0]["percentage"] == 0.0
+
+
+def test_faculty_percentages(client, marks, faculty_login):
+    r = client.get('/faculty/attendance_percentage', headers=faculty_login()).get_json()
+    assert r["held"] == 4
+    assert [(s["attended"], s["percentage"]) for s in r["students"]] == [(3, 75.0), (1, 25.0), (0, 0.0)]
+
+
+def test_counters_follow_deletes_and_pass_the_recount(app, client, marks):
+    logs_table = app.AttendanceLog.__table__
+    with app.app_context():
+        counters = app.AttendanceCounter.__table__
+        # s1's only mark was the only one on day 4: the subject was no longer held that day
+        (log,) = app.AttendanceLog.query.filter_by(employee_id=marks["students"][1]).all()
+        db.session.delete(log)
+        db.session.commit()
+        stored = {(r.subject_id, r.employee_id): r.count for r in db.session.execute(db.select(counters))}
+        assert stored[(marks["subject_id"], attendance_summary.HELD)] == 3
+        assert stored[(marks["subject_id"], marks["students"][1])] == 0
+        assert attendance_summary.check_counters(db.session, logs_table, counters) == []
+
+        db.session.execute(counters.update().where(counters.c.employee_id == marks["students"][0]).values(count=9))
+        db.session.commit()
+        assert attendance_summary.check_counters(db.session, logs_table, counters) == [
+            (marks["subject_id"], marks["students"][0], 9, 3)]
+        attendance_summary.reset_counters(db.session, logs_table, counters)
+        assert attendance_summary.check_counters(db.session, logs_table, counters) == []
@@ -0,0 +1,77 @@
+from datetime import date, datetime, timedelta
+
+import attendance_summary
+from app import db
+
+
+def summary_rows(app):
+    with app.app_context():
+        t = app.DailyAttendance.__table__
+        return {(r.employee_id, r.subject_id, r.date): (r.status, r.sessions, r.open_sessions, r.minutes)
+                for r in db.session.execute(db.select(t))}
+
+
+def test_loginout_and_subject_marks_update_summary(app, client, student_token, seed_dbms, campus, loginout_event):
+    headers = {"Authorization": f"Bearer {student_token}"}
+    assert client.post('/student/loginout', headers=headers, json=loginout_event("checkin")).status_code == 200
+    with app.app_context():
+        student_id = app.Employee.query.filter_by(name="student1").one().id
+    day = date(2025, 1, 6)
+    assert summary_rows(app) == {(student_id, 0, day): ("checked_in", 1, 1, 0)}
+
+    assert client.post('/student/loginout', headers=headers, json=loginout_event("checkout")).status_code == 200
+    assert summary_rows(app) == {(student_id, 0, day): ("present", 1, 0, 420)}
+
+    with app.app_context():
+        dbms, _ = seed_dbms()
+        db.session.commit()
+        dbms_id = dbms.id
+    # Subject marks need an open campus session today
+    with app.app_context():
+        db.session.add(app.AttendanceLog(employee_id=student_id, date=date.today(), latitude=12.9, longitude=77.6,
+                                         check_in_time=datetime.now()))
+        db.session.commit()
+    assert client.post('/student/subject_attendance', headers=headers,
+                       json={"subject": "DBMS", "date": "2025-01-07"}).status_code == 201
+    assert summary_rows(app)[(student_id, dbms_id, date(2025, 1, 7))] == ("present", 1, 0, 0)
+
+
+def test_rebuild_matches_incremental_updates(app, client, student_token):
+    with app.app_context():
+        student_id = app.Employee.query.filter_by(name="student1").one().id
+        logs = []
+        for n in range(12):
+            day = date(2025, 2, 1) + timedelta(days=n // 2)
+            ci = datetime.combine(day, datetime.min.time()) + timedelta(hours=9, minutes=n)
+            logs.append(app.AttendanceLog(employee_id=student_id, date=day, check_in_time=ci,
+                                          subject_id=None if n % 3 else 1))
+        db.session.add_all(logs)
+        db.session.commit()
+        # Check-outs, a moved session and a deleted one all go through the same hook
+        for log in logs[:6]:
+            log.check_out_time = log.check_in_time + timedelta(hours=3, minutes=30)
+        logs[7].date = date(2025, 3, 1)
+        db.session.delete(logs[9])
+        db.session.commit()
+
+    incremental = summary_rows(app)
+    assert incremental[(student_id, 0, date(2025, 2, 1))] == ("present", 1, 0, 210)
+    assert incremental[(student_id, 0, date(2025, 3, 1))] == ("checked_in", 1, 1, 0)
+
+    with app.app_context():
+        db.session.execute(app.DailyAttendance.__table__.delete())
+        db.session.commit()
+        chunks = []
+        written = attendance_summary.rebuild(db.session, app.AttendanceLog.__table__, app.DailyAttendance.__table__,
+                                             chunk_days=2, progress=lambda *chunk: chunks.append(chunk))
+    assert summary_rows(app) == incremental and written == len(incremental)
+    # Feb 1 .. Mar 1 in two-day chunks
+    assert len(chunks) == 15
+
+
+def test_contribution():
+    ci = datetime(2025, 1, 6, 9, 0)
+    assert attendance_summary.contribution(None, None) == (0, 0, 0)
+    assert attendance_summary.contribution(ci, None) == (1, 1, 0)
+    assert attendance_summary.contribution(ci, ci + timedelta(minutes=90, seconds=59)) == (1, 0, 90)
+    assert attendance_summary.contribution(ci, ci - timedelta(minutes=5)) == (1, 0, 0)
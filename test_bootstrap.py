@@ -0,0 +1,49 @@
+from datetime import date, datetime
+
+from app import db
+
+
+def test_bootstrap_payload_and_queries(app, client, student_token, count_queries, campus):
+    headers = {"Authorization": f"Bearer {student_token}"}
+    with app.app_context():
+        student = app.Employee.query.filter_by(name="student1").one()
+        for day in range(1, 6):
+            db.session.add(app.AttendanceLog(employee_id=student.id, date=date(2025, 1, day), location_name="Campus",
+                                             check_in_time=datetime(2025, 1, day, 9, 0),
+                                             check_out_time=datetime(2025, 1, day, 17, 30)))
+        db.session.commit()
+    url = f'/student/bootstrap?history=3&lat={campus[0]}&lng={campus[1]}'
+    client.get(url, headers=headers)  # warms today's status and the locations
+
+    with count_queries() as statements:
+        r = client.get(url, headers=headers)
+    assert r.status_code == 200
+    # Profile and history; status and locations come from memory once warm
+    assert len(statements) == 2
+    body = r.get_json()
+    assert body["student"]["name"] == "student1" and not body["student"]["hasPhoto"]
+    assert body["status"]["checkedIn"] is False
+    assert [h["date"] for h in body["history"]] == ["2025-01-05", "2025-01-04", "2025-01-03"]
+    assert body["history"][0]["duration"] == "8h 30m"
+    assert body["nearestLocations"][0]["name"] == "Campus"
+
+    assert client.get('/student/bootstrap', headers=headers).get_json()["nearestLocations"] == []
+
+
+def test_bootstrap_etag(app, client, student_token):
+    headers = {"Authorization": f"Bearer {student_token}"}
+    r = client.get('/student/bootstrap', headers=headers)
+    etag = r.headers["ETag"]
+    assert r.headers["Cache-Control"] == "private, no-cache"
+    again = client.get('/student/bootstrap', headers=dict(headers, **{"If-None-Match": etag}))
+    assert again.status_code == 304 and again.data == b""
+
+    with app.app_context():
+        app.Employee.query.filter_by(name="student1").one().phone = "12345"
+        db.session.commit()
+    changed = client.get('/student/bootstrap', headers=dict(headers, **{"If-None-Match": etag}))
+    assert changed.status_code == 200 and changed.get_json()["student"]["phone"] == "12345"
+
+
+def test_bootstrap_requires_student(client):
+    assert client.get('/student/bootstrap').status_code == 401
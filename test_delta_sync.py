@@ -0,0 +1,83 @@
+from datetime import date, datetime
+
+from app import db
+
+
+def seqs(rows):
+    return [r["change_seq"] for r in rows]
+
+
+def test_history_since_returns_only_changed_rows(app, client, student_token, campus, loginout_event):
+    headers = {"Authorization": f"Bearer {student_token}"}
+    with app.app_context():
+        student = app.Employee.query.filter_by(name="student1").one()
+        db.session.add_all([app.AttendanceLog(employee_id=student.id, date=date(2025, 1, d), location_name=f"day{d}",
+                                              check_in_time=datetime(2025, 1, d, 9, 0)) for d in (2, 3)])
+        db.session.commit()
+
+    r = client.get('/student/history', headers=headers)
+    full, seq = r.get_json(), int(r.headers['X-Change-Seq'])
+    assert len(full) == 2 and seq == max(seqs(full))
+    # Nothing changed: an empty delta that keeps the sequence
+    r = client.get(f'/student/history?since={seq}', headers=headers)
+    assert r.get_json() == [] and r.headers['X-Change-Seq'] == str(seq)
+
+    assert client.post('/student/loginout', headers=headers, json=loginout_event("checkin")).status_code == 200
+    r = client.get(f'/student/history?since={seq}', headers=headers)
+    (checkin,) = r.get_json()
+    assert checkin["check_out_time"] is None and checkin["change_seq"] > seq
+    seq = int(r.headers['X-Change-Seq'])
+
+    # A check-out updates the same row under a new sequence number
+    assert client.post('/student/loginout', headers=headers, json=loginout_event("checkout")).status_code == 200
+    r = client.get(f'/student/history?since={seq}', headers=headers)
+    (checkout,) = r.get_json()
+    assert checkout["id"] == checkin["id"] and checkout["duration"] == "7h 0m"
+    assert int(r.headers['X-Change-Seq']) == checkout["change_seq"] > seq
+
+    # Older rows outside the requested range are left out of the delta
+    r = client.get('/student/history?since=0&startDate=2025-01-01&endDate=2025-01-03', headers=headers)
+    assert [row["location_name"] for row in r.get_json()] == ["day2", "day3"]
+
+
+def test_sequence_follows_commit_order_across_students(app, client, student_token):
+    with app.app_context():
+        other = app.Employee(name="student2", email="student2@example.com", password_hash="x", role="student")
+        db.session.add(other)
+        db.session.flush()
+        first = app.AttendanceLog(employee_id=other.id, date=date(2025, 1, 6), check_in_time=datetime(2025, 1, 6, 9, 0))
+        db.session.add(first)
+        db.session.commit()
+        second = app.AttendanceLog(employee_id=other.id, date=date(2025, 1, 7), check_in_time=datetime(2025, 1, 7, 9, 0))
+        db.session.add(second)
+        first.check_out_time = datetime(2025, 1, 6, 17, 0)
+        db.session.commit()
+        assert second.change_seq > 0 and first.change_seq > second.change_seq
+        assert db.session.get(app.ChangeCounter, 'attendance_logs').value == first.change_seq
+        other_id = other.id
+
+    r = client.get(f'/LogInOut/allemp/{other_id}')
+    assert r.headers['X-Change-Seq'] == str(max(seqs(r.get_json())))
+    r = client.get(f'/LogInOut/allemp/{other_id}?since={second.change_seq}')
+    assert [row["check_out_time"] for row in r.get_json()] == ["2025-01-06T17:00:00"]
+
+
+def test_invalid_since(client, student_token):
+    assert client.get('/student/history?since=abc', headers={"Authorization": f"Bearer {student_token}"}).status_code == 400
+    assert client.get('/LogInOut/allemp/1?since=abc').status_code == 400
+
+
+def test_missing_counter_continues_after_existing_sequence(app, client, student_token):
+    with app.app_context():
+        student = app.Employee.query.filter_by(name="student1").one()
+        old = app.AttendanceLog(employee_id=student.id, date=date(2025, 1, 8), check_in_time=datetime(2025, 1, 8, 9, 0))
+        db.session.add(old)
+        db.session.commit()
+        # A database whose counter row was never seeded
+        db.session.execute(db.delete(app.ChangeCounter))
+        db.session.commit()
+        new = app.AttendanceLog(employee_id=student.id, date=date(2025, 1, 9), check_in_time=datetime(2025, 1, 9, 9, 0))
+        db.session.add(new)
+        db.session.commit()
+        assert new.change_seq == old.change_seq + 1
+        assert db.session.get(app.ChangeCounter, 'attendance_logs').value == new.change_seq
@@ -0,0 +1,68 @@
+import csv
+import gzip
+import io
+import json
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app import db
+from export import csv_chunks, gzip_chunks, ndjson_chunks
+
+
+@pytest.fixture
+def faculty_headers(app, seed_dbms, faculty_login):
+    with app.app_context():
+        dbms, students = seed_dbms(3, enroll=False)
+        other = app.Subject(name="os", display_name="OS")
+        db.session.add(other)
+        db.session.flush()
+        for n in range(10):
+            day = date(2025, 1, 6) + timedelta(days=n)
+            for s in reversed(students):
+                db.session.add(app.AttendanceLog(employee_id=s.id, date=day, subject="dbms", subject_id=dbms.id,
+                                                 check_in_time=datetime.combine(day, datetime.min.time()) + timedelta(hours=10)))
+            db.session.add(app.AttendanceLog(employee_id=students[0].id, date=day, subject="os", subject_id=other.id,
+                                             check_in_time=datetime.combine(day, datetime.min.time()) + timedelta(hours=11)))
+        db.session.commit()
+    return faculty_login()
+
+
+def test_csv_export_of_a_range(client, faculty_headers):
+    r = client.get('/faculty/attendance/export?startDate=2025-01-07&endDate=2025-01-09', headers=faculty_headers)
+    assert r.status_code == 200 and r.mimetype == 'text/csv'
+    assert 'attachment; filename="attendance-dbms-2025-01-07-2025-01-09.csv"' == r.headers['Content-Disposition']
+    rows = list(csv.DictReader(io.StringIO(r.data.decode())))
+    # Only this faculty's subject, in (date, student) order
+    assert len(rows) == 9 and {row["subject"] for row in rows} == {"dbms"}
+    assert [(row["date"], row["student_name"]) for row in rows[:3]] == [("2025-01-07", f"s{i}") for i in range(3)]
+    assert rows[-1]["date"] == "2025-01-09" and rows[0]["check_out_time"] == ""
+
+
+def test_ndjson_export_gzipped(client, faculty_headers):
+    r = client.get('/faculty/attendance/export?startDate=2025-01-01&endDate=2025-01-31&format=ndjson',
+                   headers=dict(faculty_headers, **{"Accept-Encoding": "gzip"}))
+    assert r.headers['Content-Encoding'] == 'gzip' and 'Accept-Encoding' in r.headers['Vary']
+    rows = [json.loads(line) for line in gzip.decompress(r.data).decode().splitlines()]
+    assert len(rows) == 30 and rows[0]["check_in_time"] == "2025-01-06T10:00:00"
+
+
+def test_export_requires_faculty_and_dates(client, faculty_headers, student_token):
+    assert client.get('/faculty/attendance/export?startDate=2025-01-01&endDate=2025-01-31').status_code == 401
+    assert client.get('/faculty/attendance/export?startDate=2025-01-01&endDate=2025-01-31',
+                      headers={"Authorization": f"Bearer {student_token}"}).status_code == 401
+    assert client.get('/faculty/attendance/export?startDate=2025-01-01', headers=faculty_headers).status_code == 400
+    assert client.get('/faculty/attendance/export?startDate=2025-02-01&endDate=2025-01-01',
+                      headers=faculty_headers).status_code == 400
+
+
+def test_encoders_chunk_and_round_trip():
+    rows = [(i, f"name,{i}", None) for i in range(1000)]
+    chunks = list(csv_chunks(('id', 'name', 'note'), rows, chunk_size=1024))
+    assert len(chunks) > 1 and all(len(c) < 1024 + 64 for c in chunks)
+    parsed = list(csv.reader(io.StringIO(''.join(chunks))))
+    assert parsed[0] == ['id', 'name', 'note'] and parsed[-1] == ['999', 'name,999', '']
+
+    text = ''.join(ndjson_chunks(('id', 'name', 'note'), rows, chunk_size=1024))
+    assert gzip.decompress(b''.join(gzip_chunks(iter([text])))).decode() == text
+    assert json.loads(text.splitlines()[5]) == {"id": 5, "name": "name,5", "note": None}
@@ -0,0 +1,148 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from app import db
+
+DAY = date(2025, 1, 6)
+
+
+@pytest.fixture
+def seed(app, seed_dbms):
+    """Function seeding ``num_students`` enrolled DBMS students and their logs."""
+    def seed(num_students):
+        with app.app_context():
+            dbms, students = seed_dbms(num_students)
+            nlp = app.Subject(name="nlp", display_name="NLP")
+            db.session.add(nlp)
+            db.session.flush()
+            for i, s in enumerate(students):
+                if i % 2 == 0:
+                    # An older log and the latest one; only the latest should be reported
+                    db.session.add(app.AttendanceLog(employee_id=s.id, date=DAY, subject="dbms",
+                                                     subject_id=dbms.id, check_in_time=datetime(2025, 1, 6, 9, 5)))
+                    db.session.add(app.AttendanceLog(employee_id=s.id, date=DAY, subject="DBMS", location_name="Block A",
+                                                     subject_id=dbms.id,
+                                                     check_in_time=datetime(2025, 1, 6, 9, 10),
+                                                     check_out_time=datetime(2025, 1, 6, 16, 10)))
+                # Other subjects and days must not leak in
+                db.session.add(app.AttendanceLog(employee_id=s.id, date=DAY, subject="nlp",
+                                                 subject_id=nlp.id, check_in_time=datetime(2025, 1, 6, 11, 0)))
+                db.session.add(app.AttendanceLog(employee_id=s.id, date=date(2025, 1, 7), subject="dbms",
+                                                 subject_id=dbms.id, check_in_time=datetime(2025, 1, 7, 9, 0)))
+            db.session.commit()
+    return seed
+
+
+def test_faculty_attendance_rows(app, client, seed, faculty_login):
+    seed(3)
+    rows = client.get('/faculty/attendance?date=2025-01-06', headers=faculty_login()).get_json()
+    assert [r["name"] for r in rows] == ["s0", "s1", "s2"]
+    assert rows[0] == {
+        "id": rows[0]["id"],
+        "name": "s0",
+        "checkedIn": True,
+        "checkedOut": True,
+        "checkInTime": "2025-01-06T09:10:00",
+        "checkOutTime": "2025-01-06T16:10:00",
+        "location": "Block A",
+        "subject": "dbms",
+    }
+    assert rows[1] == {
+        "id": rows[1]["id"],
+        "name": "s1",
+        "checkedIn": False,
+        "checkedOut": False,
+        "checkInTime": None,
+        "checkOutTime": None,
+        "location": None,
+        "subject": "dbms",
+    }
+
+
+def test_faculty_attendance_query_count_is_constant(app, client, count_queries, seed, faculty_login):
+    seed(2)
+    headers = faculty_login()
+    with count_queries() as small:
+        client.get('/faculty/attendance?date=2025-01-06', headers=headers)
+
+    with app.app_context():
+        dbms = app.Subject.query.filter_by(name="dbms").one()
+        for i in range(2, 50):
+            s = app.Employee(name=f"s{i}", email=f"s{i}@example.com", password_hash="x", role="student")
+            db.session.add(s)
+            db.session.flush()
+            db.session.add(app.Enrollment(subject_id=dbms.id, student_id=s.id))
+        db.session.commit()
+    with count_queries() as large:
+        rows = client.get('/faculty/attendance?date=2025-01-06', headers=headers).get_json()
+    assert len(rows) == 50
+    assert len(large) == len(small)
+
+
+def test_faculty_without_subject(app, client, faculty_login):
+    with app.app_context():
+        db.session.add(app.Employee(name="dbms_faculty", email="dbms@example.com", position="Test Professor",
+                                    password_hash=generate_password_hash("dbms@123"), role="faculty"))
+        db.session.commit()
+    r = client.get('/faculty/attendance?date=2025-01-06', headers=faculty_login())
+    assert r.status_code == 400
+
+
+def test_only_enrolled_students_listed(app, client, seed, faculty_login):
+    seed(3)
+    with app.app_context():
+        db.session.add(app.Employee(name="other", email="other@example.com", password_hash="x", role="student"))
+        db.session.commit()
+    headers = faculty_login()
+    rows = client.get('/faculty/attendance?date=2025-01-06', headers=headers).get_json()
+    assert [r["name"] for r in rows] == ["s0", "s1", "s2"]
+    assert [s["name"] for s in client.get('/faculty/students', headers=headers).get_json()] == ["s0", "s1", "s2"]
+
+
+def test_roster_cached_and_invalidated_by_enrollment_changes(app, client, count_queries, seed, faculty_login):
+    seed(2)
+    headers = faculty_login()
+    client.get('/faculty/attendance?date=2025-01-06', headers=headers)
+    with count_queries() as statements:
+        client.get('/faculty/attendance?date=2025-01-06', headers=headers)
+    assert not [q for q in statements if 'enrollments' in q]
+
+    with app.app_context():
+        db.session.add(app.Employee(name="new", email="new@example.com", password_hash="x", role="student"))
+        db.session.commit()
+        new_id = app.Employee.query.filter_by(name="new").one().id
+    r = client.post('/faculty/enrollments', headers=headers, json={"student_ids": [new_id], "section": "A"})
+    assert r.status_code == 201 and r.get_json()["enrolled"] == [new_id]
+    roster = client.get('/faculty/enrollments', headers=headers).get_json()
+    assert [s["name"] for s in roster] == ["s0", "s1", "new"]
+    assert roster[-1]["section"] == "A"
+
+    assert client.delete(f'/faculty/enrollments/{new_id}', headers=headers).status_code == 200
+    rows = client.get('/faculty/attendance?date=2025-01-06', headers=headers).get_json()
+    assert [r["name"] for r in rows] == ["s0", "s1"]
+
+
+def test_enroll_rejects_unknown_students(app, client, seed, faculty_login):
+    seed(1)
+    r = client.post('/faculty/enrollments', headers=faculty_login(), json={"student_ids": [9999]})
+    assert r.status_code == 400
+
+
+def test_subject_attendance_enrolls_student(app, client, student_token, seed, faculty_login):
+    seed(0)
+    today = datetime.now(timezone(timedelta(hours=5, minutes=30)))
+    with app.app_context():
+        student = app.Employee.query.filter_by(name="student1").one()
+        # Open campus check-in for today, required before marking subject attendance
+        db.session.add(app.AttendanceLog(employee_id=student.id, date=today.date(), check_in_time=today.replace(tzinfo=None)))
+        db.session.commit()
+    headers = faculty_login()
+    assert client.get('/faculty/students', headers=headers).get_json() == []
+
+    r = client.post('/student/subject_attendance', headers={"Authorization": f"Bearer {student_token}"},
+                    json={"subject": "DBMS", "date": "2025-01-06"})
+    assert r.status_code == 201
+    rows = client.get('/faculty/attendance?date=2025-01-06', headers=headers).get_json()
+    assert [(r["name"], r["checkedIn"]) for r in rows] == [("student1", True)]
@@ -0,0 +1,99 @@
+import random
+
+from geo import DistanceEngine, Geofence, GeofenceIndex, haversine_distance, nearest_location
+
+
+def brute_force_locate(lat, lon, locations):
+    inside = [(haversine_distance(lat, lon, l.latitude, l.longitude), l) for l in locations]
+    inside = [(d, l) for d, l in inside if d <= (l.radius or 100)]
+    if inside:
+        d, l = min(inside, key=lambda x: x[0])
+        return l, d, True
+    l, d = nearest_location(lat, lon, locations)
+    return l, d, False
+
+
+def test_locate_matches_linear_scan():
+    rng = random.Random(42)
+    locations = [
+        Geofence(i, f"loc{i}", rng.uniform(12.8, 13.1), rng.uniform(77.5, 77.8), rng.choice([50, 100, 500, 2000]))
+        for i in range(300)
+    ]
+    index = GeofenceIndex(locations)
+    for _ in range(2000):
+        lat, lon = rng.uniform(12.8, 13.1), rng.uniform(77.5, 77.8)
+        got = index.locate(lat, lon)
+        expected = brute_force_locate(lat, lon, locations)
+        assert got[0] == expected[0]
+        assert got[2] == expected[2]
+
+
+def test_antimeridian():
+    fence = Geofence(1, "dateline", 0.0, 179.9995, 500)
+    index = GeofenceIndex([fence])
+    # ~167 m east of the fence centre, on the other side of the antimeridian
+    loc, dist, inside = index.locate(0.0, -179.9990)
+    assert inside and loc == fence
+    assert dist < 500
+    assert index.locate(0.0, -179.99)[2] is False
+
+
+def test_near_poles():
+    pole = Geofence(1, "pole", 89.999, 0.0, 1000)
+    arctic = Geofence(2, "arctic", 89.5, 120.0, 2000)
+    index = GeofenceIndex([pole, arctic])
+    # Across the pole from the centre, still within 1 km
+    loc, dist, inside = index.locate(89.999, 180.0)
+    assert inside and loc == pole
+    loc, dist, inside = index.locate(89.5, 120.05)
+    assert inside and loc == arctic
+
+
+def test_empty_index():
+    assert GeofenceIndex([]).locate(12.9, 77.6) == (None, None, False)
+
+
+def test_outside_reports_nearest_location():
+    near = Geofence(1, "near", 12.9338, 77.6929, 100)
+    far = Geofence(2, "far", 13.5, 78.0, 100)
+    loc, dist, inside = GeofenceIndex([near, far]).locate(12.9420, 77.6929)
+    assert not inside and loc == near
+    assert 850 < dist < 950
+
+
+def test_distance_engine_top_k_matches_full_sort():
+    rng = random.Random(7)
+    locations = [Geofence(i, f"loc{i}", rng.uniform(-60, 60), rng.uniform(-180, 180), 100) for i in range(500)]
+    engine = DistanceEngine(locations)
+    lats = [rng.uniform(-60, 60) for _ in range(50)]
+    lons = [rng.uniform(-180, 180) for _ in range(50)]
+    for lat, lon, got in zip(lats, lons, engine.nearest(lats, lons, 5)):
+        expected = sorted(
+            (round(haversine_distance(lat, lon, l.latitude, l.longitude)), i) for i, l in enumerate(locations)
+        )[:5]
+        assert [(round(d), i) for i, d in got] == expected
+
+
+def test_distance_engine_limit_larger_than_table():
+    locations = [Geofence(1, "a", 12.93, 77.69, 100), Geofence(2, "b", 12.95, 77.69, 100)]
+    result = DistanceEngine(locations).nearest([12.96], [77.69], 10)
+    assert [i for i, _ in result[0]] == [1, 0]
+    assert DistanceEngine([]).nearest([12.96], [77.69], 5) == [[]]
+
+
+def test_distance_engine_locate_matches_index():
+    rng = random.Random(3)
+    locations = [
+        Geofence(i, f"loc{i}", rng.uniform(12.8, 13.1), rng.uniform(77.5, 77.8), rng.choice([100, 500, 2000]))
+        for i in range(200)
+    ]
+    index = GeofenceIndex(locations)
+    lats = [rng.uniform(12.8, 13.1) for _ in range(500)] + [0.0]
+    lons = [rng.uniform(77.5, 77.8) for _ in range(500)] + [0.0]
+    found, dist, inside = DistanceEngine(locations).locate(lats, lons)
+    for lat, lon, i, d, ok in zip(lats, lons, found, dist, inside):
+        loc, expected_dist, expected_inside = index.locate(lat, lon)
+        assert locations[i] == loc and bool(ok) == expected_inside
+        assert abs(d - expected_dist) < 1e-6
+    empty = DistanceEngine([]).locate([1.0], [2.0])
+    assert empty[0].tolist() == [-1] and not empty[2][0]
@@ -0,0 +1,68 @@
+import threading
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from app import db
+from hashing import HashingPool, PoolSaturated
+
+
+def test_saturated_pool_rejects_immediately():
+    pool = HashingPool(max_workers=1, max_queue=1)
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocker():
+        started.set()
+        release.wait()
+
+    threads = [threading.Thread(target=pool._run, args=(blocker,)) for _ in range(2)]
+    for t in threads:
+        t.start()
+    started.wait()
+    try:
+        with pytest.raises(PoolSaturated):
+            pool.hash_password("secret")
+        assert pool.rejected == 1
+    finally:
+        release.set()
+        for t in threads:
+            t.join()
+    assert pool.pending == 0
+    assert pool.check_password(pool.hash_password("secret"), "secret")
+
+
+def test_needs_rehash():
+    pool = HashingPool(max_workers=1, method='scrypt')
+    assert not pool.needs_rehash(generate_password_hash("x", method='scrypt'))
+    assert pool.needs_rehash(generate_password_hash("x", method='pbkdf2:sha256:1000'))
+
+
+def test_login_returns_503_when_saturated(app, client, student_token):
+    pool = app.hashing_pool
+    slots = pool.max_workers + pool.max_queue
+    for _ in range(slots):
+        pool._slots.acquire()
+    try:
+        r = client.post('/login_student', json={"name": "student1", "password": "secret"})
+        assert r.status_code == 503
+        assert r.headers["Retry-After"] == str(pool.retry_after)
+        # Endpoints that do not hash are unaffected
+        assert client.get('/student/status', headers={"Authorization": f"Bearer {student_token}"}).status_code == 200
+    finally:
+        for _ in range(slots):
+            pool._slots.release()
+    assert client.post('/login_student', json={"name": "student1", "password": "secret"}).status_code == 200
+
+
+def test_outdated_hash_upgraded_on_login(app, client):
+    with app.app_context():
+        db.session.add(app.Employee(name="old", email="old@example.com", role="student",
+                                    password_hash=generate_password_hash("pw", method='pbkdf2:sha256:1000')))
+        db.session.commit()
+    assert client.post('/login_student', json={"name": "old", "password": "pw"}).status_code == 200
+    with app.app_context():
+        stored = app.Employee.query.filter_by(name="old").one().password_hash
+    assert not app.hashing_pool.needs_rehash(stored)
+    assert client.post('/login_student', json={"name": "old", "password": "pw"}).status_code == 200
+    assert client.post('/login_student', json={"name": "old", "password": "wrong"}).status_code == 401
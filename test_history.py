@@ -0,0 +1,82 @@
+import json
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app import db
+
+
+@pytest.fixture
+def history(app, client, student_token):
+    with app.app_context():
+        student = app.Employee.query.filter_by(name="student1").one()
+        for n in range(40):
+            day = date(2025, 1, 1) + timedelta(days=n // 3)
+            # Same-day rows share check-in times, and one has none, to exercise the id tie-break
+            check_in = None if n == 10 else datetime.combine(day, datetime.min.time()) + timedelta(hours=9 + n % 2)
+            db.session.add(app.AttendanceLog(employee_id=student.id, date=day, check_in_time=check_in,
+                                             location_name=f"row{n}"))
+        db.session.commit()
+    return {"Authorization": f"Bearer {student_token}"}
+
+
+def page_through(client, headers, query):
+    rows, cursor = [], None
+    while True:
+        url = f'/student/history?{query}' + (f'&cursor={cursor}' if cursor else '')
+        r = client.get(url, headers=headers)
+        assert r.status_code == 200
+        rows += r.get_json()
+        cursor = r.headers.get('X-Next-Cursor')
+        if not cursor:
+            return rows
+
+
+def test_keyset_pages_cover_everything_once(client, history):
+    full = client.get('/student/history', headers=history).get_json()
+    assert len(full) == 40
+    assert [r["location_name"] for r in page_through(client, history, 'limit=7')] == [r["location_name"] for r in full]
+    # The row without a check-in time sorts last within its day
+    day = [r["location_name"] for r in full if r["date"] == "2025-01-04"]
+    assert day[-1] == "row10"
+
+    ranged = page_through(client, history, 'limit=4&startDate=2025-01-03&endDate=2025-01-05')
+    assert [r["date"] for r in ranged] == sorted([r["date"] for r in full if "2025-01-03" <= r["date"] <= "2025-01-05"], reverse=True)
+
+
+def test_last_page_has_no_cursor(client, history):
+    r = client.get('/student/history?limit=40', headers=history)
+    assert len(r.get_json()) == 40 and 'X-Next-Cursor' not in r.headers
+
+
+def test_ndjson_stream(client, history):
+    full = client.get('/student/history', headers=history).get_json()
+    r = client.get('/student/history?format=ndjson', headers=history)
+    assert r.mimetype == 'application/x-ndjson'
+    assert [json.loads(line) for line in r.data.decode().splitlines()] == full
+
+    first = client.get('/student/history?limit=5', headers=history)
+    r = client.get(f'/student/history?cursor={first.headers["X-Next-Cursor"]}&limit=3',
+                   headers=dict(history, Accept='application/x-ndjson'))
+    assert [json.loads(line) for line in r.data.decode().splitlines()] == full[5:8]
+
+
+def test_ndjson_pages_continue(client, history):
+    full = client.get('/student/history', headers=history).get_json()
+    rows, cursor = [], None
+    while True:
+        url = '/student/history?format=ndjson&limit=9' + (f'&cursor={cursor}' if cursor else '')
+        r = client.get(url, headers=history)
+        assert r.mimetype == 'application/x-ndjson'
+        rows += [json.loads(line) for line in r.data.decode().splitlines()]
+        cursor = r.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+    assert rows == full
+
+
+def test_invalid_cursor(client, history):
+    assert client.get('/student/history?cursor=not-a-cursor', headers=history).status_code == 400
+    assert client.get('/student/history?limit=abc', headers=history).status_code == 400
+    assert client.get('/student/history?limit=0', headers=history).status_code == 400
+    assert client.get('/student/history?limit=-5&format=ndjson', headers=history).status_code == 400
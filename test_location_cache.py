@@ -0,0 +1,72 @@
+from app import db
+
+# 10:00 IST, inside the check-in window
+CHECKIN_TS = '2025-01-06T04:30:00Z'
+
+
+def add_location(app, name, lat, lng, radius=200):
+    with app.app_context():
+        db.session.add(app.Location(name=name, latitude=lat, longitude=lng, radius=radius))
+        db.session.commit()
+
+
+def checkin(client, token, lat, lng):
+    return client.post('/student/loginout', headers={"Authorization": f"Bearer {token}"},
+                       json={"latitude": lat, "longitude": lng, "action": "checkin", "timestamp": CHECKIN_TS})
+
+
+def test_locations_served_from_cache(app, client, count_queries):
+    add_location(app, "Campus", 12.9338, 77.6929)
+    body = {"lat": 12.9338, "lng": 77.6929, "limit": 1}
+    assert client.post('/get_nearest_locations', json=body).get_json()[0]["name"] == "Campus"
+    with count_queries() as statements:
+        for _ in range(3):
+            assert client.post('/get_nearest_locations', json=body).status_code == 200
+    assert not [s for s in statements if 'locations' in s]
+
+
+def test_orm_writes_invalidate_cache(app, client, student_token):
+    add_location(app, "Campus", 12.9338, 77.6929)
+    assert checkin(client, student_token, 12.9420, 77.6929).status_code == 400
+    version = app.location_cache.version
+    add_location(app, "Library", 12.9420, 77.6929)
+    assert app.location_cache.version > version
+    r = checkin(client, student_token, 12.9420, 77.6929)
+    assert r.status_code == 200
+    assert r.get_json()["location"] == "Library"
+
+
+def test_bulk_delete_invalidates_cache(app, client):
+    add_location(app, "Campus", 12.9338, 77.6929)
+    with app.app_context():
+        assert len(app.location_cache.get()) == 1
+        app.Location.query.delete()
+        db.session.commit()
+        assert len(app.location_cache.get()) == 0
+
+
+def test_rollback_keeps_cache(app, client):
+    add_location(app, "Campus", 12.9338, 77.6929)
+    with app.app_context():
+        app.location_cache.get()
+        version = app.location_cache.version
+        db.session.add(app.Location(name="Tmp", latitude=1.0, longitude=1.0))
+        db.session.flush()
+        db.session.rollback()
+    assert app.location_cache.version == version
+
+
+def test_manual_refresh_after_raw_sql(app, client):
+    with app.app_context():
+        assert len(app.location_cache.get()) == 0
+        db.session.execute(db.text("INSERT INTO locations (name, latitude, longitude, radius) VALUES ('Raw', 12.9, 77.6, 100)"))
+        db.session.commit()
+        assert len(app.location_cache.get()) == 0
+        snapshot = app.location_cache.refresh()
+    assert [l.name for l in snapshot.locations] == ["Raw"]
+    assert abs(snapshot.locations[0].cos_lat - 0.9747) < 1e-3
+    # The refreshed snapshot is what check-ins are geofenced against
+    with app.app_context():
+        nearest, _, inside = app.location_cache.get().index.locate(12.9, 77.6)
+        assert nearest.name == "Raw" and inside
+        assert not app.location_cache.get().index.locate(12.9082, 77.6)[2]  # ~900m away
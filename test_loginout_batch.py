@@ -0,0 +1,58 @@
+def test_student_batch_results_per_event(app, client, student_token, count_queries, campus, loginout_event):
+    headers = {"Authorization": f"Bearer {student_token}"}
+    events = [
+        loginout_event("checkout"),                          # applied after the check-in below
+        loginout_event("checkin", subject="DBMS"),
+        loginout_event("checkin", "2025-01-06T04:30:00Z"),   # still open at 10:00 IST
+        loginout_event("checkin", lat=13.5),                 # outside the geofence
+        loginout_event("checkin", "2025-01-06T12:00:00Z"),   # 17:30 IST, outside the window
+        {"action": "checkin"},
+        loginout_event("dance"),
+    ]
+    with count_queries() as statements:
+        results = client.post('/student/loginout/batch', json={"events": events}, headers=headers).get_json()["results"]
+    assert [r["index"] for r in results] == list(range(len(events)))
+    assert [r["status"] for r in results] == [200, 200, 400, 400, 400, 400, 400]
+    assert results[0]["message"] == "Checked out successfully" and results[0]["duration"] == "7h 0m"
+    assert results[1]["location"] == "Campus"
+    assert results[2]["error"] == "Already checked in today"
+    assert results[3]["error"] == "outside allowed radius" and results[3]["allowedRadius"] == 200
+    assert results[4]["error"] == "Check-in allowed only between 9 AM and 3 PM IST"
+    assert results[5]["error"] == "latitude and longitude required"
+    assert results[6]["error"] == "Invalid action"
+    # One lookup of open sessions for the whole batch
+    assert sum('FROM attendance_logs' in s for s in statements) == 1
+
+    with app.app_context():
+        logs = app.AttendanceLog.query.all()
+        assert len(logs) == 1 and logs[0].check_out_time is not None and logs[0].subject == "DBMS"
+
+    single = client.post('/student/loginout', json=loginout_event("checkout"), headers=headers)
+    assert single.status_code == 400
+    assert single.get_json() == {"error": "No active check-in found to check out"}
+
+
+def test_kiosk_batch(app, client, student_token, campus, loginout_event, faculty_login):
+    headers = faculty_login("kiosk_faculty", "kiosk@123")
+    with app.app_context():
+        student_id = app.Employee.query.filter_by(name="student1").one().id
+        faculty_id = app.Employee.query.filter_by(name="kiosk_faculty").one().id
+    events = [
+        loginout_event("checkin", employee_id=student_id),
+        loginout_event("checkin", employee_id=faculty_id),
+        loginout_event("checkin", employee_id=999),
+    ]
+    results = client.post('/kiosk/loginout/batch', json={"events": events}, headers=headers).get_json()["results"]
+    assert [r["status"] for r in results] == [200, 400, 400]
+    assert results[1] == {"error": "unknown student", "index": 1, "status": 400}
+
+    bad = [loginout_event("checkin", employee_id=[student_id]), loginout_event("checkin", employee_id={"id": 1}),
+           loginout_event("checkin", employee_id=True), loginout_event("checkin", employee_id=str(student_id)),
+           {"action": "checkin"}, "checkin"]
+    response = client.post('/kiosk/loginout/batch', json={"events": bad}, headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()["results"] == [
+        {"error": "employee_id must be an integer", "index": i, "status": 400} for i in range(len(bad))]
+
+    assert client.post('/kiosk/loginout/batch', json={"events": []}, headers=headers).status_code == 400
+    assert client.post('/kiosk/loginout/batch', json={"events": events}).status_code == 401
@@ -0,0 +1,68 @@
+import re
+
+import metrics
+
+
+def samples(text):
+    """{(name, labels): value} for every sample line of an exposition."""
+    found = {}
+    for line in text.splitlines():
+        if line.startswith('#'):
+            continue
+        m = re.fullmatch(r'(\w+)(?:\{(.*)\})? (\S+)', line)
+        assert m, line
+        labels = tuple(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', m.group(2) or ''))
+        found[(m.group(1), labels)] = float(m.group(3))
+    return found
+
+
+def test_histogram_buckets_are_cumulative():
+    m = metrics.Metrics(latency_buckets=(0.1, 1.0), statement_buckets=(1, 5))
+    for _ in range(3):
+        m.start_request()
+        m.end_request('index', 'GET', 200)
+    m.start_request()
+    m.end_request(None, 'GET', 404)
+    # Nothing pending: ignored
+    m.end_request('index', 'GET', 500)
+
+    values = samples(m.render())
+    ep = (('endpoint', 'index'),)
+    assert values[('geoattendance_request_duration_seconds_bucket', ep + (('le', '0.1'),))] == 3
+    assert values[('geoattendance_request_duration_seconds_bucket', ep + (('le', '+Inf'),))] == 3
+    assert values[('geoattendance_request_duration_seconds_count', ep)] == 3
+    assert values[('geoattendance_request_db_statements_bucket', ep + (('le', '1.0'),))] == 3
+    assert values[('geoattendance_requests_total', ep + (('method', 'GET'), ('status', '200')))] == 3
+    assert values[('geoattendance_requests_total', (('endpoint', '(unmatched)'), ('method', 'GET'), ('status', '404')))] == 1
+    assert ('geoattendance_requests_total', ep + (('method', 'GET'), ('status', '500'))) not in values
+
+
+def test_label_values_are_escaped():
+    assert metrics._labels((('endpoint', 'a"b\\c\nd'),)) == '{endpoint="a\\"b\\\\c\\nd"}'
+
+
+def test_metrics_endpoint(app, client, student_token):
+    before = samples(client.get('/metrics').data.decode())
+    key = ('geoattendance_requests_total', (('endpoint', 'student_history'), ('method', 'GET'), ('status', '200')))
+    for _ in range(3):
+        assert client.get('/student/history', headers={"Authorization": f"Bearer {student_token}"}).status_code == 200
+    client.get('/no/such/page')
+
+    r = client.get('/metrics')
+    assert r.status_code == 200 and r.content_type.startswith('text/plain; version=0.0.4')
+    text = r.data.decode()
+    assert '# TYPE geoattendance_request_duration_seconds histogram' in text
+    values = samples(text)
+    assert values[key] - before.get(key, 0) == 3
+    assert values[('geoattendance_requests_total', (('endpoint', '(unmatched)'), ('method', 'GET'), ('status', '404')))] >= 1
+
+    history = (('endpoint', 'student_history'),)
+    statements = values[('geoattendance_request_db_statements_sum', history)]
+    assert statements >= 3 and values[('geoattendance_request_db_seconds_sum', history)] > 0
+    assert values[('geoattendance_db_statements_total', ())] >= statements
+
+    # The repeat requests found the student's token already verified
+    token = (('cache', 'token'),)
+    assert values[('geoattendance_cache_hits_total', token)] >= 2
+    assert 0 < values[('geoattendance_cache_hit_ratio', token)] <= 1
+    assert ('geoattendance_cache_misses_total', (('cache', 'location'),)) in values
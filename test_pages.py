@@ -0,0 +1,64 @@
+import gzip
+import os
+
+import jinja2
+from flask import template_rendered
+
+from page_cache import PageCache
+
+STATIC_PAGES = ['/', '/student/register', '/faculty', '/timetable', '/subject-attendance',
+                '/faculty/students_view', '/faculty/attendance_view']
+
+
+def test_pages_render_once(app, client):
+    app.pages.clear()
+    rendered = []
+
+    def record(sender, template, context, **extra):
+        rendered.append(template.name)
+
+    template_rendered.connect(record, app)
+    try:
+        for _ in range(3):
+            for url in STATIC_PAGES:
+                r = client.get(url)
+                assert r.status_code == 200 and r.mimetype == 'text/html'
+    finally:
+        template_rendered.disconnect(record, app)
+    assert len(rendered) == len(STATIC_PAGES) == len(app.pages)
+
+
+def test_gzip_and_conditional_get(app, client):
+    plain = client.get('/timetable')
+    assert 'Content-Encoding' not in plain.headers and b'<html' in plain.data.lower()
+    assert 'no-cache' in plain.headers['Cache-Control'] and 'Accept-Encoding' in plain.headers['Vary']
+
+    packed = client.get('/timetable', headers={"Accept-Encoding": "gzip"})
+    assert packed.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(packed.data) == plain.data
+    assert packed.headers['ETag'] != plain.headers['ETag']
+
+    for r, extra in ((plain, {}), (packed, {"Accept-Encoding": "gzip"})):
+        again = client.get('/timetable', headers=dict(extra, **{"If-None-Match": r.headers['ETag']}))
+        assert again.status_code == 304 and not again.data
+
+
+def test_template_changes_reload_when_auto_reload_is_on(tmp_path):
+    page = tmp_path / 'page.html'
+    page.write_text('<p>one</p>')
+    env = jinja2.Environment(loader=jinja2.FileSystemLoader(str(tmp_path)), auto_reload=True)
+    pages = PageCache(env, lambda template: template.render())
+
+    first = pages.get('page.html')
+    assert first.body == b'<p>one</p>' and pages.get('page.html') is first
+
+    page.write_text('<p>two</p>')
+    os.utime(page, (page.stat().st_mtime + 5,) * 2)
+    second = pages.get('page.html')
+    assert second.body == b'<p>two</p>' and second.etag != first.etag
+
+    # Without auto-reload the first rendering is kept
+    env.auto_reload = False
+    page.write_text('<p>three</p>')
+    os.utime(page, (page.stat().st_mtime + 5,) * 2)
+    assert pages.get('page.html') is second
@@ -0,0 +1,83 @@
+import io
+import os
+
+import pytest
+
+import photo_store
+from app import db
+
+PNG = b'\x89PNG\r\n\x1a\n' + os.urandom(2048)
+
+
+@pytest.fixture
+def employee_id(app, client, student_token):
+    with app.app_context():
+        return app.Employee.query.filter_by(name="student1").one().id
+
+
+def upload(client, employee_id, data, filename='me.png'):
+    return client.post(f'/upload_photo/{employee_id}', data={"file": (io.BytesIO(data), filename)},
+                       content_type='multipart/form-data')
+
+
+def test_upload_is_content_addressed_and_deduplicated(app, client, employee_id):
+    r = upload(client, employee_id, PNG)
+    assert r.status_code == 201
+    key = r.get_json()["path"]
+    assert photo_store.PhotoStore.is_key(key) and key.endswith('.png')
+    path, mimetype = app.photo_store.lookup(key)
+    assert mimetype == 'image/png' and open(path, 'rb').read() == PNG
+
+    # The same bytes under another name (or as a raw body) map to the same file
+    assert upload(client, employee_id, PNG, 'copy.png').get_json()["path"] == key
+    r = client.post(f'/upload_photo/{employee_id}', data=PNG, content_type='image/png')
+    assert r.get_json()["path"] == key
+    assert [f for f in os.listdir(os.path.dirname(path)) if f.startswith(key[:64])] == [os.path.basename(path)]
+
+
+def test_upload_limits(app, client, employee_id, monkeypatch):
+    assert upload(client, employee_id, b'not an image at all').status_code == 400
+    monkeypatch.setattr(app.photo_store, 'max_bytes', 1024)
+    assert upload(client, employee_id, PNG).status_code == 413
+    # Nothing half-written is left behind
+    assert not [f for f in os.listdir(app.photo_store.root) if f.endswith('.upload')]
+
+
+def test_conditional_get(app, client, employee_id):
+    key = upload(client, employee_id, PNG).get_json()["path"]
+    first = client.get(f'/get_photo/{employee_id}')
+    assert first.status_code == 200 and first.data == PNG and first.mimetype == 'image/png'
+    assert first.headers['ETag'] == f'"{key[:64]}"' and 'Last-Modified' in first.headers
+    assert 'no-cache' in first.headers['Cache-Control']
+
+    r = client.get(f'/get_photo/{employee_id}', headers={"If-None-Match": first.headers['ETag']})
+    assert r.status_code == 304 and not r.data
+    r = client.get(f'/get_photo/{employee_id}', headers={"If-Modified-Since": first.headers['Last-Modified']})
+    assert r.status_code == 304
+
+    # A thumbnail size has its own ETag; without Pillow it is the original
+    r = client.get(f'/get_photo/{employee_id}?size=64')
+    assert r.status_code == 200 and r.headers['ETag'] == f'"{key[:64]}-64"'
+    assert client.get(f'/get_photo/{employee_id}?size=65').status_code == 400
+
+
+def test_legacy_photo_paths_still_served(app, client, employee_id, tmp_path):
+    legacy = tmp_path / f"emp_{employee_id}_me.png"
+    legacy.write_bytes(PNG)
+    with app.app_context():
+        db.session.get(app.Employee, employee_id).photo_path = str(legacy)
+        db.session.commit()
+    r = client.get(f'/get_photo/{employee_id}')
+    assert r.status_code == 200 and r.data == PNG
+    assert client.get('/get_photo/999999').status_code == 404
+
+
+@pytest.mark.skipif(photo_store.Image is None, reason="Pillow is not installed")
+def test_thumbnails(app, client, employee_id):
+    buf = io.BytesIO()
+    photo_store.Image.new('RGB', (800, 600), 'red').save(buf, 'JPEG')
+    key = upload(client, employee_id, buf.getvalue(), 'me.jpg').get_json()["path"]
+    for size in app.photo_store.sizes:
+        path, mimetype = app.photo_store.lookup(key, size)
+        with photo_store.Image.open(path) as im:
+            assert max(im.size) == size and mimetype == 'image/jpeg'
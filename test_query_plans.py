@@ -0,0 +1,105 @@
+import base64
+import json
+import re
+from datetime import date, datetime
+
+import pytest
+
+from app import db
+
+# A plan step that reads all of attendance_logs (or all of one of its indexes)
+FULL_SCAN = re.compile(r'\bSCAN (TABLE )?attendance_logs\b')
+
+
+@pytest.fixture
+def capture_selects(app):
+    """Record every SELECT on attendance_logs together with its parameters."""
+    captured = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and 'attendance_logs' in statement:
+            captured.append((statement, parameters))
+
+    with app.app_context():
+        engine = db.engine
+    db.event.listen(engine, 'before_cursor_execute', record)
+    yield captured
+    db.event.remove(engine, 'before_cursor_execute', record)
+
+
+def query_plan(app, statement, parameters):
+    with app.app_context():
+        cursor = db.session.connection().connection.cursor()
+        cursor.execute('EXPLAIN QUERY PLAN ' + statement, parameters)
+        return [row[3] for row in cursor.fetchall()]
+
+
+def assert_no_full_scans(app, captured):
+    assert captured, "no attendance_logs queries were captured"
+    for statement, parameters in captured:
+        plan = query_plan(app, statement, parameters)
+        scans = [step for step in plan if FULL_SCAN.search(step)]
+        assert not scans, f"full scan of attendance_logs:\n{statement}\n{plan}"
+
+
+@pytest.fixture
+def seeded(app, student_token, seed_dbms):
+    with app.app_context():
+        db.session.add(app.Location(name="Campus", latitude=12.9338, longitude=77.6929, radius=500))
+        dbms, _ = seed_dbms()
+        student = app.Employee.query.filter_by(name="student1").one()
+        db.session.add(app.Enrollment(subject_id=dbms.id, student_id=student.id))
+        db.session.add(app.AttendanceLog(employee_id=student.id, date=date(2025, 1, 3), subject="dbms",
+                                         subject_id=dbms.id, check_in_time=datetime(2025, 1, 3, 9, 0)))
+        db.session.commit()
+    return {"Authorization": f"Bearer {student_token}"}
+
+
+def test_student_loginout_uses_indexes(app, client, seeded, capture_selects):
+    body = {"latitude": 12.9338, "longitude": 77.6929}
+    assert client.post('/student/loginout', headers=seeded,
+                       json=dict(body, action="checkin", timestamp="2025-01-06T04:30:00Z")).status_code == 200
+    assert client.post('/student/loginout', headers=seeded,
+                       json=dict(body, action="checkout", timestamp="2025-01-06T11:30:00Z")).status_code == 200
+    assert_no_full_scans(app, capture_selects)
+
+
+def test_student_status_uses_indexes(app, client, seeded, capture_selects):
+    assert client.get('/student/status', headers=seeded).status_code == 200
+    assert_no_full_scans(app, capture_selects)
+
+
+def test_student_bootstrap_uses_indexes(app, client, seeded, capture_selects):
+    assert client.get('/student/bootstrap?lat=12.9338&lng=77.6929', headers=seeded).status_code == 200
+    assert_no_full_scans(app, capture_selects)
+
+
+def test_student_history_uses_indexes(app, client, seeded, capture_selects):
+    assert client.get('/student/history', headers=seeded).status_code == 200
+    assert client.get('/student/history?startDate=2025-01-01&endDate=2025-01-31', headers=seeded).status_code == 200
+    # Keyset page after a (date, check_in_time, id) cursor
+    cursor = base64.urlsafe_b64encode(json.dumps(["2025-01-04", "2025-01-04T09:00:00", 100]).encode()).decode()
+    assert client.get(f'/student/history?limit=1&cursor={cursor}', headers=seeded).status_code == 200
+    # Delta sync on (employee_id, change_seq)
+    assert client.get('/student/history?since=1', headers=seeded).status_code == 200
+    assert_no_full_scans(app, capture_selects)
+
+
+def test_subject_attendance_uses_indexes(app, client, seeded, capture_selects):
+    client.post('/student/subject_attendance', headers=seeded, json={"subject": "DBMS", "date": "2025-01-06"})
+    assert_no_full_scans(app, capture_selects)
+
+
+def test_faculty_attendance_uses_indexes(app, client, seeded, capture_selects, faculty_login):
+    r = client.get('/faculty/attendance?date=2025-01-03', headers=faculty_login())
+    assert r.status_code == 200
+    assert_no_full_scans(app, capture_selects)
+
+
+def test_faculty_export_streams_in_index_order(app, client, seeded, capture_selects, faculty_login):
+    r = client.get('/faculty/attendance/export?startDate=2025-01-01&endDate=2025-06-30', headers=faculty_login())
+    assert r.status_code == 200 and r.data
+    assert_no_full_scans(app, capture_selects)
+    # Only each day is sorted ("RIGHT PART OF ORDER BY"), never the whole range up front
+    (export,) = [c for c in capture_selects if 'ORDER BY attendance_logs.date' in c[0]]
+    assert 'USE TEMP B-TREE FOR ORDER BY' not in query_plan(app, *export)
@@ -0,0 +1,20 @@
+from sqlalchemy import create_engine, text
+
+import sqlite_profile
+
+
+def test_is_sqlite_file():
+    assert sqlite_profile.is_sqlite_file('sqlite:////tmp/employees.db')
+    assert not sqlite_profile.is_sqlite_file('sqlite://')
+    assert not sqlite_profile.is_sqlite_file('sqlite:///:memory:')
+    assert not sqlite_profile.is_sqlite_file('postgresql://localhost/attendance')
+
+
+def test_pragmas_applied_on_connect(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'p.db'}", **sqlite_profile.engine_options(busy_timeout_ms=1234))
+    sqlite_profile.install(engine, sqlite_profile.pragmas(busy_timeout_ms=1234, cache_size_kib=2048))
+    with engine.connect() as conn:
+        got = {p: conn.execute(text(f"PRAGMA {p}")).scalar()
+               for p in ('journal_mode', 'synchronous', 'busy_timeout', 'cache_size')}
+    assert got == {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 1234, 'cache_size': -2048}
+    assert engine.pool.size() == 10
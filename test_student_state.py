@@ -0,0 +1,123 @@
+from datetime import date, datetime, timedelta, timezone
+
+from student_state import StudentState, StudentStateCache
+
+DAY = date(2025, 1, 6)
+
+
+def state(log_id, hour, out=None):
+    return StudentState(log_id, datetime(2025, 1, 6, hour), out and datetime(2025, 1, 6, out), "Campus")
+
+
+def test_update_only_replaces_known_older_state():
+    loads = []
+    cache = StudentStateCache(lambda sid, day: loads.append(sid) or state(1, 10))
+    cache.update(7, DAY, state(2, 11))      # nothing cached: dropped, not trusted
+    assert cache.get(7, DAY).log_id == 1 and loads == [7]
+
+    cache.update(7, DAY, state(3, 9))       # an older session changed
+    assert cache.get(7, DAY).log_id == 1
+    cache.update(7, DAY, state(1, 10, 16))  # the cached session checked out
+    assert cache.get(7, DAY).check_out_time.hour == 16
+    cache.update(7, DAY, state(4, 17))      # a newer session
+    assert cache.get(7, DAY).log_id == 4
+    assert loads == [7]
+
+    # A new day reloads
+    cache.get(7, DAY + timedelta(days=1))
+    assert loads == [7, 7]
+
+
+def test_write_during_load_is_not_overwritten():
+    cache = StudentStateCache(lambda sid, day: cache.invalidate([sid]) or None)
+    assert cache.get(1, DAY) is None
+    assert len(cache) == 0
+
+
+def test_expiry():
+    now = [0.0]
+    loads = []
+    cache = StudentStateCache(lambda sid, day: loads.append(sid), max_age=30, clock=lambda: now[0])
+    cache.get(1, DAY)
+    now[0] = 29
+    cache.get(1, DAY)
+    now[0] = 31
+    cache.get(1, DAY)
+    assert loads == [1, 1]
+
+
+def test_app_cache_expires_by_default(app):
+    # Other workers' check-ins must show up within seconds
+    assert app.student_states.max_age == 5
+
+
+def test_status_polls_are_served_from_memory(app, client, student_token, count_queries, campus, loginout_event):
+    headers = {"Authorization": f"Bearer {student_token}"}
+    today = datetime.now(timezone(timedelta(hours=5, minutes=30))).date().isoformat()
+
+    with count_queries() as statements:
+        first = client.get('/student/status', headers=headers).get_json()
+        client.get('/student/status', headers=headers)
+    assert len(statements) == 1
+    assert not first["checkedIn"] and not first["isCurrentlyCheckedIn"]
+
+    r = client.post('/student/loginout', headers=headers, json=loginout_event("checkin", f"{today}T09:30:00+05:30"))
+    assert r.status_code == 200
+    with count_queries() as statements:
+        status = client.get('/student/status', headers=headers).get_json()
+    assert statements == []
+    assert status["isCurrentlyCheckedIn"] and status["checkInTime"] == f"{today}T09:30:00"
+    assert status["location"] == "Campus"
+
+    # Subject marks do not change the session state
+    r = client.post('/student/subject_attendance', headers=headers, json={"subject": "DBMS", "date": today})
+    assert r.status_code == 201
+    client.post('/student/loginout', headers=headers, json=loginout_event("checkout", f"{today}T16:30:00+05:30"))
+    with count_queries() as statements:
+        status = client.get('/student/status', headers=headers).get_json()
+    assert statements == []
+    assert status["checkedOut"] and not status["isCurrentlyCheckedIn"]
+    assert status["checkOutTime"] == f"{today}T16:30:00"
+
+    # Matches what a fresh load from the database says
+    app.student_states.clear()
+    assert client.get('/student/status', headers=headers).get_json() == status
+
+
+def test_checkout_closes_the_campus_session_not_a_subject_mark(app, client, student_token, campus, loginout_event):
+    headers = {"Authorization": f"Bearer {student_token}"}
+    today = datetime.now(timezone(timedelta(hours=5, minutes=30))).date().isoformat()
+    client.post('/student/loginout', headers=headers, json=loginout_event("checkin", f"{today}T09:30:00+05:30"))
+    assert client.post('/student/subject_attendance', headers=headers,
+                       json={"subject": "DBMS", "date": today}).status_code == 201
+    r = client.post('/student/loginout', headers=headers, json=loginout_event("checkout", f"{today}T16:30:00+05:30"))
+    assert r.status_code == 200 and r.get_json()["duration"] == "7h 0m"
+
+    with app.app_context():
+        session, = app.AttendanceLog.query.filter(app.AttendanceLog.latitude.isnot(None)).all()
+        mark, = app.AttendanceLog.query.filter(app.AttendanceLog.latitude.is_(None)).all()
+        assert session.check_out_time is not None
+        assert mark.subject_id is not None and mark.check_out_time is None
+
+
+def test_subject_attendance_checks_the_database(app, client, student_token, campus, loginout_event):
+    from app import db
+    headers = {"Authorization": f"Bearer {student_token}"}
+    today = datetime.now(timezone(timedelta(hours=5, minutes=30))).date().isoformat()
+    client.post('/student/loginout', headers=headers, json=loginout_event("checkin", f"{today}T09:30:00+05:30"))
+    assert client.get('/student/status', headers=headers).get_json()["isCurrentlyCheckedIn"]
+
+    # Checked out through another worker: this process's cache never hears of it
+    with app.app_context(), db.engine.begin() as conn:
+        conn.execute(db.text("UPDATE attendance_logs SET check_out_time = check_in_time"))
+    assert client.get('/student/status', headers=headers).get_json()["isCurrentlyCheckedIn"]
+    r = client.post('/student/subject_attendance', headers=headers, json={"subject": "DBMS", "date": today})
+    assert r.status_code == 400 and r.get_json()["error"] == "You must be checked in to mark attendance"
+
+    # ...and back in there: the cache still says checked out
+    app.student_states.clear()
+    assert not client.get('/student/status', headers=headers).get_json()["isCurrentlyCheckedIn"]
+    with app.app_context(), db.engine.begin() as conn:
+        conn.execute(db.text("UPDATE attendance_logs SET check_out_time = NULL"))
+    r = client.post('/student/subject_attendance', headers=headers, json={"subject": "DBMS", "date": today})
+    assert r.status_code == 201
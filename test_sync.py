@@ -0,0 +1,65 @@
+from app import db
+
+
+def sync(client, token, events):
+    r = client.post('/student/sync', json={"events": events}, headers={"Authorization": f"Bearer {token}"})
+    return r.get_json()["results"]
+
+
+def test_sync_applies_in_timestamp_order_and_once(app, client, student_token, count_queries, campus, loginout_event):
+    events = [
+        loginout_event("checkout", event_id="b"),
+        loginout_event("checkin", event_id="a"),
+        loginout_event("checkin", event_id="a"),
+        loginout_event("checkin"),
+    ]
+    results = sync(client, student_token, events)
+    assert [r["status"] for r in results] == [200, 200, 200, 400]
+    assert results[0]["message"] == "Checked out successfully"
+    assert results[2]["duplicate"] and results[2]["checkInTime"] == results[1]["checkInTime"]
+    assert results[3]["error"] == "event_id required"
+
+    # Retries are answered from memory without touching the database
+    with count_queries() as statements:
+        again = sync(client, student_token, events[:2])
+    assert statements == []
+    assert all(r["duplicate"] for r in again)
+    assert again[1]["checkInTime"] == results[1]["checkInTime"]
+
+    # ...and from sync_events once the in-memory set has forgotten them
+    app.recent_events.clear()
+    again = sync(client, student_token, events[:2])
+    assert [r["status"] for r in again] == [200, 200] and all(r["duplicate"] for r in again)
+
+    with app.app_context():
+        assert app.AttendanceLog.query.count() == 1
+        assert app.SyncEvent.query.count() == 2
+
+
+def test_invalid_event_ids(client, student_token, campus, loginout_event):
+    events = [loginout_event("checkin", event_id=5), loginout_event("checkin", event_id="x" * 65),
+              loginout_event("checkin", event_id="")]
+    assert [r["error"] for r in sync(client, student_token, events)] == [
+        "event_id must be a string", "event_id too long (at most 64 characters)", "event_id required"]
+    r = client.post('/student/loginout', json=events[0], headers={"Authorization": f"Bearer {student_token}"})
+    assert r.status_code == 400 and r.get_json()["error"] == "event_id must be a string"
+
+
+def test_rejections_are_replayed_too(app, client, student_token, campus, loginout_event):
+    outside = loginout_event("checkin", lat=13.5, event_id="far")
+    first = sync(client, student_token, [outside])[0]
+    assert first["status"] == 400 and first["error"] == "outside allowed radius"
+    r = client.post('/student/loginout', json=outside, headers={"Authorization": f"Bearer {student_token}"})
+    assert r.status_code == 400 and r.get_json()["duplicate"]
+
+
+def test_loginout_with_event_id_is_idempotent(app, client, student_token, campus, loginout_event):
+    headers = {"Authorization": f"Bearer {student_token}"}
+    body = loginout_event("checkin", event_id="tap-1")
+    first = client.post('/student/loginout', json=body, headers=headers)
+    retry = client.post('/student/loginout', json=body, headers=headers)
+    assert first.status_code == retry.status_code == 200
+    assert retry.get_json()["checkInTime"] == first.get_json()["checkInTime"]
+    with app.app_context():
+        assert app.AttendanceLog.query.count() == 1
+        assert db.session.query(app.SyncEvent.event_id).scalar() == "tap-1"
@@ -0,0 +1,80 @@
+import time
+
+import pytest
+from itsdangerous import SignatureExpired, TimestampSigner, URLSafeTimedSerializer
+
+from token_cache import VerifiedTokenCache
+
+MAX_AGE = 86400
+
+
+def signed_ago(seconds, secret='s3cret', salt='student-auth'):
+    class PastSigner(TimestampSigner):
+        def get_timestamp(self):
+            return int(time.time()) - seconds
+    return URLSafeTimedSerializer(secret, salt=salt, signer=PastSigner).dumps({"employee_id": 1})
+
+
+def test_hits_after_first_verification():
+    serializer = URLSafeTimedSerializer('s3cret', salt='student-auth')
+    cache = VerifiedTokenCache()
+    token = serializer.dumps({"employee_id": 7})
+    assert cache.loads(serializer, token, MAX_AGE) == {"employee_id": 7}
+    assert cache.loads(serializer, token, MAX_AGE) == {"employee_id": 7}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entry_expires_with_token():
+    serializer = URLSafeTimedSerializer('s3cret', salt='student-auth')
+    now = [time.time()]
+    cache = VerifiedTokenCache(clock=lambda: now[0])
+    token = signed_ago(MAX_AGE - 100)
+    cache.loads(serializer, token, MAX_AGE)
+    cache.loads(serializer, token, MAX_AGE)
+    assert cache.hits == 1
+    # Past the token's deadline the cached entry is never served
+    now[0] += 200
+    cache.loads(serializer, token, MAX_AGE)
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_expired_token_rejected_and_not_cached():
+    serializer = URLSafeTimedSerializer('s3cret', salt='student-auth')
+    cache = VerifiedTokenCache()
+    with pytest.raises(SignatureExpired):
+        cache.loads(serializer, signed_ago(MAX_AGE + 100), MAX_AGE)
+    assert len(cache) == 0
+
+
+def test_lru_bound():
+    serializer = URLSafeTimedSerializer('s3cret', salt='student-auth')
+    cache = VerifiedTokenCache(maxsize=2)
+    tokens = [serializer.dumps({"employee_id": i}) for i in range(3)]
+    for t in tokens:
+        cache.loads(serializer, t, MAX_AGE)
+    assert len(cache) == 2
+    cache.loads(serializer, tokens[0], MAX_AGE)
+    assert cache.misses == 4
+
+
+def test_salt_separates_student_and_faculty_tokens():
+    student = URLSafeTimedSerializer('s3cret', salt='student-auth')
+    faculty = URLSafeTimedSerializer('s3cret', salt='faculty-auth')
+    cache = VerifiedTokenCache()
+    token = student.dumps({"employee_id": 1})
+    cache.loads(student, token, MAX_AGE)
+    with pytest.raises(Exception):
+        cache.loads(faculty, token, MAX_AGE)
+
+
+def test_secret_rotation_invalidates_cached_tokens(app, client, student_token):
+    headers = {"Authorization": f"Bearer {student_token}"}
+    assert client.get('/student/status', headers=headers).status_code == 200
+    assert client.get('/student/status', headers=headers).status_code == 200
+    assert app.token_cache.hits >= 1
+    old_secret = app.config['SECRET_KEY']
+    try:
+        app.config['SECRET_KEY'] = 'rotated-secret'
+        assert client.get('/student/status', headers=headers).status_code == 401
+    finally:
+        app.config['SECRET_KEY'] = old_secret
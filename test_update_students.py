@@ -0,0 +1,66 @@
+import io
+from functools import partial
+
+from werkzeug.security import check_password_hash
+
+from app import db
+from update_students import hash_password, import_students, read_rows
+
+# Cheap hashes keep the test fast; the script uses PASSWORD_HASH_METHOD
+hasher = partial(hash_password, method='pbkdf2:sha256:1000')
+
+
+def hash_all(passwords):
+    return map(hasher, passwords)
+
+
+CSV = """name,email,phone,password
+student1,new1@example.com,999,
+alice,alice@example.com,111,alice-pw
+bob,bob@example.com,222,bob-pw
+faculty1,f@example.com,333,x
+carol,alice@example.com,444,carol-pw
+dave,dave@example.com,555,
+alice,alice@example.com,666,alice-pw2
+"""
+
+
+def test_import_creates_updates_and_skips(app, client, student_token, count_queries):
+    with app.app_context():
+        db.session.add(app.Employee(name="faculty1", email="faculty1@example.com", password_hash="x", role="faculty"))
+        db.session.commit()
+        old_hash = app.Employee.query.filter_by(name="student1").one().password_hash
+
+        progress = []
+        with count_queries() as statements:
+            stats = import_students(app.Employee, read_rows(io.StringIO(CSV)), hash_all, chunk_size=2,
+                                    progress=lambda s: progress.append(s.rows))
+
+        assert (stats.rows, stats.created, stats.updated) == (7, 2, 2)
+        assert [name for name, _ in stats.skipped] == ["faculty1", "carol", "dave"]
+        assert progress == [2, 4, 6, 7]
+        # Existing accounts are read once; everything else is bulk writes
+        assert len([s for s in statements if s.lstrip().upper().startswith('SELECT')]) == 1
+
+        students = {e.name: e for e in app.Employee.query.filter_by(role='student')}
+        assert set(students) == {"student1", "alice", "bob"}
+        # A blank password keeps the current one
+        assert students["student1"].email == "new1@example.com" and students["student1"].password_hash == old_hash
+        # The later row for alice wins
+        assert students["alice"].phone == "666" and check_password_hash(students["alice"].password_hash, "alice-pw2")
+        assert students["bob"].position == 'student'
+
+
+def test_changed_and_differently_cased_emails(app, client, student_token):
+    csv_text = """name,email,phone,password
+student1,New1@Example.com,999,
+erin,student1@example.com,111,erin-pw
+frank,NEW1@example.com,222,frank-pw
+"""
+    with app.app_context():
+        stats = import_students(app.Employee, read_rows(io.StringIO(csv_text)), hash_all)
+        # student1's old email is free once the first row changes it; the new one is taken in any case
+        assert (stats.created, stats.updated) == (1, 1)
+        assert stats.skipped == [("frank", "email new1@example.com is used by student1")]
+        emails = {e.name: e.email for e in app.Employee.query.filter_by(role='student')}
+        assert emails == {"student1": "new1@example.com", "erin": "student1@example.com"}
@@ -0,0 +1,258 @@
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from write_behind import WriteBehindQueue
+
+
+def segments(directory):
+    return sorted(name for name in os.listdir(directory) if not name.endswith('.lock'))
+
+
+def test_reserve_submit_and_flush(tmp_path):
+    written = []
+    queue = WriteBehindQueue(written.extend, journal_path=str(tmp_path / "j"), fsync=False)
+    assert queue.reserve("a")
+    assert not queue.reserve("a")
+    queue.submit("a", {"n": 1})
+    assert queue.is_pending("a") and len(segments(tmp_path)) == 1
+    assert queue.flush() == 1
+    assert written == [{"n": 1}] and not queue.is_pending("a")
+    assert segments(tmp_path) == []
+
+    assert queue.reserve("b")
+    queue.release("b")
+    assert queue.reserve("b")
+
+
+def test_failed_flush_keeps_entries_and_journal(tmp_path):
+    calls = []
+
+    def apply(entries):
+        calls.append(list(entries))
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+
+    queue = WriteBehindQueue(apply, journal_path=str(tmp_path / "j"), fsync=False)
+    queue.reserve(1)
+    queue.submit(1, {"n": 1})
+    with pytest.raises(RuntimeError):
+        queue.flush()
+    assert queue.is_pending(1) and queue.failures == 1
+    queue.reserve(2)
+    queue.submit(2, {"n": 2})
+    assert queue.flush() == 2
+    assert calls[1] == [{"n": 1}, {"n": 2}]
+    assert segments(tmp_path) == []
+
+
+def test_recover_after_crash(tmp_path):
+    journal = str(tmp_path / "j")
+    crashed = WriteBehindQueue(lambda entries: None, journal_path=journal, fsync=False)
+    for n in range(3):
+        crashed.reserve(n)
+        crashed.submit(n, {"n": n})
+    with open(crashed._segment_path(0), "a") as f:
+        f.write('{"n": 3')  # torn write
+    # The process dies: its owner lock goes with it
+    crashed._journal.close()
+    crashed._owner_lock.close()
+
+    queue = WriteBehindQueue(lambda entries: None, journal_path=journal, fsync=False)
+    assert queue.recover() == [{"n": 0}, {"n": 1}, {"n": 2}]
+    queue.discard_recovered()
+    assert segments(tmp_path) == [] and sorted(os.listdir(tmp_path)) == sorted([f"j.{queue.owner}.lock", "j.lock"])
+    queue.reserve(9)
+    queue.submit(9, {"n": 9})
+    assert segments(tmp_path) == [f"j.{queue.owner}.00000000"]
+
+
+def test_recovery_leaves_live_workers_alone(tmp_path):
+    journal = str(tmp_path / "j")
+    written = []
+    live = WriteBehindQueue(written.extend, journal_path=journal, fsync=False)
+    live.reserve(1)
+    live.submit(1, {"n": 1})
+
+    starting = WriteBehindQueue(lambda entries: None, journal_path=journal, fsync=False)
+    assert starting.recover() == []
+    starting.discard_recovered()
+    assert segments(tmp_path) == [f"j.{live.owner}.00000000"]
+    assert live.flush() == 1 and written == [{"n": 1}]
+
+    # Only one process recovers at a time
+    assert starting.recover() == []
+    assert WriteBehindQueue(None, journal_path=journal).recover() == []
+    starting.discard_recovered()
+
+
+def test_flush_tolerates_a_removed_segment(tmp_path):
+    queue = WriteBehindQueue(lambda entries: None, journal_path=str(tmp_path / "j"), fsync=False)
+    queue.reserve(1)
+    queue.submit(1, {"n": 1})
+    os.remove(queue._segment_path(0))
+    assert queue.flush() == 1 and not queue.is_pending(1)
+
+
+def test_recovers_unowned_segments(tmp_path):
+    # Written before segments were named per process
+    (tmp_path / "j.00000003").write_text('{"n": 1}\n')
+    queue = WriteBehindQueue(lambda entries: None, journal_path=str(tmp_path / "j"), fsync=False)
+    assert queue.recover() == [{"n": 1}]
+    queue.discard_recovered()
+    assert segments(tmp_path) == []
+
+
+def test_background_flusher_group_commits():
+    batches = []
+    queue = WriteBehindQueue(batches.append, interval=10, max_rows=3)
+    queue.start()
+    for n in range(3):
+        queue.reserve(n)
+        queue.submit(n, n)
+    queue.stop()
+    assert batches == [[0, 1, 2]]
+
+
+@pytest.fixture
+def write_behind_mode(app, tmp_path):
+    app.config['WRITE_BEHIND'] = True
+    app.write_behind.journal_path = str(tmp_path / "checkins.journal")
+    yield app.write_behind
+    app.config['WRITE_BEHIND'] = False
+    app.write_behind.flush()
+
+
+def test_buffered_checkin(app, client, student_token, write_behind_mode, tmp_path, campus, loginout_event):
+    headers = {"Authorization": f"Bearer {student_token}"}
+    first = client.post('/student/loginout', json=loginout_event("checkin", subject="DBMS"), headers=headers)
+    assert first.status_code == 200 and first.get_json()["location"] == "Campus"
+    with app.app_context():
+        assert app.AttendanceLog.query.count() == 0
+
+    # The pending check-in blocks a second one before it is written
+    again = client.post('/student/loginout', json=loginout_event("checkin"), headers=headers)
+    assert again.status_code == 400 and again.get_json()["error"] == "Already checked in today"
+
+    # Replaying the journal after the flush must not write the row twice
+    with open(write_behind_mode._journal.name) as f:
+        journaled = f.read()
+    assert write_behind_mode.flush() == 1
+    # As if left behind by a worker that crashed before deleting it
+    with open(str(tmp_path / "checkins.journal.00000000"), "w") as f:
+        f.write(journaled)
+    replay = WriteBehindQueue(app.write_behind._apply, journal_path=app.write_behind.journal_path)
+    replay._apply(replay.recover())
+    replay.discard_recovered()
+
+    with app.app_context():
+        logs = app.AttendanceLog.query.all()
+        assert len(logs) == 1 and logs[0].subject == "DBMS" and logs[0].subject_id is not None
+
+    # A check-out right after a buffered check-in still finds the session
+    client.post('/student/loginout', json=loginout_event("checkin"), headers=headers)
+    out = client.post('/student/loginout', json=loginout_event("checkout"), headers=headers)
+    assert out.status_code == 200
+
+
+def test_status_sees_pending_checkin(app, client, student_token, write_behind_mode):
+    headers = {"Authorization": f"Bearer {student_token}"}
+    with app.app_context():
+        student_id = app.Employee.query.filter_by(name="student1").one().id
+    now = datetime.now(timezone(timedelta(hours=5, minutes=30)))
+    key = (student_id, now.date())
+    write_behind_mode.reserve(key)
+    write_behind_mode.submit(key, {
+        "employee_id": student_id, "event_id": "wb-test", "date": now.date().isoformat(),
+        "check_in_time": now.isoformat(), "latitude": 12.9, "longitude": 77.6,
+        "location_name": "Campus", "subject": None, "result": {},
+    })
+    status = client.get('/student/status', headers=headers).get_json()
+    assert status["checkedIn"] and status["location"] == "Campus"
+    assert len(write_behind_mode) == 0
+
+
+def test_failed_flush_does_not_fail_reads(app, client, student_token, write_behind_mode, campus, loginout_event,
+                                          monkeypatch):
+    headers = {"Authorization": f"Bearer {student_token}"}
+    today = datetime.now(timezone(timedelta(hours=5, minutes=30))).date().isoformat()
+    assert client.post('/student/loginout', headers=headers,
+                       json=loginout_event("checkin", f"{today}T09:30:00+05:30")).status_code == 200
+
+    def locked(entries):
+        raise OperationalError("INSERT", {}, Exception("database is locked"))
+    monkeypatch.setattr(write_behind_mode, '_apply', locked)
+
+    # Answered from the queued check-in
+    status = client.get('/student/status', headers=headers).get_json()
+    assert status["isCurrentlyCheckedIn"] and status["checkInTime"] == f"{today}T09:30:00"
+    # A check-out needs the row, so it is refused for now rather than failing
+    out = client.post('/student/loginout', headers=headers, json=loginout_event("checkout", f"{today}T16:30:00+05:30"))
+    assert out.status_code == 503 and out.headers["Retry-After"] == "1"
+    synced = client.post('/student/sync', headers=headers, json={"events": [
+        dict(loginout_event("checkout", f"{today}T16:30:00+05:30"), event_id="out-1")]}).get_json()["results"]
+    assert synced[0]["status"] == 503
+    assert len(write_behind_mode) == 1
+
+    monkeypatch.undo()
+    assert write_behind_mode.flush() == 1
+    with app.app_context():
+        # The refused check-out was not recorded as answered
+        assert app.SyncEvent.query.filter_by(event_id="out-1").count() == 0
+    out = client.post('/student/loginout', headers=headers, json=loginout_event("checkout", f"{today}T16:30:00+05:30"))
+    assert out.status_code == 200
+
+
+def test_workers_sharing_a_database_cannot_both_check_in(app, client, student_token):
+    with app.app_context():
+        student_id = app.Employee.query.filter_by(name="student1").one().id
+    day = "2025-01-06"
+    # Reservations are per process, so both workers accept the check-in
+    workers = [WriteBehindQueue(app.write_behind._apply) for _ in range(2)]
+    for n, worker in enumerate(workers):
+        assert worker.reserve((student_id, day))
+        worker.submit((student_id, day), {
+            "employee_id": student_id, "event_id": f"dev-{n}", "date": day,
+            "check_in_time": f"{day}T09:{30 + n}:00+05:30", "latitude": 12.9, "longitude": 77.6,
+            "location_name": "Campus", "subject": None, "result": {"message": "Checked in successfully"},
+        })
+    for worker in workers:
+        assert worker.flush() == 1
+
+    with app.app_context():
+        (log,) = app.AttendanceLog.query.all()
+        assert log.check_in_time == datetime(2025, 1, 6, 9, 30)
+        later = app.SyncEvent.query.filter_by(event_id="dev-1").one()
+        assert later.status == 400 and json.loads(later.result) == {"error": "Already checked in today"}
+    # A retry of the rejected event gets the same answer
+    assert app.recent_events.get((student_id, "dev-1")) == ({"error": "Already checked in today"}, 400)
+
+
+def test_synced_checkin_is_buffered(app, client, student_token, write_behind_mode, campus, loginout_event):
+    headers = {"Authorization": f"Bearer {student_token}"}
+    checkin = dict(loginout_event("checkin"), event_id="dev-1")
+    # The dashboard sends every check-in through /student/sync
+    r = client.post('/student/sync', json={"events": [checkin]}, headers=headers)
+    (result,) = r.get_json()["results"]
+    assert result["status"] == 200 and result["eventId"] == "dev-1"
+    with app.app_context():
+        assert app.AttendanceLog.query.count() == 0
+    assert write_behind_mode.flush() == 1
+
+    # A retry after the flush is answered from sync_events, not written again
+    app.recent_events.clear()
+    (again,) = client.post('/student/sync', json={"events": [checkin]}, headers=headers).get_json()["results"]
+    assert again["duplicate"] and again["checkInTime"] == result["checkInTime"]
+    with app.app_context():
+        assert app.AttendanceLog.query.count() == 1
+        assert app.SyncEvent.query.filter_by(event_id="dev-1").count() == 1
+
+    # A rejected check-in is recorded like any other synced event
+    (second,) = client.post('/student/sync', json={"events": [dict(checkin, event_id="dev-2")]},
+                            headers=headers).get_json()["results"]
+    assert second["status"] == 400 and second["error"] == "Already checked in today"
+    with app.app_context():
+        assert app.SyncEvent.query.filter_by(event_id="dev-2").one().status == 400
@@ -0,0 +1,62 @@
+"""Bounded LRU cache of already-verified auth tokens.
+
+Dashboards poll the authenticated endpoints constantly, and every request used
+to redo the HMAC check and JSON decode of the same token. Once a token has
+been verified its payload is kept together with the moment it expires, so
+repeat requests are a dictionary lookup until that deadline.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class VerifiedTokenCache:
+    """LRU of token -> (payload, expiry deadline).
+
+    Entries are keyed by the serializer's salt and secret as well as the
+    token, so student and faculty tokens never mix and entries made under a
+    rotated-out secret never match. Expired entries are dropped when looked
+    up or pushed out by the LRU bound. Cached payloads are shared: treat them
+    as read-only. A ``maxsize`` of 0 disables caching.
+    """
+
+    def __init__(self, maxsize=4096, clock=time.time):
+        self.maxsize = maxsize
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def loads(self, serializer, token, max_age):
+        """Same contract as ``serializer.loads(token, max_age=max_age)``."""
+        key = (serializer.salt, serializer.secret_key, token)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                payload, deadline = entry
+                if now <= deadline:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return payload
+                del self._entries[key]
+            self.misses += 1
+
+        # Raises BadSignature / SignatureExpired exactly like the uncached path
+        payload, signed_at = serializer.loads(token, max_age=max_age, return_timestamp=True)
+        if self.maxsize > 0:
+            deadline = signed_at.timestamp() + max_age
+            with self._lock:
+                self._entries[key] = (payload, deadline)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return payload
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -1,52 +1,199 @@
-import os
+"""Create or update students in bulk from a CSV file.
+
+The CSV needs ``name``, ``email``, ``phone`` and ``password`` columns (a blank
+password keeps an existing student's current one). Students are matched by
+name. Emails are lowercased, as at registration. Rows whose name belongs to
+a non-student account, or whose email is already used by someone else, are
+skipped and reported.
+
+The file is streamed in chunks. Existing accounts are prefetched in a single
+query, passwords are hashed on a process pool (the next chunk hashes while the
+current one is written), and each chunk is written with one bulk INSERT and
+one bulk UPDATE in its own transaction (split where a row takes an email that
+an earlier row of the chunk gave up).
+
+Usage: python update_students.py students.csv [--chunk-size N] [--workers N]
+"""
+import argparse
 import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
 from werkzeug.security import generate_password_hash
+
 from app import create_app, db
-from app import Employee  # Import your models
-
-def update_student_data():
-    app = create_app()
-    with app.app_context():
-        # Clear existing student data (optional, uncomment if you want to start fresh)
-        # Employee.query.filter_by(role='student').delete()
-        
-        # Read CSV and update students
-        csv_path = r"C:\Users\nalla\Downloads\student_details_200.csv"
-        updated_count = 0
-        created_count = 0
-        
-        with open(csv_path, 'r') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                # Check if student exists
-                student = Employee.query.filter_by(
-                    name=row['name'],
-                    role='student'
-                ).first()
-                
-                if student:
-                    # Update existing student
-                    student.email = row['email']
-                    student.phone = row['phone']
-                    student.password_hash = generate_password_hash(row['password'])
-                    updated_count += 1
+
+
+def hash_password(password, method):
+    # Runs in the worker processes; blank means "keep the current hash"
+    return generate_password_hash(password, method=method) if password else None
+
+
+def read_rows(f):
+    for row in csv.DictReader(f):
+        name = (row.get('name') or '').strip()
+        if name:
+            yield {
+                "name": name,
+                # Lowercased like /register_student does
+                "email": (row.get('email') or '').strip().lower() or None,
+                "phone": (row.get('phone') or '').strip() or None,
+                "password": row.get('password') or '',
+            }
+
+
+def chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class ImportStats:
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.skipped = []
+        self.started = time.perf_counter()
+
+    @property
+    def rate(self):
+        return self.rows / max(time.perf_counter() - self.started, 1e-9)
+
+    def __str__(self):
+        return (f"{self.rows} rows: {self.created} created, {self.updated} updated, "
+                f"{len(self.skipped)} skipped ({self.rate:.0f} rows/s)")
+
+
+def import_students(Employee, rows, hash_all, chunk_size=1000, progress=None):
+    """Upsert ``rows`` (dicts from ``read_rows``); returns ImportStats.
+
+    ``hash_all(passwords)`` starts hashing a list of passwords and returns
+    an iterator over the hashes, in order.
+    """
+    table = Employee.__table__
+    stats = ImportStats()
+
+    # Every existing name and email, in one query
+    roles, emails, email_owner = {}, {}, {}
+    for name, email, role in db.session.execute(db.select(table.c.name, table.c.email, table.c.role)):
+        roles[name] = role
+        if email:
+            emails[name] = email.lower()
+            email_owner[email.lower()] = name
+
+    insert = table.insert()
+    update = table.update().where(table.c.name == db.bindparam('match_name'))
+    update_keep_password = update.values(email=db.bindparam('email'), phone=db.bindparam('phone'))
+    update = update.values(email=db.bindparam('email'), phone=db.bindparam('phone'),
+                           password_hash=db.bindparam('password_hash'))
+
+    def write(chunk, hashes):
+        inserts, updates, updates_keep_password = [], [], []
+        # Emails given up by rows not yet written; reusing one must wait for them
+        freed = set()
+
+        def execute():
+            # Inserts first: a name repeated within the chunk then updates its own new row
+            if inserts:
+                db.session.execute(insert, inserts)
+            if updates:
+                db.session.execute(update, updates)
+            if updates_keep_password:
+                db.session.execute(update_keep_password, updates_keep_password)
+            del inserts[:], updates[:], updates_keep_password[:]
+            freed.clear()
+
+        for row, password_hash in zip(chunk, hashes):
+            stats.rows += 1
+            name, email = row["name"], row["email"]
+            role = roles.get(name)
+            if role is not None and role != 'student':
+                stats.skipped.append((name, f"name belongs to a {role} account"))
+                continue
+            if email and email_owner.get(email, name) != name:
+                stats.skipped.append((name, f"email {email} is used by {email_owner[email]}"))
+                continue
+            if role is None and password_hash is None:
+                stats.skipped.append((name, "a new student needs a password"))
+                continue
+            if email in freed:
+                execute()
+            if role is None:
+                inserts.append({"name": name, "email": email, "phone": row["phone"], "password_hash": password_hash,
+                                "role": 'student', "position": 'student'})
+                roles[name] = 'student'
+                stats.created += 1
+            else:
+                values = {"match_name": name, "email": email, "phone": row["phone"]}
+                if password_hash is None:
+                    updates_keep_password.append(values)
                 else:
-                    # Create new student
-                    student = Employee(
-                        name=row['name'],
-                        email=row['email'],
-                        phone=row['phone'],
-                        password_hash=generate_password_hash(row['password']),
-                        role='student',
-                        position='student'
-                    )
-                    db.session.add(student)
-                    created_count += 1
-            
-            # Commit all changes
-            db.session.commit()
-            
-        print(f"Update complete! Created: {created_count}, Updated: {updated_count} students.")
+                    updates.append(dict(values, password_hash=password_hash))
+                stats.updated += 1
+            # The row replaces the student's email, freeing the old one
+            old_email = emails.pop(name, None)
+            if old_email and old_email != email and email_owner.get(old_email) == name:
+                del email_owner[old_email]
+                freed.add(old_email)
+            if email:
+                emails[name] = email
+                email_owner[email] = name
+        execute()
+        db.session.commit()
+        if progress:
+            progress(stats)
+
+    previous = None
+    for chunk in chunked(rows, chunk_size):
+        current = (chunk, hash_all([row["password"] for row in chunk]))
+        if previous:
+            write(*previous)
+        previous = current
+    if previous:
+        write(*previous)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('csv_path')
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='hashing processes (default: one per CPU; 1 hashes inline)')
+    args = parser.parse_args()
+
+    hasher = partial(hash_password, method=os.getenv('PASSWORD_HASH_METHOD', 'scrypt'))
+    # Start the workers before the app opens database connections
+    pool = ProcessPoolExecutor(max_workers=args.workers) if args.workers > 1 else None
+    chunk_size = max(args.chunk_size, 1)
+
+    def hash_all(passwords):
+        if pool is None:
+            return map(hasher, passwords)
+        return pool.map(hasher, passwords, chunksize=max(1, len(passwords) // (args.workers * 4)))
+
+    app, Employee = create_app()
+    try:
+        with app.app_context(), open(args.csv_path, newline='', encoding='utf-8') as f:
+            stats = import_students(Employee, read_rows(f), hash_all, chunk_size=chunk_size,
+                                    progress=lambda s: print(s, flush=True))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    for name, reason in stats.skipped:
+        print(f"skipped {name}: {reason}", file=sys.stderr)
+    print(f"Import complete! {stats}")
+
 
 if __name__ == "__main__":
-    update_student_data()
+    main()
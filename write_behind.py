@@ -0,0 +1,290 @@
+"""Write-behind buffer that group-commits check-ins.
+
+At the start of the day every check-in used to run its own commit, and on
+SQLite each commit is an fsync under the database-wide write lock. In
+write-behind mode a check-in is validated on the request thread, appended to
+a local journal and queued; a background thread then writes everything
+queued in one transaction every ``interval`` seconds, or sooner once
+``max_rows`` entries are waiting.
+
+Entries are JSON-able dicts. Callers reserve a key (e.g. employee and day)
+before validating, so two requests can never both queue the same check-in,
+and the key stays reserved until its entry has been committed. The journal
+is split into segments: a flush takes the queue and the segment holding
+exactly those entries, and deletes the segment only after the commit. After
+a crash, ``recover`` returns whatever was journaled but possibly never
+committed; ``apply`` must therefore skip entries it has already written.
+
+Several worker processes can share one journal path. Each process names its
+segments after itself (``<journal>.<owner>.<n>``) and holds an exclusive lock
+on ``<journal>.<owner>.lock`` while it runs, so the lock is released exactly
+when the process dies. ``recover`` runs under ``<journal>.lock`` (one
+recovering process at a time) and only takes over segments whose owner lock
+it can acquire, i.e. those of processes that are gone.
+"""
+import glob
+import json
+import os
+import threading
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def _try_lock(f):
+    """Take an exclusive lock on open file ``f`` without waiting; False if it is held."""
+    try:
+        if fcntl is not None:
+            # flock: held per open file, so it also excludes other handles in this process
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class WriteBehindQueue:
+    """In-memory queue of pending rows with an append-only journal.
+
+    ``apply(entries)`` writes and commits a list of entries; it runs on the
+    flusher thread (or the caller's, for ``flush``) and is retried with the
+    same entries, followed by newer ones, if it raises.
+    """
+
+    def __init__(self, apply, journal_path=None, interval=0.05, max_rows=200, fsync=True):
+        self._apply = apply
+        self.journal_path = journal_path
+        self.interval = interval
+        self.max_rows = max_rows
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._queue = []
+        self._reserved = {}
+        self._journal = None
+        self._segment = 0
+        self._segments = []
+        # This process's name in segment file names, and the lock proving it is alive
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._owner_lock = None
+        self._recovery_lock = None
+        self._recovered = []
+        self._dead_owner_locks = []
+        self._thread = None
+        self._stopping = False
+        self.flushes = 0
+        self.rows_written = 0
+        self.failures = 0
+
+    def __len__(self):
+        return len(self._queue)
+
+    # -- reservations -------------------------------------------------------
+
+    def reserve(self, key):
+        """Claim ``key``; False if it is already reserved or queued."""
+        with self._lock:
+            if key in self._reserved:
+                return False
+            self._reserved[key] = False
+            return True
+
+    def release(self, key):
+        """Give up a reservation that was not submitted."""
+        with self._lock:
+            if self._reserved.get(key) is False:
+                del self._reserved[key]
+
+    def is_pending(self, key):
+        return key in self._reserved
+
+    def pending(self, key):
+        """The queued entry for ``key``, or None if it is not queued."""
+        with self._lock:
+            for queued_key, entry in self._queue:
+                if queued_key == key:
+                    return entry
+        return None
+
+    # -- writes -------------------------------------------------------------
+
+    def submit(self, key, entry):
+        """Journal and queue ``entry`` for the reserved ``key``."""
+        line = json.dumps(entry, separators=(',', ':')) + '\n'
+        with self._lock:
+            if self.journal_path:
+                if self._journal is None:
+                    self._hold_owner_lock()
+                    self._journal = open(self._segment_path(self._segment), 'a', encoding='utf-8')
+                self._journal.write(line)
+                self._journal.flush()
+                if self.fsync:
+                    os.fsync(self._journal.fileno())
+            self._queue.append((key, entry))
+            self._reserved[key] = True
+            if len(self._queue) >= self.max_rows:
+                self._wakeup.notify()
+
+    def _segment_path(self, n):
+        return f"{self.journal_path}.{self.owner}.{n:08d}"
+
+    def _hold_owner_lock(self):
+        # Taken before this process's first segment exists and held until exit
+        if self._owner_lock is None:
+            f = open(f"{self.journal_path}.{self.owner}.lock", 'a')
+            if not _try_lock(f):
+                f.close()
+                raise RuntimeError(f"journal owner {self.owner} is locked by another process")
+            self._owner_lock = f
+
+    def _rotate(self):
+        # Called with the lock held: the closed segment holds exactly the queued entries
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+            self._segments.append(self._segment_path(self._segment))
+            self._segment += 1
+
+    def flush(self):
+        """Write everything queued now; returns the number of rows written."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._queue:
+                    return 0
+                batch, self._queue = self._queue, []
+                self._rotate()
+                segments = list(self._segments)
+            try:
+                self._apply([entry for _, entry in batch])
+            except Exception:
+                with self._lock:
+                    self._queue[:0] = batch
+                    self.failures += 1
+                raise
+            with self._lock:
+                for key, _ in batch:
+                    self._reserved.pop(key, None)
+                self._segments = [s for s in self._segments if s not in segments]
+                self.flushes += 1
+                self.rows_written += len(batch)
+            for path in segments:
+                # Already gone if the segment was recovered elsewhere; the rows are committed either way
+                _remove(path)
+            return len(batch)
+
+    # -- recovery -----------------------------------------------------------
+
+    def recover(self):
+        """Entries left in journal segments by processes that are gone, oldest first.
+
+        Returns [] if another process is recovering right now; it takes care
+        of the same segments. Otherwise the recovery lock is held until
+        ``discard_recovered``, which the caller must call once the entries
+        are applied (and before accepting new writes). A torn final line is
+        ignored.
+        """
+        if not self.journal_path:
+            return []
+        self._hold_owner_lock()
+        lock = open(self.journal_path + '.lock', 'a')
+        if not _try_lock(lock):
+            lock.close()
+            return []
+        self._recovery_lock = lock
+
+        by_owner = {}
+        prefix = os.path.basename(self.journal_path) + '.'
+        for path in glob.glob(glob.escape(self.journal_path) + '.*'):
+            parts = os.path.basename(path)[len(prefix):].split('.')
+            if len(parts) == 2 and parts[1] == 'lock':
+                by_owner.setdefault(parts[0], [])
+            elif len(parts) == 2 and parts[1].isdigit():
+                by_owner.setdefault(parts[0], []).append((int(parts[1]), path))
+            elif len(parts) == 1 and parts[0].isdigit():
+                # Unowned segment from before segments were named per process
+                by_owner.setdefault(None, []).append((int(parts[0]), path))
+
+        paths = []
+        for owner, segments in sorted(by_owner.items(), key=lambda item: item[0] or ''):
+            if owner == self.owner:
+                continue
+            if owner is not None:
+                owner_lock = open(f"{self.journal_path}.{owner}.lock", 'a')
+                if not _try_lock(owner_lock):
+                    # Its process is still running and will flush these itself
+                    owner_lock.close()
+                    continue
+                self._dead_owner_locks.append(owner_lock)
+            paths.extend(path for _, path in sorted(segments))
+
+        entries = []
+        for path in paths:
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue
+        self._recovered = paths
+        return entries
+
+    def discard_recovered(self):
+        """Delete the segments returned by ``recover`` once they are applied."""
+        for path in self._recovered:
+            _remove(path)
+        self._recovered = []
+        for owner_lock in self._dead_owner_locks:
+            _remove(owner_lock.name)
+            owner_lock.close()
+        self._dead_owner_locks = []
+        if self._recovery_lock is not None:
+            self._recovery_lock.close()
+            self._recovery_lock = None
+
+    # -- background flusher -------------------------------------------------
+
+    def start(self):
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if len(self._queue) < self.max_rows and not self._stopping:
+                    self._wakeup.wait(self.interval)
+                stopping = self._stopping
+            try:
+                self.flush()
+            except Exception:
+                # Entries were re-queued; try again on the next tick
+                pass
+            if stopping:
+                return
+
+    def stop(self):
+        """Stop the flusher after a final flush."""
+        if self._thread is not None:
+            with self._lock:
+                self._stopping = True
+                self._wakeup.notify()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None